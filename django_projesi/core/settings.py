@@ -76,6 +76,16 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # ASGI Ayarı
 ASGI_APPLICATION = 'core.asgi.application'
 
+# Cache Ayarları
+# Paylaşılan Redis cache: web, Celery ve run_acquisition süreçleri yapılandırma sürümü gibi
+# bilgileri bu cache üzerinden paylaşır.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://redis:6379/1',
+    }
+}
+
 # Channels Ayarları
 CHANNEL_LAYERS = {
     'default': {
@@ -158,16 +168,112 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
 # Celery Beat Ayarları (Periyodik Görevler)
+# Not: Cihaz okuma artık beat ile değil, ayrı çalışan 'manage.py run_acquisition' servisiyle yapılıyor.
 CELERY_BEAT_SCHEDULE = {
-    'read-all-devices-every-10-seconds': {
-        'task': 'monitoring.tasks.read_modbus_data',
-        'schedule': 10.0, # Saniye cinsinden
-    },
     'check-scheduled-tasks-every-minute': {
         'task': 'monitoring.tasks.check_scheduled_tasks',
         'schedule': crontab(minute='*'),
     },
-    
+    'maintain-datapoint-partitions-daily': {
+        'task': 'monitoring.tasks.maintain_datapoint_partitions',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'archive-finished-test-runs-daily': {
+        'task': 'monitoring.tasks.archive_finished_test_runs',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
+# Modbus Okuma Ayarları
+# Aynı blokta birleştirilecek iki register arasındaki en fazla boş adres sayısı.
+# Boşluktaki adresler de okunur, bu yüzden büyük değerler gereksiz veri taşır.
+MODBUS_READ_GAP_TOLERANCE = 10
+# Adres hatası yüzünden register register okunan bloklar bu kadar saniyede bir yeniden tek istekle denenir
+MODBUS_SPLIT_REPROBE_INTERVAL = 600
+# Modbus TCP bağlantıları için istek zaman aşımı (saniye)
+MODBUS_TIMEOUT = 2
+# Bir okuma döngüsünde aynı anda okunabilecek en fazla cihaz sayısı
+MODBUS_POLL_CONCURRENCY = 50
+# Devre kesici: art arda bu kadar başarısız bağlantıdan sonra cihaz okuması askıya alınır
+MODBUS_CIRCUIT_FAILURE_THRESHOLD = 3
+# Askıya alma süresi bu değerden başlar, her başarısız denemede iki katına çıkar (saniye)
+MODBUS_CIRCUIT_BASE_BACKOFF = 10
+MODBUS_CIRCUIT_MAX_BACKOFF = 600
+# Yazma kuyruğu: ilk yazmadan sonra aynı cihaza gelecek diğer yazmalar için beklenen süre (saniye).
+# Bu süre içinde aynı register'a gelen yazmalarda yalnızca son değer, bitişik adresler tek istekte yazılır.
+MODBUS_WRITE_COALESCE_WINDOW = 0.05
+# Yazma görevlerinin cihaz cevabını en fazla bekleyeceği süre (saniye)
+MODBUS_WRITE_TIMEOUT = 10
+
+# Veri Toplama Servisi (run_acquisition) Ayarları
+# Not: Okuma periyodu artık her register'ın kendi scan_interval alanından gelir.
+# Register yapılandırması sinyallerle (bkz. monitoring/signals.py) değiştiğinde yeniden derlenir.
+# Bir döngüdeki kayıt sayısı bu eşiği geçerse DataPoint'ler PostgreSQL COPY ile yazılır
+DATAPOINT_COPY_THRESHOLD = 5000
+# DataPoint tablosu PostgreSQL'de zamana göre bölümlenir (bkz. monitoring/partitioning.py).
+# Yeni bölümlerin uzunluğu: 'day', 'week' veya 'month'
+DATAPOINT_PARTITION_INTERVAL = 'month'
+# Şimdiden sonra hazır tutulacak bölüm sayısı (bölümler her gece 'maintain-datapoint-partitions-daily' ile açılır)
+DATAPOINT_PARTITIONS_AHEAD = 3
+# Sıfırdan büyükse her zaman bölümü test_run_id'ye göre bu sayıda HASH alt bölüme ayrılır
+DATAPOINT_PARTITION_TEST_RUN_BUCKETS = 0
+# Bu kadar günden eski bölümler ana tablodan ayrılır (silinmez). None: hiçbir bölüm ayrılmaz.
+DATAPOINT_PARTITION_RETENTION_DAYS = None
+# Rapor ve grafiklerde gösterilecek en fazla nokta/satır sayısı. Ham veri bu sayıyı aşarsa
+# 1 dakikalık, 1 saatlik veya 1 günlük özet tablolarından (bkz. monitoring/rollups.py) okunur.
+ROLLUP_TARGET_POINTS = 5000
+# Register grafiği aralık API'si (bkz. monitoring/downsampling.py): bir yanıttaki en fazla nokta
+# sayısı ve bir istekte okunacak en fazla ham örnek. Penceredeki örnek sayısı bunu aşarsa özet
+# tablolarından okunur.
+CHART_RANGE_MAX_POINTS = 2000
+CHART_RANGE_SOURCE_LIMIT = 50000
+# Tamamlanmış/iptal edilmiş test seanslarının verisi sıkıştırılmış arşiv parçalarına taşınır
+# (bkz. monitoring/archive.py). Bir parçadaki en fazla örnek sayısı:
+ARCHIVE_CHUNK_SIZE = 2048
+# Bitişinin üzerinden bu kadar gün geçen seanslar her gece otomatik arşivlenir. None: yalnızca
+# `manage.py archive_test_runs` ile elle arşivlenir.
+ARCHIVE_AFTER_DAYS = None
+# CSV/Parquet dışa aktarımında veritabanından tek seferde okunan satır sayısı (sunucu taraflı cursor)
+EXPORT_CHUNK_SIZE = 5000
+# Parquet dışa aktarımında bir row group'taki satır sayısı; bellekte en fazla bu kadar satır tutulur
+EXPORT_PARQUET_ROW_GROUP_SIZE = 100000
+# Register çalışma zamanı durumu (son değer, son değişim, aktif alarmlar) bu Redis veritabanında
+# tutulur. None verilirse durum yalnızca süreç belleğinde tutulur (yeniden başlatmada kaybolur).
+RUNTIME_STATE_REDIS_URL = 'redis://redis:6379/2'
+# Register başına son değerler (bkz. monitoring/latest_values.py) tabloya ek olarak bu Redis
+# veritabanındaki bir hash'e de yazılır ve paneller önce oradan okur. None: yalnızca tablo kullanılır.
+LATEST_VALUES_REDIS_URL = 'redis://redis:6379/2'
+# Değeri değişmeyen register'ların son değer kaydı en fazla bu kadar saniyede bir tazelenir
+LATEST_VALUE_REFRESH_INTERVAL = 60
+# Yazma tamponu (bkz. monitoring/datapoint_buffer.py): okuma döngüsü örnekleri bu Redis veritabanındaki
+# bir stream'e ekler, veritabanına `run_datapoint_writer` servisi yazar. None: döngü doğrudan yazar.
+DATAPOINT_BUFFER_REDIS_URL = 'redis://redis:6379/3'
+# Stream'de bu kadar mesaj (okuma döngüsü) birikirse döngü örnekleri yeniden doğrudan veritabanına yazar
+DATAPOINT_BUFFER_MAX_BACKLOG = 10000
+# Yazıcının tek transaction'da yazdığı en fazla mesaj sayısı
+DATAPOINT_BUFFER_BATCH_SIZE = 500
+# Bu kadar saniyedir onaylanmayan mesajlar (durmuş yazıcı) başka bir yazıcı tarafından devralınır
+DATAPOINT_BUFFER_CLAIM_IDLE = 60
+# Bu kadar kez teslim edilip yazılamayan parti tek tek denenir; yazılamayan mesaj ayrı bir stream'e taşınır
+DATAPOINT_BUFFER_MAX_DELIVERIES = 5
+# Yazma tamponu açıkken cihaz durumu ve alarm kayıtları da arka planda yazılır (bkz. monitoring/deferred_writes.py).
+# Bu kadar iş birikirse döngü kuyruğun boşalmasını bekler; başarısız bir iş bu kadar kez yeniden denenir.
+DEFERRED_WRITE_MAX_BACKLOG = 1000
+DEFERRED_WRITE_RETRIES = 5
+# Okuma döngüsü kilidinin en uzun ömrü (saniye). Süreç çökerse kilit bu süre sonunda düşer;
+# en uzun döngü süresinden büyük olmalıdır.
+ACQUISITION_LOCK_TTL = 120
+
+# Loglama: monitoring uygulamasının INFO logları konsola yazılsın (run_acquisition servisi için)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'monitoring': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 # Login/Logout Yönlendirme Ayarları
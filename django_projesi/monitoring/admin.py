@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import Device, Register, DataPoint, TestRun, TestEventLog, ScheduledTask, DashboardWidget, AlarmRule, AlarmLog, RegisterMapping, EnumValue
+from .models import Device, Register, DataPoint, TestRun, TestEventLog, TestRunSegment, ScheduledTask, DashboardWidget, AlarmRule, AlarmLog, RegisterMapping, EnumValue
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
-    list_display = ('name', 'connection_host', 'port', 'slave_id', 'is_active')
+    list_display = ('name', 'connection_host', 'port', 'slave_id', 'is_active', 'status', 'circuit_state', 'circuit_retry_at')
+    list_filter = ('status', 'circuit_state')
+    readonly_fields = ('status', 'last_seen', 'circuit_state', 'circuit_retry_at')
     list_editable = ('is_active', 'connection_host', 'port', 'slave_id')
     search_fields = ('name',)
 
@@ -20,9 +22,9 @@ class EnumValueInline(admin.TabularInline):
 
 @admin.register(Register)
 class RegisterAdmin(admin.ModelAdmin):
-    list_display = ('name', 'device', 'address', 'register_type', 'data_type', 'display_preference', 'is_writable')
-    list_filter = ('device', 'register_type', 'data_type', 'display_preference')
-    list_editable = ('is_writable', 'data_type', 'display_preference')
+    list_display = ('name', 'device', 'address', 'register_type', 'data_type', 'display_preference', 'scan_interval', 'is_writable')
+    list_filter = ('device', 'register_type', 'data_type', 'display_preference', 'scan_interval', 'deadband_mode')
+    list_editable = ('is_writable', 'data_type', 'display_preference', 'scan_interval')
     search_fields = ('name', 'device__name')
     # --- YENİ EKLENEN SATIR ---
     inlines = [EnumValueInline]
@@ -46,6 +48,13 @@ class TestEventLogInline(admin.TabularInline):
     can_delete = False
     ordering = ('-timestamp',)
 
+# Seansın çalıştığı/duraklatıldığı zaman aralıkları (view'ler tarafından tutulur, elle düzenlenmez)
+class TestRunSegmentInline(admin.TabularInline):
+    model = TestRunSegment
+    extra = 0
+    readonly_fields = ('status', 'start_time', 'end_time')
+    can_delete = False
+
 @admin.register(ScheduledTask)
 class ScheduledTaskAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'time_to_run', 'action', 'is_active')
@@ -54,12 +63,12 @@ class ScheduledTaskAdmin(admin.ModelAdmin):
 
 @admin.register(TestRun)
 class TestRunAdmin(admin.ModelAdmin):
-    list_display = ('test_name', 'status', 'start_time', 'end_time', 'customer_name')
+    list_display = ('test_name', 'status', 'start_time', 'end_time', 'customer_name', 'archived_at')
     list_filter = ('status', 'customer_name')
     readonly_fields = ('elapsed_seconds', 'last_resumed_time')
     search_fields = ('test_name', 'customer_name')
     # Olay kayıtlarını Test Seansı detay sayfasının altında göster
-    inlines = [TestEventLogInline]
+    inlines = [TestEventLogInline, TestRunSegmentInline]
 
 @admin.register(TestEventLog)
 class TestEventLogAdmin(admin.ModelAdmin):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MonitoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'monitoring'
+
+    def ready(self):
+        # Yapılandırma değişikliklerinde okuma planı önbelleğini geçersiz kılan sinyaller
+        from . import signals  # noqa: F401
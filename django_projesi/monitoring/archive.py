@@ -0,0 +1,509 @@
+"""
+Tamamlanmış test seansları için sıkıştırılmış arşiv katmanı.
+
+COMPLETED veya ABORTED durumundaki bir seansın verisi bir daha değişmez. Arşivleme,
+seansın DataPoint satırlarını register başına ARCHIVE_CHUNK_SIZE örneklik
+parçalara (DataPointArchiveChunk) paketler ve ardından ham satırları siler.
+Parçalar Gorilla (Facebook, VLDB 2015) kodlamasıyla sıkıştırılır:
+
+- Zaman damgaları (mikrosaniye) delta-of-delta olarak yazılır; sabit periyotla
+  okunan register'larda örnek başına çoğunlukla 1 bit, okuma gecikmesi
+  titreşiminde 14-23 bit yer kaplar.
+- Değerler bir önceki değerle XOR'lanır; değişmeyen değer 1 bit, değişen
+  değer yalnızca farklı olan bitlerin bloğu kadar yer kaplar.
+
+Örnek başına tipik olarak birkaç bayt tutulur; ham tabloda bir satır indeksleriyle
+birlikte 100 bayttan fazladır. Parçalar açılmadan zaman aralığı ve min/maks
+değerleriyle elenebilir; tam seans taramaları birkaç bin parça okur.
+
+Raporlama view'leri arşivlenmiş seanslarda DataPoint sorgusu yerine
+ArchivedDataPoints kullanır; aynı filtreleri uygular ve şablonlara aynı
+alanları (timestamp, value, register) verir. Özet (rollup) tabloları
+arşivlemeden etkilenmez.
+
+bkz. management/commands/archive_test_runs.py
+"""
+import heapq
+import logging
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+from math import isnan, nan
+from operator import itemgetter
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DataPoint, DataPointArchiveChunk, Register, TestRun
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ('COMPLETED', 'ABORTED')
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MASK_64 = (1 << 64) - 1
+
+# Delta-of-delta kovaları: (önek, önek bit sayısı, değer bit sayısı). Gorilla'daki
+# saniye çözünürlüklü kovalar, mikrosaniyelik okuma titreşimine göre genişletilmiştir.
+DOD_BUCKETS = (
+    (0b10, 2, 14),
+    (0b110, 3, 23),
+    (0b1110, 4, 32),
+)
+DOD_FALLBACK = (0b1111, 4, 64)
+
+
+class BitWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value, nbits):
+        self._acc = (self._acc << nbits) | (value & ((1 << nbits) - 1))
+        self._bits += nbits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self):
+        if self._bits:
+            return bytes(self.buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self.buffer)
+
+
+class BitReader:
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.position = 0
+
+    def read(self, nbits):
+        start = self.position >> 3
+        end = (self.position + nbits + 7) >> 3
+        shift = (end << 3) - self.position - nbits
+        self.position += nbits
+        return (int.from_bytes(self.data[start:end], 'big') >> shift) & ((1 << nbits) - 1)
+
+
+def _signed(value, nbits):
+    return value - (1 << nbits) if value >= 1 << (nbits - 1) else value
+
+
+def _float_bits(value):
+    return int.from_bytes(struct.pack('>d', value), 'big')
+
+
+def _bits_float(bits):
+    return struct.unpack('>d', bits.to_bytes(8, 'big'))[0]
+
+
+def encode_samples(samples):
+    """Zamana göre sıralı (datetime, float) listesini tek bir bayt dizisine sıkıştırır."""
+    writer = BitWriter()
+    previous_us = previous_delta = 0
+    previous_bits = None
+    leading = trailing = None
+
+    for index, (timestamp, value) in enumerate(samples):
+        timestamp_us = (timestamp - EPOCH) // ONE_MICROSECOND
+        bits = _float_bits(value)
+        if index == 0:
+            writer.write(timestamp_us, 64)
+            writer.write(bits, 64)
+            previous_us, previous_bits = timestamp_us, bits
+            continue
+
+        # Zaman damgası: delta-of-delta
+        delta = timestamp_us - previous_us
+        dod = delta - previous_delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for prefix, prefix_bits, value_bits in DOD_BUCKETS + (DOD_FALLBACK,):
+                if -(1 << (value_bits - 1)) <= dod < (1 << (value_bits - 1)):
+                    break
+            writer.write(prefix, prefix_bits)
+            writer.write(dod, value_bits)
+        previous_us, previous_delta = timestamp_us, delta
+
+        # Değer: önceki değerle XOR
+        xor = bits ^ previous_bits
+        previous_bits = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        writer.write(1, 1)
+        xor_leading = min(64 - xor.bit_length(), 31)
+        xor_trailing = (xor & -xor).bit_length() - 1
+        if leading is not None and xor_leading >= leading and xor_trailing >= trailing:
+            # Farklı bitler önceki bloğun içinde kalıyor; blok bilgisi yeniden yazılmaz
+            writer.write(0, 1)
+            writer.write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = xor_leading, xor_trailing
+            length = 64 - leading - trailing
+            writer.write(1, 1)
+            writer.write(leading, 5)
+            writer.write(length - 1, 6)
+            writer.write(xor >> trailing, length)
+    return writer.getvalue()
+
+
+def decode_samples(data, count):
+    """encode_samples() çıktısından `count` örneği (datetime, float) listesi olarak açar."""
+    reader = BitReader(data)
+    samples = []
+    if count <= 0:
+        return samples
+    timestamp_us = _signed(reader.read(64), 64)
+    bits = reader.read(64)
+    samples.append((EPOCH + timedelta(microseconds=timestamp_us), _bits_float(bits)))
+    delta = 0
+    leading = trailing = 0
+
+    for _ in range(count - 1):
+        if reader.read(1):
+            # '10', '110', '1110' önekleri sıfırla biter; '1111' sıfırsız gelir
+            for _, _, value_bits in DOD_BUCKETS:
+                if not reader.read(1):
+                    break
+            else:
+                value_bits = DOD_FALLBACK[2]
+            delta += _signed(reader.read(value_bits), value_bits)
+        timestamp_us += delta
+
+        if reader.read(1):
+            if reader.read(1):
+                leading = reader.read(5)
+                length = reader.read(6) + 1
+                trailing = 64 - leading - length
+            bits ^= reader.read(64 - leading - trailing) << trailing
+        samples.append((EPOCH + timedelta(microseconds=timestamp_us), _bits_float(bits)))
+    return samples
+
+
+class ArchiveResult(NamedTuple):
+    rows: int
+    chunks: int
+    archived_bytes: int
+
+
+def _same_samples(left, right):
+    """Zaman damgaları tam, değerler bit düzeyinde karşılaştırılır (NaN != NaN olduğu için)."""
+    return len(left) == len(right) and all(
+        left_timestamp == right_timestamp and _float_bits(left_value) == _float_bits(right_value)
+        for (left_timestamp, left_value), (right_timestamp, right_value) in zip(left, right)
+    )
+
+
+def _build_chunk(test_run, register_id, samples):
+    data = encode_samples(samples)
+    if not _same_samples(decode_samples(data, len(samples)), samples):
+        raise ValueError(f"Register {register_id} parçası açıldığında özgün veriyle eşleşmedi, arşivleme durduruldu.")
+    # Eski çözücünün yazdığı NaN değerleri PostgreSQL'deki gibi en büyük değer sayılır:
+    # minimum sayısal değerlerden alınır, NaN içeren parçanın maksimumu NaN olur
+    numbers = [value for _, value in samples if not isnan(value)]
+    has_nan = len(numbers) < len(samples)
+    return DataPointArchiveChunk(
+        register_id=register_id, test_run=test_run,
+        start_timestamp=samples[0][0], end_timestamp=samples[-1][0], sample_count=len(samples),
+        min_value=min(numbers) if numbers else nan, max_value=nan if has_nan else max(numbers), data=data,
+    )
+
+
+def archive_test_run(test_run, chunk_size=None):
+    """
+    Seansın DataPoint satırlarını sıkıştırılmış parçalara taşır ve ham satırları siler.
+    Tüm işlem tek transaction'dadır; her parça yazılmadan önce açılıp doğrulanır.
+    """
+    chunk_size = chunk_size or getattr(settings, 'ARCHIVE_CHUNK_SIZE', 2048)
+    with transaction.atomic():
+        test_run = TestRun.objects.select_for_update().get(pk=test_run.pk)
+        if test_run.status not in ARCHIVABLE_STATUSES:
+            raise ValueError(f"'{test_run.test_name}' seansı bitmemiş ({test_run.get_status_display()}), arşivlenemez.")
+        if test_run.archived_at:
+            return ArchiveResult(0, 0, 0)
+
+        rows = DataPoint.objects.filter(test_run=test_run).order_by('register_id', 'timestamp', 'id').values_list(
+            'register_id', 'timestamp', 'value'
+        )
+        pending = []
+        chunk_count = archived_rows = archived_bytes = 0
+        current_register, samples = None, []
+
+        def flush():
+            nonlocal chunk_count, archived_rows, archived_bytes
+            chunk = _build_chunk(test_run, current_register, samples)
+            pending.append(chunk)
+            chunk_count += 1
+            archived_rows += chunk.sample_count
+            archived_bytes += len(chunk.data)
+            if len(pending) >= 100:
+                DataPointArchiveChunk.objects.bulk_create(pending)
+                pending.clear()
+
+        for register_id, timestamp, value in rows.iterator(chunk_size=10000):
+            if samples and (register_id != current_register or len(samples) >= chunk_size):
+                flush()
+                samples = []
+            current_register = register_id
+            samples.append((timestamp, value))
+        if samples:
+            flush()
+        DataPointArchiveChunk.objects.bulk_create(pending)
+
+        deleted, _ = DataPoint.objects.filter(test_run=test_run).delete()
+        if deleted != archived_rows:
+            raise ValueError(f"Silinen satır sayısı ({deleted}) arşivlenen örnek sayısıyla ({archived_rows}) eşleşmiyor, arşivleme geri alındı.")
+        test_run.archived_at = timezone.now()
+        test_run.save(update_fields=['archived_at'])
+
+    logger.info(
+        f"--> SEANS ARŞİVLENDİ: '{test_run.test_name}' {archived_rows} satır, {chunk_count} parça, {archived_bytes} bayt."
+    )
+    return ArchiveResult(archived_rows, chunk_count, archived_bytes)
+
+
+def restore_test_run(test_run, batch_size=10000):
+    """Arşivlenmiş seansın örneklerini yeniden DataPoint satırları olarak yazar ve parçaları siler."""
+    with transaction.atomic():
+        test_run = TestRun.objects.select_for_update().get(pk=test_run.pk)
+        if not test_run.archived_at:
+            return 0
+        restored = 0
+        datapoints = []
+        chunks = DataPointArchiveChunk.objects.filter(test_run=test_run).order_by('register_id', 'start_timestamp')
+        for register_id, count, data in chunks.values_list('register_id', 'sample_count', 'data').iterator(chunk_size=100):
+            for timestamp, value in decode_samples(data, count):
+                datapoints.append(DataPoint(register_id=register_id, value=value, timestamp=timestamp, test_run=test_run))
+            if len(datapoints) >= batch_size:
+                DataPoint.objects.bulk_create(datapoints, batch_size=1000)
+                restored += len(datapoints)
+                datapoints = []
+        DataPoint.objects.bulk_create(datapoints, batch_size=1000)
+        restored += len(datapoints)
+        chunks.delete()
+        test_run.archived_at = None
+        test_run.save(update_fields=['archived_at'])
+    logger.info(f"--> SEANS ARŞİVDEN GERİ YÜKLENDİ: '{test_run.test_name}' {restored} satır.")
+    return restored
+
+
+def archivable_test_runs(older_than_days):
+    """Bitişinin üzerinden `older_than_days` gün geçmiş, henüz arşivlenmemiş seanslar."""
+    return TestRun.objects.filter(
+        status__in=ARCHIVABLE_STATUSES, archived_at__isnull=True,
+        end_time__lte=timezone.now() - timedelta(days=older_than_days),
+    )
+
+
+class ArchivedPoint:
+    """Arşivden okunan tek bir örnek; şablonlarda DataPoint gibi kullanılır."""
+    __slots__ = ('register', 'register_id', 'timestamp', 'value')
+
+    def __init__(self, register, register_id, timestamp, value):
+        self.register = register
+        self.register_id = register_id
+        self.timestamp = timestamp
+        self.value = value
+
+
+class ArchivedDataPoints:
+    """
+    Arşivlenmiş örneklerin filtrelenmiş, QuerySet benzeri salt okunur görünümü.
+    Raporlama view'lerinin kullandığı işlemleri (select_related, order_by, count,
+    dilimleme, iterasyon) destekler. Parçalar zaman aralığı ve min/maks ile elenir,
+    kalanlar yalnızca okunurken ve tek tek açılır.
+
+    `value_condition`: ('gt' | 'lt' | 'exact', değer). `time_ranges` içindeki
+    aralıklar (başlangıç ve bitiş dahil) birleşim olarak uygulanır; None filtre
+    yok, boş liste ise hiçbir örnek eşleşmez demektir (segmenti olmayan durum
+    filtresi, ham sorgudaki in_status gibi).
+    """
+    ordered = True
+
+    def __init__(self, test_run=None, register_id=None, time_ranges=None, start=None, end=None,
+                 value_condition=None, descending=False):
+        self.test_run = test_run
+        self.register_id = register_id
+        self.time_ranges = None if time_ranges is None else list(time_ranges)
+        self.start = start
+        self.end = end
+        self.value_condition = value_condition
+        self.descending = descending
+        self._count = None
+
+    def _clone(self, **changes):
+        params = dict(
+            test_run=self.test_run, register_id=self.register_id, time_ranges=self.time_ranges, start=self.start,
+            end=self.end, value_condition=self.value_condition, descending=self.descending,
+        )
+        params.update(changes)
+        return ArchivedDataPoints(**params)
+
+    def select_related(self, *fields):
+        return self
+
+    def order_by(self, *fields):
+        return self._clone(descending=bool(fields) and fields[0].startswith('-'))
+
+    def _chunks(self):
+        chunks = DataPointArchiveChunk.objects.all()
+        if self.test_run is not None:
+            chunks = chunks.filter(test_run=self.test_run)
+        if self.register_id:
+            chunks = chunks.filter(register_id=self.register_id)
+        if self.time_ranges is not None:
+            if not self.time_ranges:
+                return chunks.none()
+            q_objects = Q()
+            for range_start, range_end in self.time_ranges:
+                q_objects |= Q(start_timestamp__lte=range_end, end_timestamp__gte=range_start)
+            chunks = chunks.filter(q_objects)
+        if self.start:
+            chunks = chunks.filter(end_timestamp__gte=self.start)
+        if self.end:
+            chunks = chunks.filter(start_timestamp__lte=self.end)
+        if self.value_condition:
+            operator, value = self.value_condition
+            if operator == 'gt':
+                chunks = chunks.filter(max_value__gt=value)
+            elif operator == 'lt':
+                chunks = chunks.filter(min_value__lt=value)
+            else:
+                chunks = chunks.filter(min_value__lte=value, max_value__gte=value)
+        return chunks
+
+    def _matches(self, timestamp, value):
+        if self.start and timestamp < self.start:
+            return False
+        if self.end and timestamp > self.end:
+            return False
+        if self.time_ranges is not None and not any(start <= timestamp <= end for start, end in self.time_ranges):
+            return False
+        if self.value_condition:
+            operator, threshold = self.value_condition
+            if operator == 'gt':
+                # NaN, veritabanı sorgusundaki gibi her değerden büyük sayılır
+                return value > threshold or isnan(value)
+            if operator == 'lt':
+                return value < threshold
+            return value == threshold
+        return True
+
+    def _covers(self, start_timestamp, end_timestamp, min_value, max_value):
+        """Parçadaki tüm örnekler filtrelere uyuyor mu? (Uyuyorsa sayım için açılması gerekmez.)"""
+        if self.start and start_timestamp < self.start:
+            return False
+        if self.end and end_timestamp > self.end:
+            return False
+        if self.time_ranges is not None and not any(start <= start_timestamp and end_timestamp <= end for start, end in self.time_ranges):
+            return False
+        if self.value_condition:
+            operator, threshold = self.value_condition
+            if operator == 'gt':
+                return min_value > threshold
+            if operator == 'lt':
+                return max_value < threshold
+            return min_value == max_value == threshold
+        return True
+
+    def _stream(self, chunk_ids):
+        """Bir (seans, register) çiftinin parçalarını sırayla açıp filtreye uyan örnekleri verir."""
+        for chunk_id, count in chunk_ids:
+            data = DataPointArchiveChunk.objects.filter(id=chunk_id).values_list('data', flat=True).get()
+            samples = decode_samples(data, count)
+            if self.descending:
+                samples.reverse()
+            for timestamp, value in samples:
+                if self._matches(timestamp, value):
+                    yield timestamp, value
+
+    def rows(self):
+        """Filtreye uyan örnekleri (zaman, register_id, değer) olarak (zaman, register_id) sırasıyla verir."""
+        streams = {}
+        order = '-start_timestamp' if self.descending else 'start_timestamp'
+        for chunk_id, test_run_id, register_id, count in self._chunks().order_by(order).values_list(
+            'id', 'test_run_id', 'register_id', 'sample_count'
+        ):
+            streams.setdefault((test_run_id, register_id), []).append((chunk_id, count))
+
+        def tagged(register_id, chunk_ids):
+            for timestamp, value in self._stream(chunk_ids):
+                yield timestamp, register_id, value
+
+        return heapq.merge(
+            *(tagged(register_id, chunk_ids) for (_, register_id), chunk_ids in streams.items()),
+            key=itemgetter(0, 1), reverse=self.descending,
+        )
+
+    def seek(self, key=None, descending=True):
+        """
+        (zaman, register_id) anahtarından sonra gelen örnekleri verilen yönde ArchivedPoint
+        olarak verir; anahtarın kendisi dahil değildir (keyset sayfalama, bkz. pagination.py).
+        Bir register her okuma döngüsünde en fazla bir örnek yazdığı için anahtar benzersizdir.
+        """
+        changes = {'descending': descending}
+        if key is not None:
+            # Anahtardan önceki (veya sonraki) parçalar hiç açılmaz
+            if descending:
+                changes['end'] = min(self.end, key[0]) if self.end else key[0]
+            else:
+                changes['start'] = max(self.start, key[0]) if self.start else key[0]
+        for point in self._clone(**changes):
+            if key is not None:
+                point_key = (point.timestamp, point.register_id)
+                if (point_key >= key) if descending else (point_key <= key):
+                    continue
+            yield point
+
+    def count(self):
+        if self._count is None:
+            total = 0
+            for chunk_id, count, start_timestamp, end_timestamp, min_value, max_value in self._chunks().values_list(
+                'id', 'sample_count', 'start_timestamp', 'end_timestamp', 'min_value', 'max_value'
+            ):
+                if self._covers(start_timestamp, end_timestamp, min_value, max_value):
+                    total += count
+                else:
+                    total += sum(1 for _ in self._stream([(chunk_id, count)]))
+            self._count = total
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self):
+        return next(iter(self.rows()), None) is not None
+
+    def __bool__(self):
+        return self.exists()
+
+    def __iter__(self):
+        registers = {}
+        for timestamp, register_id, value in self.rows():
+            register = registers.get(register_id)
+            if register is None:
+                register = registers[register_id] = Register.objects.select_related('device').get(pk=register_id)
+            yield ArchivedPoint(register, register_id, timestamp, value)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(islice(iter(self), key.start, key.stop, key.step))
+        return next(islice(iter(self), key, None))
+
+
+def archived_value_at(register_id, moment, test_run=None):
+    """series.value_at()'in arşivdeki karşılığı: `moment` anından önceki son örnek veya None."""
+    chunks = DataPointArchiveChunk.objects.filter(register_id=register_id, start_timestamp__lte=moment)
+    if test_run is not None:
+        chunks = chunks.filter(test_run=test_run)
+    chunk = chunks.order_by('-start_timestamp').values_list('sample_count', 'data').first()
+    if chunk is None:
+        return None
+    earlier = [sample for sample in decode_samples(chunk[1], chunk[0]) if sample[0] <= moment]
+    return earlier[-1] if earlier else None
@@ -0,0 +1,135 @@
+"""
+Asyncio tabanlı okuma motoru: tüm aktif cihazları pymodbus'ın async istemcisiyle
+eşzamanlı okur. Ölü bir cihaz, diğerlerinin okunmasını bekletmez.
+
+Motor sadece Modbus I/O yapar; DataPoint, WebSocket ve alarm işlemleri
+sonuçlar döndükten sonra çağıran tarafta (senkron ORM ile) yapılır. Yazma
+kuyruğu (write_queue.py) da aynı loop'u ve aynı soketleri kullanır.
+"""
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils import timezone
+from pymodbus.client import AsyncModbusTcpClient
+
+from .read_planner import read_device_block
+
+
+@dataclass
+class DeviceReadResult:
+    """Bir cihazın tek döngüdeki okuma sonucu."""
+    device: object
+    connected: bool = False
+    # (ReadBlock, ham veri) çiftleri; okunamayan bloklarda ham veri None olur.
+    # Tek istekte okunamayan bloklar register başına alt bloklar olarak yer alır
+    blocks: list = field(default_factory=list)
+    error: str = None
+    duration: float = 0.0
+    # Okumanın yapıldığı an; DataPoint'ler bu zaman damgasıyla kaydedilir
+    timestamp: object = None
+
+
+class AsyncModbusPoller:
+    """
+    (host, port) başına tek bir AsyncModbusTcpClient tutar ve cihazları
+    en fazla `concurrency` kadar eşzamanlı okur. Aynı gateway'i paylaşan
+    cihazların istekleri, soket başına bir kilit ile sıraya alınır.
+    """
+
+    def __init__(self, concurrency=None, timeout=None):
+        self.concurrency = concurrency or getattr(settings, 'MODBUS_POLL_CONCURRENCY', 50)
+        self.timeout = timeout if timeout is not None else getattr(settings, 'MODBUS_TIMEOUT', 2)
+        self._clients = {}
+        self._locks = {}
+
+    def get_client(self, host, port):
+        """(host, port) için paylaşılan istemciyi ve kilidini döndürür; yazma kuyruğu da bunu kullanır."""
+        key = (host, port)
+        if key not in self._clients:
+            # reconnect_delay=0: arka planda otomatik yeniden bağlanma yok, ihtiyaç anında bağlanılır
+            self._clients[key] = AsyncModbusTcpClient(host, port=port, timeout=self.timeout, reconnect_delay=0)
+            self._locks[key] = asyncio.Lock()
+        return self._clients[key], self._locks[key]
+
+    async def poll_device(self, device, blocks, semaphore):
+        result = DeviceReadResult(device)
+        started = time.monotonic()
+        async with semaphore:
+            client, lock = self.get_client(device.connection_host, device.port)
+            async with lock:
+                try:
+                    if client.connected or await client.connect():
+                        result.connected = True
+                        result.timestamp = timezone.now()
+                        for block in blocks:
+                            result.blocks.extend(await read_device_block(client, block, device.slave_id, device.id))
+                except Exception as e:
+                    # Soket bozulmuş olabilir; bir sonraki döngüde yeniden bağlanılır
+                    client.close()
+                    result.error = str(e)
+        result.duration = time.monotonic() - started
+        return result
+
+    async def poll(self, targets):
+        """
+        `targets`: (device, blocks) çiftleri. Sonuçları hedeflerle aynı sırada
+        ve toplam döngü süresiyle birlikte döndürür.
+        """
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(
+            self.poll_device(device, blocks, semaphore) for device, blocks in targets
+        ))
+        return list(results), time.monotonic() - started
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+
+
+# --- SÜREÇ BAŞINA KALICI EVENT LOOP ---
+# Soketlerin döngüler arasında açık kalabilmesi için istemciler her seferinde
+# yeni bir loop açan asyncio.run() yerine, arka plandaki tek bir loop üzerinde yaşar.
+
+_loop = None
+_poller = None
+_loop_pid = None
+_loop_guard = threading.Lock()
+
+
+def _get_loop():
+    global _loop, _poller, _loop_pid
+    with _loop_guard:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _poller = AsyncModbusPoller()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='modbus-poller', daemon=True).start()
+        return _loop, _poller
+
+
+def get_poller():
+    """Süreç başına arka plan loop'unu ve poller'ı döndürür (gerekirse başlatır)."""
+    return _get_loop()
+
+
+def shutdown_poller():
+    """Arka plandaki loop'u durdurur ve açık soketleri kapatır (servis kapanırken çağrılır)."""
+    global _loop, _poller
+    with _loop_guard:
+        if _loop is None or _loop_pid != os.getpid():
+            return
+        loop, poller = _loop, _poller
+        _loop = _poller = None
+    loop.call_soon_threadsafe(poller.close)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def poll_devices(targets):
+    """Senkron kod için giriş noktası: hedefleri arka plandaki loop'ta okur ve sonucu bekler."""
+    loop, poller = _get_loop()
+    return asyncio.run_coroutine_threadsafe(poller.poll(targets), loop).result()
@@ -0,0 +1,116 @@
+"""
+Cihaz bazında devre kesici (circuit breaker).
+
+Art arda bağlantı hatası veren bir cihaz, her döngüde bağlantı zaman aşımı
+kadar süre harcatmasın diye bir süre okunmaz:
+
+- closed: normal okuma. Art arda `failure_threshold` hatadan sonra open'a geçer.
+- open: cihaz okunmaz. Bekleme süresi dolunca half_open'a geçer.
+- half_open: tek bir deneme okuması yapılır. Başarılıysa closed'a döner;
+  başarısızsa bekleme süresi iki katına çıkarılarak (en fazla `max_backoff`)
+  yeniden open'a geçer.
+
+Durum süreç içinde tutulur; Device.circuit_state ve circuit_retry_at yalnızca
+arayüzde göstermek için durum değiştiğinde güncellenir.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Tek bir cihazın devre kesici durumu."""
+
+    def __init__(self, state=CLOSED):
+        self.state = CLOSED
+        self.failures = 0
+        # Art arda kaç kez açıldığı; bekleme süresi buna göre katlanır
+        self.open_count = 0
+        self.retry_at = None
+        if state != CLOSED:
+            # Önceki süreçten açık kalmış cihaz: hemen bir deneme yapılsın,
+            # başarısız olursa tekrar açılsın
+            self.state = OPEN
+            self.open_count = 1
+            self.retry_at = time.monotonic()
+
+
+class DeviceCircuitBreakers:
+    """Tüm cihazların devre kesicileri; okuma döngüsü tarafından kullanılır."""
+
+    def __init__(self, failure_threshold=None, base_backoff=None, max_backoff=None):
+        self.failure_threshold = failure_threshold or getattr(settings, 'MODBUS_CIRCUIT_FAILURE_THRESHOLD', 3)
+        self.base_backoff = base_backoff or getattr(settings, 'MODBUS_CIRCUIT_BASE_BACKOFF', 10)
+        self.max_backoff = max_backoff or getattr(settings, 'MODBUS_CIRCUIT_MAX_BACKOFF', 600)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _get(self, device):
+        breaker = self._breakers.get(device.id)
+        if breaker is None:
+            breaker = self._breakers[device.id] = CircuitBreaker(device.circuit_state)
+        return breaker
+
+    def allow(self, device, now=None):
+        """Cihaz bu döngüde okunabilir mi? Bekleme süresi dolmuş açık devreyi half_open'a geçirir."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            breaker = self._get(device)
+            if breaker.state == OPEN:
+                if now < breaker.retry_at:
+                    return False
+                breaker.state = HALF_OPEN
+            return True
+
+    def is_open(self, device):
+        """Devre açık mı? allow()'dan farklı olarak durumu değiştirmez (yazmalar için)."""
+        with self._lock:
+            return self._get(device).state == OPEN
+
+    def record_success(self, device):
+        with self._lock:
+            breaker = self._get(device)
+            breaker.failures = 0
+            breaker.open_count = 0
+            breaker.retry_at = None
+            if breaker.state != CLOSED:
+                logger.info(f"==> DEVRE KAPANDI: {device.name} cihazına yeniden bağlanıldı.")
+            breaker.state = CLOSED
+            return breaker.state
+
+    def record_failure(self, device, now=None):
+        """Başarısız bağlantıyı kaydeder ve cihazın yeni devre durumunu döndürür."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            breaker = self._get(device)
+            breaker.failures += 1
+            if breaker.state == HALF_OPEN or (breaker.state == CLOSED and breaker.failures >= self.failure_threshold):
+                breaker.open_count += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (breaker.open_count - 1))
+                breaker.state = OPEN
+                breaker.retry_at = now + backoff
+                logger.warning(
+                    f"!!! DEVRE AÇILDI: {device.name} cihazı {breaker.failures} kez bağlantı hatası verdi, "
+                    f"{backoff} sn boyunca okunmayacak."
+                )
+            return breaker.state
+
+    def retry_time(self, device):
+        """Açık devrenin bir sonraki deneme zamanı (duvar saati); göstermek içindir."""
+        breaker = self._breakers.get(device.id)
+        if breaker is None or breaker.state != OPEN:
+            return None
+        return timezone.now() + timedelta(seconds=max(0.0, breaker.retry_at - time.monotonic()))
+
+
+circuit_breakers = DeviceCircuitBreakers()
@@ -0,0 +1,173 @@
+"""
+Derlenmiş register yapılandırması önbelleği.
+
+Okuma döngüsünün ihtiyaç duyduğu her şey (çözme tarifi, çarpan, tersleme,
+enum eşleşmeleri, alarm kuralları, eşleştirme grafı ve okuma blokları)
+tek seferde veritabanından okunup değişmez nesnelere derlenir. Kararlı
+durumda bir döngü hiç yapılandırma sorgusu yapmaz.
+
+Yapılandırma değiştiğinde (bkz. signals.py) paylaşılan cache'teki sürüm
+anahtarı yenilenir; web, Celery ve run_acquisition süreçleri bir sonraki
+erişimde planı yeniden derler.
+"""
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .mapping_engine import compile_mapping_graph
+from .models import AlarmRule, Device, Register, RegisterMapping
+from .read_planner import forget_split_blocks
+from .scan_scheduler import plan_scan_groups
+
+logger = logging.getLogger(__name__)
+
+CONFIG_VERSION_KEY = 'monitoring:acquisition_config_version'
+
+
+@dataclass(frozen=True)
+class CompiledAlarmRule:
+    id: int
+    name: str
+    condition: str
+    threshold: float
+    severity: str
+    severity_display: str
+
+
+@dataclass(frozen=True)
+class CompiledRegister:
+    """Bir Register'ın okuma döngüsü için gereken değişmez kopyası."""
+    id: int
+    name: str
+    device_id: int
+    address: int
+    register_type: str
+    data_type: str
+    byte_order: str
+    string_length: int
+    scaling_factor: float
+    invert_value: bool
+    is_writable: bool
+    display_preference: str
+    scan_interval: int
+    deadband_mode: str
+    deadband_value: float
+    heartbeat_interval: int
+    # ham değer -> etiket
+    enum_map: MappingProxyType
+    alarm_rules: tuple
+    # Bu register değiştiğinde güncellenecek hedef register ID'leri (bkz. mapping_engine.py)
+    mapping_destination_ids: tuple
+
+    @classmethod
+    def from_model(cls, register):
+        return cls(
+            id=register.id,
+            name=register.name,
+            device_id=register.device_id,
+            address=register.address,
+            register_type=register.register_type,
+            data_type=register.data_type,
+            byte_order=register.byte_order,
+            string_length=register.string_length,
+            scaling_factor=register.scaling_factor,
+            invert_value=register.invert_value,
+            is_writable=register.is_writable,
+            display_preference=register.display_preference,
+            scan_interval=register.scan_interval,
+            deadband_mode=register.deadband_mode,
+            deadband_value=register.deadband_value,
+            heartbeat_interval=register.heartbeat_interval,
+            enum_map=MappingProxyType({ev.raw_value: ev.label for ev in register.enum_values.all()}),
+            alarm_rules=tuple(
+                CompiledAlarmRule(
+                    id=rule.id, name=rule.name, condition=rule.condition,
+                    threshold=rule.threshold, severity=rule.severity,
+                    severity_display=rule.get_severity_display(),
+                )
+                for rule in register.active_alarm_rules
+            ),
+            mapping_destination_ids=tuple(m.destination_register_id for m in register.active_source_mappings),
+        )
+
+
+class DevicePlan(NamedTuple):
+    """Bir cihazın derlenmiş okuma planı: (device, {scan_interval: [ReadBlock, ...]})."""
+    device: Device
+    scan_groups: dict
+
+
+def compile_device_plans():
+    """Aktif cihazların okuma planlarını tek bir prefetch zinciriyle derler."""
+    registers = Register.objects.prefetch_related(
+        'enum_values',
+        Prefetch('alarm_rules', queryset=AlarmRule.objects.filter(is_active=True), to_attr='active_alarm_rules'),
+        Prefetch('source_mappings', queryset=RegisterMapping.objects.filter(is_active=True), to_attr='active_source_mappings'),
+    )
+    devices = Device.objects.filter(is_active=True).prefetch_related(Prefetch('registers', queryset=registers))
+    return [
+        DevicePlan(device, plan_scan_groups([CompiledRegister.from_model(r) for r in device.registers.all()]))
+        for device in devices
+    ]
+
+
+class AcquisitionConfigCache:
+    """Süreç içi plan önbelleği; paylaşılan sürüm anahtarı değiştiğinde yeniden derler."""
+
+    def __init__(self):
+        self._plans = None
+        self._mapping_graph = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_plans(self):
+        """
+        Derlenmiş planları döndürür. Yapılandırma değişmediği sürece her seferinde
+        aynı liste nesnesi döner; çağıranlar değişikliği `is` ile anlayabilir.
+        """
+        version = _get_shared_version()
+        with self._lock:
+            if self._plans is None or version != self._version:
+                self._plans = compile_device_plans()
+                # Register'lar değişmiş olabilir; bölünen bloklar yeniden tek istekle denenir
+                forget_split_blocks()
+                self._mapping_graph = compile_mapping_graph(self._plans)
+                self._version = version
+                logger.info(f"Register yapılandırması derlendi: {len(self._plans)} cihaz.")
+            return self._plans
+
+    def get_mapping_graph(self):
+        """Güncel planlarla birlikte derlenen eşleştirme grafını döndürür."""
+        self.get_plans()
+        return self._mapping_graph
+
+    def invalidate(self):
+        with self._lock:
+            self._plans = None
+
+
+config_cache = AcquisitionConfigCache()
+
+
+def _get_shared_version():
+    try:
+        return cache.get(CONFIG_VERSION_KEY)
+    except Exception as e:
+        # Cache erişilemiyorsa mevcut planla devam et; sürüm değişmemiş sayılır
+        logger.warning(f"!!! CACHE HATASI: Yapılandırma sürümü okunamadı: {e}")
+        return config_cache._version
+
+
+def invalidate_config():
+    """Tüm süreçlerdeki derlenmiş planları geçersiz kılar."""
+    config_cache.invalidate()
+    try:
+        cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"!!! CACHE HATASI: Yapılandırma sürümü güncellenemedi: {e}")
@@ -21,8 +21,9 @@ class LiveDataConsumer(AsyncWebsocketConsumer):
         # Tarayıcıya olayın tamamını ('type' ve 'data' dahil) JSON olarak gönder
         await self.send(text_data=json.dumps(event))
 
-    # 'send_device_status' tipinde bir olay geldiğinde bu fonksiyon çalışır
-    async def send_device_status(self, event):
+    # 'send_device_statuses' tipinde bir olay geldiğinde bu fonksiyon çalışır
+    # (bir okuma döngüsündeki tüm cihaz durum değişiklikleri tek mesajda gelir)
+    async def send_device_statuses(self, event):
         # Tarayıcıya olayın tamamını ('type' ve 'data' dahil) JSON olarak gönder
         await self.send(text_data=json.dumps(event))
 
@@ -1,4 +1,5 @@
-from .models import Register, DataPoint
+from .latest_values import latest_value_store
+from .models import Register
 
 def status_bar_processor(request):
     """Her şablona, durum çubuğunda gösterilecek register'ları ve son değerlerini gönderir."""
@@ -8,16 +9,17 @@ def status_bar_processor(request):
         return {'statusbar_items': []}
 
     items = []
-    registers_to_show = Register.objects.filter(show_on_statusbar=True, device__is_active=True).select_related('device')
+    registers_to_show = list(Register.objects.filter(show_on_statusbar=True, device__is_active=True).select_related('device'))
+    # Son değerler tek seferde okunur (register başına sorgu yapılmaz)
+    latest_values = latest_value_store.get_values(register.id for register in registers_to_show)
 
     for register in registers_to_show:
-        latest_datapoint = DataPoint.objects.filter(register=register).order_by('-timestamp').first()
         items.append({
             'id': register.id,
             'name': register.name,
             'icon': register.icon_name,
             'type': register.register_type,
-            'value': latest_datapoint.value if latest_datapoint else None
+            'value': latest_values.get(register.id)
         })
 
     return {'statusbar_items': items}
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Okuma döngüsü için tek uçuş (single-flight) kilidi ve döngü istatistikleri.
+
+Bir döngü sürerken başlatılan yeni döngü (üst üste binen Celery tetiklemesi
+veya ikinci bir run_acquisition süreci) Modbus trafiğini ikiye katlar ve aynı
+DataPoint'leri iki kez yazar. Kilit paylaşılan cache'te (Redis) SET NX + TTL
+ile tutulur; kilidi alamayan tetikleme atlanır ve sayılır. Redis'te kilit
+redis-py'ın Lock'u ile bırakılır: jetonu karşılaştırıp silen Lua betiği tek
+adımda çalışır, TTL dolup kilidi başka bir süreç almışsa ona dokunulmaz.
+
+Her döngünün süresi ve gecikmesi (planlanan zamandan ne kadar geç başladığı)
+paylaşılan cache'e yazılır; /api/acquisition-status/ üzerinden izlenebilir.
+"""
+import logging
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ACQUISITION_LOCK_KEY = 'monitoring:acquisition_lock'
+ACQUISITION_STATS_KEY = 'monitoring:acquisition_stats'
+ACQUISITION_SKIPPED_KEY = 'monitoring:acquisition_skipped'
+
+
+class CacheLock:
+    """Redis olmayan cache'ler (yerel geliştirme) için jetonlu kilit; Lock ile aynı arayüz."""
+
+    def __init__(self, key, ttl):
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+
+    def acquire(self, blocking=False):
+        return cache.add(self.key, self.token, self.ttl)
+
+    def release(self):
+        # Sadece kendi kilidimizi bırak; TTL dolup başkası almışsa dokunma
+        if cache.get(self.key) == self.token:
+            cache.delete(self.key)
+
+
+def make_lock(key, ttl):
+    """Paylaşılan cache Redis ise redis-py Lock'u, değilse CacheLock döndürür."""
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        from redis.lock import Lock
+        return Lock(backend._cache.get_client(write=True), backend.make_key(key), timeout=ttl)
+    return CacheLock(key, ttl)
+
+
+@contextmanager
+def single_flight(key=ACQUISITION_LOCK_KEY, ttl=None):
+    """
+    Kilidi almaya çalışır ve alınıp alınmadığını (True/False) verir. Kilit blok
+    bitince bırakılır; süreç çökerse TTL dolunca kendiliğinden düşer.
+    """
+    ttl = ttl or getattr(settings, 'ACQUISITION_LOCK_TTL', 120)
+    try:
+        lock = make_lock(key, ttl)
+        acquired = lock.acquire(blocking=False)
+    except Exception as e:
+        # Cache erişilemiyorsa veri toplamayı durdurmak yerine kilitsiz devam et
+        logger.warning(f"!!! CACHE HATASI: Döngü kilidi alınamadı, kilitsiz devam ediliyor: {e}")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except Exception as e:
+                # Lock, TTL dolmuş (artık bizim olmayan) kilitte LockNotOwnedError verir
+                logger.warning(f"!!! CACHE HATASI: Döngü kilidi bırakılamadı: {e}")
+
+
+def record_skipped_cycle():
+    """Kilit alınamadığı için atlanan bir döngüyü sayar ve sayacın yeni değerini döndürür."""
+    try:
+        cache.add(ACQUISITION_SKIPPED_KEY, 0, None)
+        return cache.incr(ACQUISITION_SKIPPED_KEY)
+    except Exception as e:
+        logger.warning(f"!!! CACHE HATASI: Atlanan döngü sayılamadı: {e}")
+        return None
+
+
+def record_cycle(duration, lag=0.0, interval=None, missed_cycles=0):
+    """
+    Tamamlanan döngünün süresini ve gecikmesini kaydeder. Süre, döngünün periyodunu
+    aşarsa taşma (overrun) sayılır: cihaz filosu bu periyoda sığmıyor demektir.
+    """
+    overrun = interval is not None and duration > interval
+    if overrun:
+        logger.warning(f"!!! DÖNGÜ TAŞMASI: Döngü {duration:.2f} sn sürdü, periyot {interval} sn.")
+    try:
+        stats = cache.get(ACQUISITION_STATS_KEY) or {'cycles': 0, 'overruns': 0, 'max_duration': 0.0, 'max_lag': 0.0}
+        stats['cycles'] += 1
+        stats['overruns'] += int(overrun)
+        stats['last_cycle_at'] = timezone.now().isoformat()
+        stats['last_duration'] = round(duration, 3)
+        stats['last_lag'] = round(lag, 3)
+        stats['max_duration'] = max(stats['max_duration'], round(duration, 3))
+        stats['max_lag'] = max(stats['max_lag'], round(lag, 3))
+        stats['missed_cycles'] = missed_cycles
+        cache.set(ACQUISITION_STATS_KEY, stats, None)
+    except Exception as e:
+        logger.warning(f"!!! CACHE HATASI: Döngü istatistikleri yazılamadı: {e}")
+
+
+def get_cycle_stats():
+    """Son döngü istatistiklerini ve atlanan döngü sayısını döndürür."""
+    try:
+        stats = dict(cache.get(ACQUISITION_STATS_KEY) or {})
+        stats['skipped_cycles'] = cache.get(ACQUISITION_SKIPPED_KEY) or 0
+    except Exception as e:
+        logger.warning(f"!!! CACHE HATASI: Döngü istatistikleri okunamadı: {e}")
+        stats = {}
+    return stats
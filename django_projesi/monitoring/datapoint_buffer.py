@@ -0,0 +1,330 @@
+"""
+Okuma döngüsü ile veritabanı arasındaki yazma tamponu (write-behind).
+
+Tampon açıkken (DATAPOINT_BUFFER_REDIS_URL) okuma döngüsü kaydedilecek
+örnekleri döngü başına tek mesaj olarak bir Redis Stream'e ekler (XADD) ve
+veritabanını beklemeden devam eder; vacuum, ağır bir rapor sorgusu veya
+checkpoint okuma döngüsünü uzatmaz. Örnekleri veritabanına
+`manage.py run_datapoint_writer` süreci yazar: stream'i bir consumer group
+üzerinden büyük partiler halinde okur (XREADGROUP), partiyi tek transaction'da
+yazar ve ancak ondan sonra onaylayıp siler (XACK + XDEL). Yazıcı sayısı
+artırılarak yazma kapasitesi okuma döngüsünden bağımsız ölçeklenir.
+
+Son değer tablosu (RegisterLatestValue) da aynı yoldan yazılır: döngünün son
+değer satırları mesajın `latest` alanında gider, yazıcı partiyle aynı
+transaction'da tabloya yazar.
+
+Geri basınç: stream'de bekleyen mesaj sayısı DATAPOINT_BUFFER_MAX_BACKLOG'a
+ulaşırsa (yazıcı yetişemiyor veya çalışmıyor) ya da Redis erişilemezse okuma
+döngüsü örnekleri eskisi gibi doğrudan veritabanına yazar. Döngü yavaşlar ama
+Redis belleği sınırsız büyümez.
+
+Kalıcılık: XADD başarılı olduğunda döngü örnekleri kaydedilmiş sayar (ölü bant
+filtresi de yazılmış kabul eder); veritabanına yazılana kadar tek kopya
+Redis'tedir. Bu yüzden Redis AOF açık (`--appendonly yes --appendfsync
+everysec`) ve /data kalıcı bir volume üzerinde çalışmalıdır (bkz.
+docker-compose.yml). Bu ayarla Redis süreci veya konteyneri yeniden başlatıldığında
+bekleyen mesajlar AOF'tan geri yüklenir; ancak sunucu/işletim sistemi çökmesi veya
+ani güç kesintisinde diske henüz yazılmamış en fazla yaklaşık son 1 saniyelik
+XADD'ler (okuma aralığına göre bir iki döngü) kaybolabilir. AOF kapalıyken
+yeniden başlatma, DATAPOINT_BUFFER_MAX_BACKLOG döngüye kadar veriyi siler.
+
+Teslim en az bir kezdir: onaylanmamış mesajlar yazıcı yeniden başladığında
+veya DATAPOINT_BUFFER_CLAIM_IDLE saniyedir işlenmiyorsa başka bir yazıcı
+tarafından (XAUTOCLAIM) yeniden işlenir. Yazılan mesajların kimlikleri aynı
+transaction'da DataPointBatchReceipt tablosuna kaydedilir; tekrar teslim
+edilen mesaj ikinci kez yazılmaz.
+
+Yazılamayan mesajlar: bir parti DATAPOINT_BUFFER_MAX_DELIVERIES kez teslim
+edilip yine yazılamazsa (XPENDING teslim sayısı) mesajlar tek tek denenir;
+sağlam mesajlar yazılır, tek başına da yazılamayan mesaj loglanır, hata
+bilgisiyle birlikte DEAD_LETTER_KEY stream'ine taşınır ve onaylanır. Bağlantı
+kopması, kilit zaman aşımı gibi geçici veritabanı hataları (OperationalError)
+mesajın kendisine yüklenmez; o mesaj tampon içinde beklemeye devam eder.
+"""
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import DataPointBatchReceipt, Register, TestRun
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'monitoring:datapoints'
+CONSUMER_GROUP = 'datapoint-writers'
+# Tekrar tekrar yazılamayan mesajların taşındığı stream ve en fazla uzunluğu
+DEAD_LETTER_KEY = 'monitoring:datapoints:dead'
+DEAD_LETTER_MAXLEN = 10000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_rows(rows):
+    return json.dumps([[register_id, (timestamp - EPOCH) // ONE_MICROSECOND, value] for register_id, timestamp, value in rows])
+
+
+def _decode_rows(raw):
+    return [
+        (register_id, EPOCH + timedelta(microseconds=timestamp_us), value)
+        for register_id, timestamp_us, value in json.loads(raw)
+    ]
+
+
+def encode_message(rows, test_run_id, latest=()):
+    """
+    (register_id, zaman damgası, değer) satırlarını stream mesajına çevirir (zaman:
+    epoch mikrosaniye). `latest`, son değer tablosuna yazılacak satırlardır.
+    """
+    fields = {'test_run': test_run_id, 'rows': _encode_rows(rows)}
+    if latest:
+        fields['latest'] = _encode_rows(latest)
+    return fields
+
+
+def decode_message(fields):
+    """(test_run_id, DataPoint satırları, son değer satırları) döndürür."""
+    latest = _decode_rows(fields['latest']) if fields.get('latest') else []
+    return int(fields['test_run']), _decode_rows(fields['rows']), latest
+
+
+class DataPointBuffer:
+    """Okuma döngüsü tarafı: örnekleri stream'e ekler."""
+
+    def __init__(self, redis_url=None):
+        self.redis_url = redis_url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            url = self.redis_url or getattr(settings, 'DATAPOINT_BUFFER_REDIS_URL', None)
+            if url:
+                import redis
+                self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2, decode_responses=True)
+        return self._client
+
+    def append(self, rows, test_run_id, latest=()):
+        """
+        Satırları (ve son değer satırlarını) stream'e ekler. Tampon kapalıysa, doluysa
+        veya Redis erişilemezse False döner; bu durumda çağıran satırları doğrudan
+        veritabanına yazar.
+        """
+        client = self.client
+        if client is None:
+            return False
+        max_backlog = getattr(settings, 'DATAPOINT_BUFFER_MAX_BACKLOG', 10000)
+        try:
+            backlog = client.xlen(STREAM_KEY)
+            if backlog >= max_backlog:
+                logger.warning(f"!!! YAZMA TAMPONU DOLU: {backlog} mesaj bekliyor, örnekler doğrudan veritabanına yazılıyor.")
+                return False
+            client.xadd(STREAM_KEY, encode_message(rows, test_run_id, latest))
+        except Exception as e:
+            logger.warning(f"!!! YAZMA TAMPONU HATASI: Redis'e yazılamadı, örnekler doğrudan veritabanına yazılıyor: {e}")
+            return False
+        return True
+
+    def backlog(self):
+        """Stream'de yazılmayı bekleyen mesaj sayısı; tampon kapalı veya erişilemezse None."""
+        client = self.client
+        if client is None:
+            return None
+        try:
+            return client.xlen(STREAM_KEY)
+        except Exception:
+            return None
+
+
+datapoint_buffer = DataPointBuffer()
+
+
+class DataPointWriter:
+    """Yazıcı süreç tarafı: stream'i consumer group üzerinden partiler halinde veritabanına yazar."""
+
+    # Veritabanı hatasından sonra bekleme süresi (saniye); her hatada iki katına çıkar
+    BASE_BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+    # Eski teslim kayıtları en fazla bu sıklıkla temizlenir (saniye)
+    RECEIPT_PURGE_INTERVAL = 600
+
+    def __init__(self, buffer=None, consumer=None, batch_size=None):
+        self.buffer = buffer or datapoint_buffer
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size or getattr(settings, 'DATAPOINT_BUFFER_BATCH_SIZE', 500)
+        self.block_ms = int(getattr(settings, 'DATAPOINT_BUFFER_BLOCK_SECONDS', 1) * 1000)
+        self.claim_idle_ms = int(getattr(settings, 'DATAPOINT_BUFFER_CLAIM_IDLE', 60) * 1000)
+        self.max_deliveries = getattr(settings, 'DATAPOINT_BUFFER_MAX_DELIVERIES', 5)
+        # Açılışta önce bu tüketiciye teslim edilip onaylanmamış mesajlar işlenir
+        self._recovering = True
+        # Son partinin daha önce teslim edilmiş (yeniden denenen) mesajlar olup olmadığı
+        self._redelivered = False
+        self._last_purge = 0.0
+
+    @property
+    def client(self):
+        client = self.buffer.client
+        if client is None:
+            raise RuntimeError("Yazma tamponu kapalı: DATAPOINT_BUFFER_REDIS_URL tanımlı değil.")
+        return client
+
+    def ensure_group(self):
+        import redis
+        try:
+            self.client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def fetch(self, block=True):
+        """Sıradaki partiyi döndürür: [(mesaj ID, alanlar), ...]"""
+        client = self.client
+        self._redelivered = True
+        if self._recovering:
+            response = client.xreadgroup(CONSUMER_GROUP, self.consumer, {STREAM_KEY: '0'}, count=self.batch_size)
+            messages = response[0][1] if response else []
+            if messages:
+                return messages
+            self._recovering = False
+
+        # Durmuş bir yazıcının uzun süredir onaylamadığı mesajlar devralınır
+        claimed = client.xautoclaim(STREAM_KEY, CONSUMER_GROUP, self.consumer, self.claim_idle_ms, start_id='0-0', count=self.batch_size)
+        messages = [message for message in claimed[1] if message[1]]
+        if messages:
+            logger.warning(f"!!! YAZMA TAMPONU: {len(messages)} mesaj başka bir yazıcıdan devralındı.")
+            return messages
+
+        self._redelivered = False
+        response = client.xreadgroup(
+            CONSUMER_GROUP, self.consumer, {STREAM_KEY: '>'}, count=self.batch_size, block=self.block_ms if block else None,
+        )
+        return response[0][1] if response else []
+
+    def delivery_counts(self, messages):
+        """{mesaj ID: teslim sayısı} (XPENDING); mesajlar bu tüketicide bekliyor olmalı."""
+        # Mesajlar ID sırasıyla gelir (XREADGROUP / XAUTOCLAIM)
+        pending = self.client.xpending_range(
+            STREAM_KEY, CONSUMER_GROUP, min=messages[0][0], max=messages[-1][0], count=len(messages), consumername=self.consumer,
+        )
+        return {entry['message_id']: entry['times_delivered'] for entry in pending}
+
+    def write(self, messages):
+        """
+        Partiyi yazar. Parti daha önce DATAPOINT_BUFFER_MAX_DELIVERIES kez teslim
+        edilmişse mesajlar tek tek yazılır ve yazılamayan mesaj DEAD_LETTER_KEY'e
+        taşınır. Yazılan satır sayısını döndürür.
+        """
+        if not self._redelivered:
+            return self.process(messages)
+        deliveries = self.delivery_counts(messages)
+        if max(deliveries.values(), default=0) < self.max_deliveries:
+            return self.process(messages)
+
+        logger.warning(f"!!! YAZMA TAMPONU: parti {self.max_deliveries} kez yazılamadı, {len(messages)} mesaj tek tek deneniyor.")
+        written = 0
+        for message_id, fields in messages:
+            try:
+                written += self.process([(message_id, fields)])
+            except (OperationalError, InterfaceError):
+                # Geçici veritabanı hatası; mesaj bir sonraki turda yeniden denenir
+                raise
+            except Exception as e:
+                if deliveries.get(message_id, 0) < self.max_deliveries:
+                    raise
+                self.dead_letter(message_id, fields, e)
+        return written
+
+    def dead_letter(self, message_id, fields, error):
+        """Yazılamayan mesajı hata bilgisiyle DEAD_LETTER_KEY'e taşır ve onaylar."""
+        logger.error(f"!!! YAZMA TAMPONU HATASI: {message_id} mesajı yazılamadı, {DEAD_LETTER_KEY} stream'ine taşınıyor: {error}")
+        pipe = self.client.pipeline()
+        pipe.xadd(
+            DEAD_LETTER_KEY, {**fields, 'message_id': message_id, 'error': str(error)[:1000]},
+            maxlen=DEAD_LETTER_MAXLEN, approximate=True,
+        )
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, message_id)
+        pipe.xdel(STREAM_KEY, message_id)
+        pipe.execute()
+
+    def process(self, messages):
+        """Partiyi tek transaction'da yazar, ardından onaylar. Yazılan satır sayısını döndürür."""
+        from .ingestion import store_datapoints
+        from .latest_values import store_latest_values
+
+        message_ids = [message_id for message_id, _ in messages]
+        by_test_run = {}
+        latest_by_test_run = {}
+        written = 0
+        with transaction.atomic():
+            done = set(DataPointBatchReceipt.objects.filter(message_id__in=message_ids).values_list('message_id', flat=True))
+            for message_id, fields in messages:
+                if message_id in done:
+                    continue
+                try:
+                    test_run_id, rows, latest = decode_message(fields)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f"!!! YAZMA TAMPONU HATASI: {message_id} mesajı çözülemedi, atlanıyor: {e}")
+                    continue
+                by_test_run.setdefault(test_run_id, []).extend(rows)
+                latest_by_test_run.setdefault(test_run_id, []).extend(latest)
+
+            # Mesaj beklerken silinen test seansı veya register'ların satırları atlanır
+            test_run_ids = set(TestRun.objects.filter(id__in=by_test_run).values_list('id', flat=True))
+            register_ids = set(Register.objects.filter(
+                id__in={register_id for batch in (by_test_run, latest_by_test_run) for rows in batch.values() for register_id, _, _ in rows}
+            ).values_list('id', flat=True))
+            for test_run_id, rows in by_test_run.items():
+                rows = [row for row in rows if row[0] in register_ids] if test_run_id in test_run_ids else []
+                if rows:
+                    store_datapoints(rows, test_run_id)
+                    written += len(rows)
+            for test_run_id, rows in latest_by_test_run.items():
+                # Son değer seans silinse de geçerlidir; seans bağlantısı boş bırakılır
+                store_latest_values(
+                    [row for row in rows if row[0] in register_ids], test_run_id if test_run_id in test_run_ids else None,
+                )
+
+            DataPointBatchReceipt.objects.bulk_create(
+                [DataPointBatchReceipt(message_id=message_id) for message_id in message_ids if message_id not in done]
+            )
+
+        pipe = self.client.pipeline()
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *message_ids)
+        pipe.xdel(STREAM_KEY, *message_ids)
+        pipe.execute()
+        return written
+
+    def purge_receipts(self):
+        """Yeniden teslim edilemeyecek kadar eski teslim kayıtlarını siler."""
+        if time.monotonic() - self._last_purge < self.RECEIPT_PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        retention = getattr(settings, 'DATAPOINT_BUFFER_RECEIPT_RETENTION', 86400)
+        DataPointBatchReceipt.objects.filter(written_at__lt=timezone.now() - timedelta(seconds=retention)).delete()
+
+    def run(self, stop_event):
+        """`stop_event` kurulana kadar stream'i boşaltır."""
+        self.ensure_group()
+        backoff = self.BASE_BACKOFF
+        while not stop_event.is_set():
+            try:
+                messages = self.fetch()
+                if messages:
+                    started = time.monotonic()
+                    written = self.write(messages)
+                    logger.info(f"Yazma tamponu: {len(messages)} mesaj, {written} kayıt {time.monotonic() - started:.2f} sn'de yazıldı.")
+                self.purge_receipts()
+                backoff = self.BASE_BACKOFF
+            except Exception as e:
+                logger.exception(f"!!! YAZICI HATASI: {e} ({backoff:.0f} sn sonra yeniden denenecek)")
+                # Onaylanmamış mesajlar bir sonraki turda yeniden okunur
+                self._recovering = True
+                close_old_connections()
+                stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
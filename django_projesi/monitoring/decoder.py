@@ -0,0 +1,159 @@
+"""
+Blok çözücü: bir ReadBlock'un ham word (veya bit) listesini, içindeki tüm
+register'lar için tek seferde çözer.
+
+Okuma planı oluşturulurken her blok için önceden derlenmiş struct formatları
+hazırlanır. Aynı byte sırasına sahip register'lar, aralarındaki boşluklar 'x'
+(pad) ile atlanarak tek bir struct.Struct içinde birleştirilir; böylece yüzlerce
+word'lük bir blok, register başına nesne oluşturmadan birkaç unpack çağrısıyla çözülür.
+
+Byte sıraları eski BinaryPayloadDecoder davranışıyla birebir aynıdır:
+'BIG' -> ABCD ('>'), 'LITTLE' -> DCBA ('<', word'ler big-endian paketlendikten sonra).
+
+encode_register_value() aynı kurallarla ters yönde çalışır ve yazma kuyruğu
+(write_queue.py) tarafından holding register yazımlarında kullanılır.
+
+Eski çözücüden farklı olarak NaN/sonsuz FLOAT32 okumaları (cihazın "geçersiz
+veri" işareti) değer olarak döndürülmez: kaydedilmez, alarm ve eşleştirmeleri
+tetiklemez. Atlanan okumalar register başına `skipped_non_finite` içinde
+sayılır ve loglanır (ilk seferde ve her NON_FINITE_LOG_EVERY okumada bir).
+"""
+import logging
+import struct
+from collections import Counter
+from math import isfinite
+
+logger = logging.getLogger(__name__)
+
+# veri tipi -> (struct karakteri, word sayısı)
+NUMERIC_FORMATS = {
+    'UINT16': ('H', 1),
+    'INT16': ('h', 1),
+    'UINT32': ('I', 2),
+    'INT32': ('i', 2),
+    'FLOAT32': ('f', 2),
+}
+BYTE_ORDER_PREFIXES = {'BIG': '>', 'LITTLE': '<'}
+
+# register ID -> atlanan NaN/sonsuz okuma sayısı (süreç başladığından beri)
+skipped_non_finite = Counter()
+NON_FINITE_LOG_EVERY = 1000
+
+
+def _skip_non_finite(register, value):
+    skipped_non_finite[register.id] += 1
+    count = skipped_non_finite[register.id]
+    if count == 1 or count % NON_FINITE_LOG_EVERY == 0:
+        logger.warning(f"!!! GEÇERSİZ DEĞER: '{register.name}' register'ı {value} okundu ve atlandı (toplam {count} okuma).")
+
+
+def _build_pass(prefix, members):
+    """Çakışmayan register'lar için boşlukları pad ile atlayan tek bir Struct oluşturur."""
+    fmt = [prefix]
+    position = 0
+    for register, offset, code, words in members:
+        gap = (offset - position) * 2
+        if gap:
+            fmt.append(f'{gap}x')
+        fmt.append(code)
+        position = offset + words
+    return struct.Struct(''.join(fmt)), tuple(member[0] for member in members)
+
+
+class BlockDecoder:
+    """Bir bloğun tüm register'larını çözen, önceden derlenmiş tarif."""
+
+    def __init__(self, is_bits, items):
+        self.is_bits = is_bits
+        self.bits = ()
+        self.strings = ()
+        self.passes = ()
+        if is_bits:
+            self.bits = tuple((register, offset) for register, offset, count in items)
+            return
+
+        strings = []
+        by_prefix = {}
+        for register, offset, count in items:
+            if register.data_type == 'STRING':
+                strings.append((register, offset, count))
+            elif register.data_type in NUMERIC_FORMATS:
+                code, words = NUMERIC_FORMATS[register.data_type]
+                prefix = BYTE_ORDER_PREFIXES.get(register.byte_order, '>')
+                by_prefix.setdefault(prefix, []).append((register, offset, code, words))
+
+        passes = []
+        for prefix, members in by_prefix.items():
+            # Aynı adresi paylaşan (çakışan) register'lar ayrı geçişlere dağıtılır
+            lanes = []
+            for member in sorted(members, key=lambda m: m[1]):
+                for lane in lanes:
+                    last = lane[-1]
+                    if last[1] + last[3] <= member[1]:
+                        lane.append(member)
+                        break
+                else:
+                    lanes.append([member])
+            passes.extend(_build_pass(prefix, lane) for lane in lanes)
+
+        self.strings = tuple(strings)
+        self.passes = tuple(passes)
+
+    def decode(self, data):
+        """
+        Ham bloğu çözer ve (register, değer) çiftleri döndürür. Sayısal değerlere
+        tersleme ve çarpan uygulanmış olur; STRING değerleri metin olarak döner.
+        NaN/sonsuz FLOAT32 okumaları (geçersiz veri) atlanır, register başına sayılır ve loglanır.
+        """
+        results = []
+        if self.is_bits:
+            for register, offset in self.bits:
+                if offset >= len(data):
+                    continue
+                value = float(data[offset])
+                if register.invert_value:
+                    value = 1.0 - value
+                results.append((register, value * register.scaling_factor))
+            return results
+
+        payload = struct.pack(f'>{len(data)}H', *data)
+        for decoder, registers in self.passes:
+            if decoder.size > len(payload):
+                continue
+            for register, value in zip(registers, decoder.unpack_from(payload)):
+                value = value * register.scaling_factor
+                if isfinite(value):
+                    results.append((register, value))
+                else:
+                    _skip_non_finite(register, value)
+
+        for register, offset, count in self.strings:
+            raw = payload[offset * 2:(offset + count) * 2]
+            if len(raw) == count * 2:
+                results.append((register, raw.rstrip(b'\x00').decode('utf-8', 'ignore')))
+        return results
+
+
+def encode_register_value(register, value):
+    """
+    Mühendislik birimindeki bir değeri register'a yazılacak word listesine çevirir
+    (decode'un tersi): çarpan geri alınır, tamsayı tiplerde yuvarlanır ve byte
+    sırası uygulanır. Değer veri tipinin aralığına sığmazsa ValueError verir.
+    """
+    if register.data_type == 'STRING':
+        size = register.string_length * 2
+        raw = str(value).encode('utf-8')[:size].ljust(size, b'\x00')
+        return list(struct.unpack(f'>{register.string_length}H', raw))
+
+    if register.data_type not in NUMERIC_FORMATS:
+        raise ValueError(f"Desteklenmeyen veri tipi: {register.data_type}")
+    code, words = NUMERIC_FORMATS[register.data_type]
+    raw = float(value) / register.scaling_factor if register.scaling_factor else float(value)
+    if code != 'f':
+        raw = int(round(raw))
+    prefix = BYTE_ORDER_PREFIXES.get(register.byte_order, '>')
+    try:
+        payload = struct.pack(f'{prefix}{code}', raw)
+    except struct.error as e:
+        raise ValueError(f"{value} değeri {register.data_type} tipine sığmıyor: {e}") from e
+    return list(struct.unpack(f'>{words}H', payload))
@@ -0,0 +1,103 @@
+"""
+Okuma döngüsünün ertelenebilir veritabanı yazımları (cihaz durumu, alarm kayıtları).
+
+Yazma tamponu açıkken (bkz. datapoint_buffer.py) okuma döngüsü DataPoint ve son
+değer yazımlarını beklemez; cihaz son görülme/durum güncellemeleri ve AlarmLog
+yazımları da bu modüldeki arka plan iş parçacığına bırakılır. İşler geldikleri
+sırayla, tek iş parçacığında çalıştırılır; böylece bir alarmın açılışı
+kapanışından önce yazılır.
+
+Kuyrukta DEFERRED_WRITE_MAX_BACKLOG iş birikirse (veritabanı yavaş veya
+erişilemiyor) döngü kuyruğun boşalmasını bekler ve işi kendisi çalıştırır;
+sıra korunur ve bellek sınırsız büyümez. Başarısız bir iş artan aralıklarla
+DEFERRED_WRITE_RETRIES kez yeniden denenir, ardından loglanıp atlanır.
+
+Tampon kapalıyken işler döngü içinde hemen çalıştırılır (eski davranış).
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .datapoint_buffer import datapoint_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredWriter:
+    """Ertelenmiş yazım işlerini sırayla çalıştıran tek arka plan iş parçacığı."""
+
+    # Başarısız işten sonra bekleme süresi (saniye); her denemede iki katına çıkar
+    BASE_BACKOFF = 0.5
+    MAX_BACKOFF = 10.0
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return datapoint_buffer.client is not None
+
+    def submit(self, job):
+        """
+        İşi (argümansız bir çağrılabilir) kuyruğa ekler. Erteleme kapalıysa iş hemen
+        çalıştırılır; kuyruk doluysa önce kuyruğun boşalması beklenir.
+        """
+        if not self.enabled:
+            job()
+            return
+        jobs = self._start()
+        try:
+            jobs.put_nowait(job)
+        except queue.Full:
+            logger.warning(f"!!! ERTELENMİŞ YAZMA KUYRUĞU DOLU: {jobs.qsize()} iş bekliyor, döngü kuyruğun boşalmasını bekliyor.")
+            jobs.join()
+            job()
+
+    def drain(self):
+        """Kuyruktaki tüm işler bitene kadar bekler (servis kapanırken)."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._queue is None:
+                    self._queue = queue.Queue(maxsize=getattr(settings, 'DEFERRED_WRITE_MAX_BACKLOG', 1000))
+                self._thread = threading.Thread(target=self._run, name='deferred-writes', daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _run(self):
+        jobs = self._queue
+        while True:
+            job = jobs.get()
+            try:
+                self._execute(job)
+            finally:
+                jobs.task_done()
+
+    def _execute(self, job):
+        retries = getattr(settings, 'DEFERRED_WRITE_RETRIES', 5)
+        backoff = self.BASE_BACKOFF
+        for attempt in range(retries + 1):
+            try:
+                job()
+                return
+            except Exception as e:
+                # Kopmuş veritabanı bağlantısı varsa bir sonraki denemede yeniden açılsın
+                close_old_connections()
+                if attempt == retries:
+                    logger.exception(f"!!! ERTELENMİŞ YAZMA HATASI: {retries + 1} denemede yazılamadı, iş atlanıyor: {e}")
+                    return
+                logger.error(f"!!! ERTELENMİŞ YAZMA HATASI: {e}. {backoff:.1f} sn sonra yeniden denenecek.")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+
+deferred_writer = DeferredWriter()
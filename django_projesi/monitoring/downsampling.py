@@ -0,0 +1,197 @@
+"""
+Register grafikleri için sunucu tarafında seyreltme (downsampling).
+
+Grafik, istenen zaman penceresi için ekran genişliği kadar (`points`) nokta
+ister; yanıt boyutu pencerede kaç örnek olduğundan bağımsızdır:
+
+- Penceredeki ham örnek sayısı CHART_RANGE_SOURCE_LIMIT'i aşmıyorsa ham
+  örnekler (arşiv dahil) okunur ve LTTB (Largest-Triangle-Three-Buckets) ile
+  `points` noktaya indirilir. LTTB tepe ve çukurları koruyarak görsel şekli
+  bozmadan seçim yapar.
+- Aşıyorsa pencereye uygun özet tablosu (bkz. rollups.py) okunur ve dilimler
+  `points` eşit zaman kovasına toplanır: kova başına ortalama çizgi, min/maks
+  bant olarak döner; kısa süreli sıçramalar kaybolmaz. Ölü bantlı register'larda
+  bu ortalama zamana göre ağırlıklı değildir; yanıt `sample_weighted` ile işaretlenir.
+
+Pencere küçüldükçe (yakınlaştırma) ham veriye geri dönülür.
+
+Örnek sayısı özetlerden tahmin edildiği için özetler eksikse (ör. eski veri
+için `rebuild_rollups` çalıştırılmamışsa) tahmin düşük çıkar. Ham okuma bu
+yüzden CHART_RANGE_SOURCE_LIMIT + 1 satırda kesilir; sınır aşılırsa kalan
+örnekler bellekte tutulmadan özet dilimlerine toplanır.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from itertools import chain, islice
+
+from django.conf import settings
+from django.utils import timezone
+
+from .rollups import RESOLUTION_LABELS, bucket_start, choose_resolution, rollup_queryset, rollup_summary
+from .series import step_hold_series, stored_points, value_at
+
+logger = logging.getLogger(__name__)
+
+
+def to_ms(timestamp):
+    return int(timestamp.timestamp() * 1000)
+
+
+def from_ms(milliseconds):
+    return datetime.fromtimestamp(milliseconds / 1000, tz=dt_timezone.utc)
+
+
+def lttb(points, threshold):
+    """
+    [(x, y), ...] listesini (x'e göre sıralı) en fazla `threshold` noktaya indirir.
+    İlk ve son nokta her zaman korunur.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    # İlk ve son nokta dışındakiler threshold - 2 kovaya bölünür
+    every = (count - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        # Bir sonraki kovanın ortalaması üçgenin üçüncü köşesidir
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        next_points = points[next_start:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        selected_x, selected_y = points[selected]
+        max_area = -1
+        for index in range(int(bucket * every) + 1, int((bucket + 1) * every) + 1):
+            x, y = points[index]
+            area = abs((selected_x - avg_x) * (y - selected_y) - (selected_x - x) * (avg_y - selected_y))
+            if area > max_area:
+                max_area = area
+                candidate = index
+        sampled.append(points[candidate])
+        selected = candidate
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax_buckets(rows, buckets, start_ms, end_ms):
+    """
+    Özet satırlarını [(x, sayı, toplam, min, maks), ...] pencereyi eşit bölen
+    `buckets` kovaya toplar. (ortalama serisi, min serisi, maks serisi) döndürür;
+    her kovanın x'i içindeki ilk satırın zamanıdır.
+    """
+    width = max(end_ms - start_ms, 1) / buckets
+    merged = {}
+    for x, count, total, minimum, maximum in rows:
+        index = min(max(int((x - start_ms) / width), 0), buckets - 1)
+        entry = merged.get(index)
+        if entry is None:
+            merged[index] = [x, count, total, minimum, maximum]
+            continue
+        entry[0] = min(entry[0], x)
+        entry[1] += count
+        entry[2] += total
+        entry[3] = min(entry[3], minimum)
+        entry[4] = max(entry[4], maximum)
+
+    average, lows, highs = [], [], []
+    for index in sorted(merged):
+        x, count, total, minimum, maximum = merged[index]
+        average.append([x, total / count])
+        lows.append([x, minimum])
+        highs.append([x, maximum])
+    return average, lows, highs
+
+
+def bucket_points(points, resolution):
+    """
+    Ham (zaman damgası, değer) noktalarını özet tablolarıyla aynı dilimlere toplar;
+    minmax_buckets'in beklediği [(x, sayı, toplam, min, maks), ...] döndürür.
+    """
+    buckets = {}
+    for timestamp, value in points:
+        key = bucket_start(timestamp, resolution)
+        entry = buckets.get(key)
+        if entry is None:
+            buckets[key] = [1, value, value, value]
+            continue
+        entry[0] += 1
+        entry[1] += value
+        entry[2] = min(entry[2], value)
+        entry[3] = max(entry[3], value)
+    return [(to_ms(bucket), count, total, minimum, maximum) for bucket, (count, total, minimum, maximum) in sorted(buckets.items())]
+
+
+def bucketed_result(result, rows, points, window_start, window_end):
+    """Dilim satırlarını `points` kovaya toplar; ortalama çizgi ve min/maks bandıyla sonucu tamamlar."""
+    start_ms = to_ms(window_start) if window_start else (rows[0][0] if rows else 0)
+    end_ms = to_ms(window_end) if window_end else (rows[-1][0] if rows else 0)
+    average, lows, highs = minmax_buckets(rows, points, start_ms, end_ms)
+    result.update(series=average, band={'min': lows, 'max': highs}, source_points=len(rows))
+    return result
+
+
+def register_range_series(register, start=None, end=None, points=None):
+    """
+    Register'ın [start, end] penceresi için en fazla `points` noktalık grafik verisi.
+    Pencere verilmezse register'ın tüm verisi kullanılır.
+    """
+    max_points = getattr(settings, 'CHART_RANGE_MAX_POINTS', 2000)
+    points = min(max(points or max_points, 3), max_points)
+    source_limit = getattr(settings, 'CHART_RANGE_SOURCE_LIMIT', 50000)
+
+    # Günlük özetlerden ucuz tahmin: penceredeki ham örnek sayısı ve veri aralığı
+    raw_count, first, last = rollup_summary(register_id=register.id, start=start, end=end)
+    window_start = start or first
+    window_end = end or last
+    resolution = None
+    if raw_count > source_limit:
+        resolution = choose_resolution(window_start, window_end, raw_count=raw_count, max_points=source_limit)
+
+    result = {
+        'resolution': resolution,
+        'resolution_label': RESOLUTION_LABELS[resolution],
+        'step': register.deadband_mode != 'none' and not resolution,
+        'sample_weighted': register.deadband_mode != 'none' and bool(resolution),
+        'band': None,
+    }
+
+    if resolution:
+        rollups = rollup_queryset(resolution, register_id=register.id, start=start, end=end).order_by('bucket')
+        rows = [
+            (to_ms(bucket), count, total, minimum, maximum)
+            for bucket, count, total, minimum, maximum in rollups.values_list(
+                'bucket', 'sample_count', 'sum_value', 'min_value', 'max_value'
+            )
+        ]
+        return bucketed_result(result, rows, points, window_start, window_end)
+
+    stored = stored_points(register.id, start=start, end=end)
+    series = list(islice(stored, source_limit + 1))
+    if len(series) > source_limit:
+        # Özetler eksik veya eski; penceredeki örnekler ham okuma sınırını aşıyor
+        logger.warning(
+            f"!!! GRAFİK: '{register.name}' için özet tabloları eksik, örnekler okunurken dilimlere toplanıyor "
+            f"(`manage.py rebuild_rollups` çalıştırılmalı)."
+        )
+        window_start = start or series[0][0]
+        window_end = end or (value_at(register.id, timezone.now()) or series[-1])[0]
+        resolution = choose_resolution(window_start, window_end, max_points=source_limit)
+        result.update(
+            resolution=resolution, resolution_label=RESOLUTION_LABELS[resolution],
+            step=False, sample_weighted=register.deadband_mode != 'none',
+        )
+        rows = bucket_points(chain(series, stored), resolution)
+        return bucketed_result(result, rows, points, window_start, window_end)
+
+    if register.deadband_mode != 'none':
+        # Ölü bantlı register: pencere başındaki değer önceki kayıttan taşınır
+        carry_in = value_at(register.id, start) if start else None
+        series = step_hold_series(series, register, start=start, carry_in=carry_in, end=end)
+    series = [(to_ms(timestamp), value) for timestamp, value in series]
+    result.update(series=[list(point) for point in lttb(series, points)], source_points=len(series))
+    return result
+
@@ -0,0 +1,134 @@
+"""
+Test seansı verisinin akış (streaming) olarak dışa aktarımı: CSV ve Parquet.
+
+Satırlar sunucu taraflı cursor ile (QuerySet.iterator; PostgreSQL'de isimli
+cursor) EXPORT_CHUNK_SIZE satırlık parçalar halinde okunur ve yanıt gövdesine
+parça parça yazılır. Bellekte hiçbir zaman bir parçadan (Parquet'te bir row
+group'tan) fazlası tutulmaz; bellek kullanımı dışa aktarılan satır sayısından
+bağımsızdır. Cihaz ve register adları satır başına JOIN yerine bir kez okunur.
+Arşivlenmiş seanslarda parçalar sırayla açılır (bkz. archive.py).
+
+Parquet dosyası EXPORT_PARQUET_ROW_GROUP_SIZE satırlık row group'lar halinde
+yazılır; her row group yazıldıkça istemciye gönderilir. Parquet için pyarrow
+kurulu olmalıdır.
+"""
+import csv
+
+from django.conf import settings
+from django.utils import timezone
+
+from .archive import ArchivedDataPoints
+from .models import Register
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CSV_HEADER = ('Zaman Damgası', 'Cihaz', 'Register ID', 'Register', 'Değer')
+
+
+class _Echo:
+    """csv.writer'ın yazdığı satırı tamponlamadan geri döndürür."""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """ParquetWriter'ın yazdığı baytları toplar; her row group sonrasında boşaltılır."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def register_labels():
+    """{register_id: (cihaz adı, register adı)}"""
+    return {
+        register_id: (device_name, name)
+        for register_id, device_name, name in Register.objects.values_list('id', 'device__name', 'name')
+    }
+
+
+def export_rows(datapoints, chunk_size=None):
+    """Filtrelenmiş DataPoint sorgusunu (zaman, register_id, değer) olarak zaman sırasıyla akıtır."""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 5000)
+    if isinstance(datapoints, ArchivedDataPoints):
+        # Arşivlenmiş seans: parçalar tek tek açılır
+        return datapoints.order_by('timestamp').rows()
+    rows = datapoints.order_by('timestamp', 'id').values_list('timestamp', 'register_id', 'value')
+    return rows.iterator(chunk_size=chunk_size)
+
+
+def stream_csv(datapoints):
+    """CSV içeriğini EXPORT_CHUNK_SIZE satırlık parçalar halinde üretir."""
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 5000)
+    labels = register_labels()
+    writer = csv.writer(_Echo())
+    # Excel'in Türkçe karakterleri doğru açması için BOM eklenir
+    lines = ['\ufeff' + writer.writerow(CSV_HEADER)]
+    for timestamp, register_id, value in export_rows(datapoints, chunk_size):
+        device_name, name = labels.get(register_id, ('', ''))
+        lines.append(writer.writerow((timezone.localtime(timestamp).isoformat(), device_name, register_id, name, value)))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def stream_parquet(datapoints):
+    """Parquet dosyasını row group'lar halinde üretir."""
+    row_group_size = getattr(settings, 'EXPORT_PARQUET_ROW_GROUP_SIZE', 100000)
+    schema = pa.schema([
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('device', pa.string()),
+        ('register_id', pa.int64()),
+        ('register', pa.string()),
+        ('value', pa.float64()),
+    ])
+    labels = register_labels()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+
+    def empty_columns():
+        return {name: [] for name in schema.names}
+
+    columns = empty_columns()
+    for timestamp, register_id, value in export_rows(datapoints):
+        device_name, name = labels.get(register_id, ('', ''))
+        columns['timestamp'].append(timestamp)
+        columns['device'].append(device_name)
+        columns['register_id'].append(register_id)
+        columns['register'].append(name)
+        columns['value'].append(value)
+        if len(columns['value']) >= row_group_size:
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            columns = empty_columns()
+            yield sink.drain()
+
+    if columns['value']:
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+    writer.close()
+    yield sink.drain()
@@ -16,7 +16,7 @@ class RegisterForm(forms.ModelForm):
     class Meta:
         model = Register
         # Hangi alanların formda görüneceğini belirtiyoruz
-        fields = ['device', 'name', 'address', 'register_type', 'is_writable', 'data_type', 'byte_order', 'min_value', 'max_value', 'icon_name', 'show_on_statusbar', 'icon_name']
+        fields = ['device', 'name', 'address', 'register_type', 'is_writable', 'data_type', 'byte_order', 'scan_interval', 'deadband_mode', 'deadband_value', 'heartbeat_interval', 'min_value', 'max_value', 'icon_name', 'show_on_statusbar', 'icon_name']
         # Bootstrap sınıflarını ekleyerek formu güzelleştiriyoruz
         widgets = {
             'device': forms.Select(attrs={'class': 'form-select'}),
@@ -26,6 +26,10 @@ class RegisterForm(forms.ModelForm):
             'is_writable': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'data_type': forms.Select(attrs={'class': 'form-select'}),
             'byte_order': forms.Select(attrs={'class': 'form-select'}),
+            'scan_interval': forms.Select(attrs={'class': 'form-select'}),
+            'deadband_mode': forms.Select(attrs={'class': 'form-select'}),
+            'deadband_value': forms.NumberInput(attrs={'class': 'form-control', 'step': 'any'}),
+            'heartbeat_interval': forms.NumberInput(attrs={'class': 'form-control'}),
             # Yeni widget'ları ekliyoruz
             'icon_name': forms.TextInput(attrs={'class': 'form-control', 'readonly': 'readonly'}),
             'show_on_statusbar': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -0,0 +1,243 @@
+"""
+Döngü bazında toplu veri yazımı: bir okuma döngüsünde üretilen tüm örnekler
+bellekte toplanır ve döngü sonunda tek seferde veritabanına yazılır.
+
+Ölü bandı açık register'lar report-by-exception mantığıyla kaydedilir: değer,
+son kaydedilen değerden ölü bant kadar uzaklaşmadıkça ve kalp atışı süresi
+dolmadıkça yazılmaz. Aradaki sürede değer son kayıtta tutulmuş kabul edilir
+(bkz. series.py). Alarm, eşleştirme ve canlı yayın her okumayı görmeye devam eder.
+
+Kaydedilen örnekler aynı transaction içinde özet (rollup) tablolarına da
+eklenir (bkz. rollups.py). Yazma tamponu açıksa bu yazım ve son değer tablosu
+güncellemesi okuma döngüsünden ayrılır ve ayrı yazıcı süreçte yapılır (bkz.
+datapoint_buffer.py).
+
+Cihazların son görülme zamanı ve durum değişiklikleri de döngü boyunca
+toplanır ve döngü sonunda toplu UPDATE ile yazılır.
+"""
+import copy
+import csv
+import io
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .datapoint_buffer import datapoint_buffer
+from .latest_values import latest_value_store, upsert_latest_values
+from .models import DataPoint, Device
+from .rollups import update_rollups
+from .segments import record_registers
+
+
+@dataclass
+class Sample:
+    """Tek bir register okuması; zaman damgası cihazın okunduğu andır."""
+    register: object
+    value: object
+    timestamp: object
+    label: str = None
+
+    @property
+    def is_numeric(self):
+        return not isinstance(self.value, str)
+
+
+class DeadbandFilter:
+    """
+    Register başına son kaydedilen değeri ve zamanını bellekte tutar.
+    Süreç yeniden başladığında her register'ın ilk okuması kaydedilir.
+    """
+
+    def __init__(self):
+        # register_id -> (değer, zaman damgası, test_run_id)
+        self._last_stored = {}
+
+    def should_store(self, sample, test_run_id):
+        register = sample.register
+        if register.deadband_mode == 'none':
+            return True
+
+        last = self._last_stored.get(register.id)
+        if last is None or last[2] != test_run_id or self._outside_deadband(register, last[0], sample.value):
+            store = True
+        else:
+            # Değer bantta kalsa bile kalp atışı süresi dolduysa kaydet
+            store = (sample.timestamp - last[1]).total_seconds() >= register.heartbeat_interval
+
+        if store:
+            self._last_stored[register.id] = (sample.value, sample.timestamp, test_run_id)
+        return store
+
+    @staticmethod
+    def _outside_deadband(register, last_value, value):
+        delta = abs(value - last_value)
+        if register.deadband_mode == 'percent':
+            return delta > abs(last_value) * register.deadband_value / 100.0
+        return delta > register.deadband_value
+
+    def forget(self, samples):
+        """Yazılamayan örneklerin durumunu siler; bir sonraki okuma yeniden kaydedilir."""
+        for sample in samples:
+            self._last_stored.pop(sample.register.id, None)
+
+
+deadband_filter = DeadbandFilter()
+
+
+class DeviceStatusBatch:
+    """
+    Döngüdeki cihaz güncellemelerini toplar. Cihaz başına ayrı save() yerine
+    döngü sonunda görülen cihazların last_seen'i tek UPDATE ile, durumu değişen
+    cihazlar da tek bulk_update ile yazılır.
+
+    Değişiklikler önbellekteki Device nesnelerine ancak yazım başarılı olduktan
+    sonra uygulanır; yazım başarısız olursa nesneler veritabanıyla aynı kalır ve
+    bir sonraki döngü aynı değişikliği (ve WebSocket mesajını) yeniden üretir.
+    """
+    STATE_FIELDS = ['status', 'circuit_state', 'circuit_retry_at']
+
+    def __init__(self):
+        self.seen_ids = []
+        # device_id -> (Device, {alan: yeni değer})
+        self.changed = {}
+
+    def mark_seen(self, device):
+        self.seen_ids.append(device.id)
+
+    def _current(self, device, field):
+        staged = self.changed.get(device.id)
+        if staged is not None and field in staged[1]:
+            return staged[1][field]
+        return getattr(device, field)
+
+    def _stage(self, device, **fields):
+        self.changed.setdefault(device.id, (device, {}))[1].update(fields)
+
+    def set_status(self, device, status):
+        if self._current(device, 'status') != status:
+            self._stage(device, status=status)
+
+    def set_circuit_state(self, device, state, retry_at):
+        if self._current(device, 'circuit_state') != state or self._current(device, 'circuit_retry_at') != retry_at:
+            self._stage(device, circuit_state=state, circuit_retry_at=retry_at)
+
+    def flush(self):
+        """
+        Toplanan güncellemeleri yazar, başarılıysa önbellekteki cihazlara uygular ve
+        WebSocket'e gönderilecek durum değişikliklerini döndürür.
+        """
+        # Bu arada (ör. önceki bir yazımla) zaten uygulanmış değişiklikler atlanır
+        pending = []
+        for device, fields in self.changed.values():
+            fields = {field: value for field, value in fields.items() if getattr(device, field) != value}
+            if fields:
+                pending.append((device, fields))
+        if not (self.seen_ids or pending):
+            return []
+
+        now = timezone.now()
+        with transaction.atomic():
+            if self.seen_ids:
+                Device.objects.filter(id__in=self.seen_ids).update(last_seen=now)
+            if pending:
+                updates = []
+                for device, fields in pending:
+                    update = copy.copy(device)
+                    for field, value in fields.items():
+                        setattr(update, field, value)
+                    updates.append(update)
+                Device.objects.bulk_update(updates, self.STATE_FIELDS)
+
+        status_changes = []
+        for device, fields in pending:
+            if 'status' in fields:
+                status_changes.append({'device_id': device.id, 'status': fields['status']})
+            for field, value in fields.items():
+                setattr(device, field, value)
+        self.seen_ids, self.changed = [], {}
+        return status_changes
+
+
+class CycleBatch:
+    """Bir okuma döngüsünün örneklerini toplar; alarm ve eşleştirme kontrolleri de bu listeyi kullanır."""
+
+    def __init__(self, test_run):
+        self.test_run = test_run
+        self.samples = []
+        self.devices = DeviceStatusBatch()
+
+    def add(self, sample):
+        self.samples.append(sample)
+
+    @property
+    def numeric_samples(self):
+        return [sample for sample in self.samples if sample.is_numeric]
+
+    def write_datapoints(self):
+        """
+        Ölü bandı geçen sayısal örnekleri ve son değer tablosunun değişen satırlarını
+        yazar. Yazma tamponu açıksa ikisi de döngünün Redis Stream mesajıyla gider
+        ve veritabanına ayrı yazıcı süreç yazar; döngü yalnızca son değerlerin Redis
+        kopyasını günceller. Tampon kapalı, dolu veya erişilemezse tek seferde
+        veritabanına yazılır. Kaydedilen DataPoint satır sayısını döndürür.
+        """
+        if self.test_run is None:
+            return 0
+        # String değerleri kaydetmiyoruz, sadece sayısal olanları
+        numeric_samples = self.numeric_samples
+        samples = [s for s in numeric_samples if deadband_filter.should_store(s, self.test_run.id)]
+        latest = latest_value_store.pending(numeric_samples, self.test_run.id)
+        if not samples and not latest:
+            return 0
+
+        rows = [(s.register.id, s.timestamp, s.value) for s in samples]
+        latest_rows = [(obj.register_id, obj.timestamp, obj.value) for obj in latest]
+        if datapoint_buffer.append(rows, self.test_run.id, latest_rows):
+            latest_value_store.publish(latest)
+            return len(rows)
+        if rows:
+            try:
+                store_datapoints(rows, self.test_run.id)
+            except Exception:
+                deadband_filter.forget(samples)
+                raise
+        if latest:
+            upsert_latest_values(latest)
+            latest_value_store.publish(latest)
+        return len(rows)
+
+
+def store_datapoints(rows, test_run_id):
+    """
+    (register_id, zaman damgası, değer) satırlarını tek transaction'da DataPoint
+    tablosuna, özet tablolarına ve seansın register listesine yazar. Büyük
+    partilerde PostgreSQL COPY, diğer durumlarda bulk_create kullanılır.
+    """
+    copy_threshold = getattr(settings, 'DATAPOINT_COPY_THRESHOLD', 5000)
+    with transaction.atomic():
+        if connection.vendor == 'postgresql' and len(rows) >= copy_threshold:
+            _copy_datapoints(rows, test_run_id)
+        else:
+            DataPoint.objects.bulk_create(
+                [DataPoint(register_id=register_id, value=value, timestamp=timestamp, test_run_id=test_run_id) for register_id, timestamp, value in rows],
+                batch_size=1000,
+            )
+        update_rollups(rows, test_run_id)
+        record_registers(test_run_id, {register_id for register_id, _, _ in rows})
+
+
+def _copy_datapoints(rows, test_run_id):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for register_id, timestamp, value in rows:
+        writer.writerow((register_id, value, timestamp.isoformat(), test_run_id))
+    buffer.seek(0)
+
+    table = DataPoint._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} (register_id, value, timestamp, test_run_id) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
@@ -0,0 +1,159 @@
+"""
+Register başına son değer deposu (RegisterLatestValue).
+
+Okuma döngüsü, her döngüde okunan sayısal değerleri register başına tek satıra
+yazar (INSERT ... ON CONFLICT DO UPDATE). Paneller, durum çubuğu ve kontrol
+ekranı son değeri DataPoint tablosunda register başına en son satırı aramak
+yerine buradan okur; sorgu maliyeti veri miktarından bağımsızdır.
+
+Değeri değişmeyen register'lar her döngüde yeniden yazılmaz; yalnızca zaman
+damgası LATEST_VALUE_REFRESH_INTERVAL saniyeden eskiyse tazelenir. Ölü bant
+(bkz. ingestion.py) burada uygulanmaz: tabloda her zaman son okunan değer
+bulunur.
+
+LATEST_VALUES_REDIS_URL verilmişse aynı değerler bir Redis hash'ine de yazılır
+ve okumalar önce oradan yapılır; Redis'te bulunamayan veya Redis erişilemezse
+değerler tablodan okunur.
+
+Yazma tamponu açıkken (bkz. datapoint_buffer.py) okuma döngüsü tabloya yazmaz:
+yazılacak satırlar döngünün stream mesajıyla gider ve tabloyu yazıcı süreç
+günceller (store_latest_values); döngü yalnızca Redis'i ve belleği günceller.
+"""
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import RegisterLatestValue
+
+logger = logging.getLogger(__name__)
+
+LATEST_VALUES_KEY = 'monitoring:latest_values'
+
+
+class LatestValueStore:
+    """Son değer tablosunu okuma döngüsünden günceller ve panellere okur."""
+
+    def __init__(self, redis_url=None):
+        self.redis_url = redis_url
+        self._client = None
+        # register_id -> (son yazılan değer, son yazım zamanı)
+        self._written = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            url = self.redis_url or getattr(settings, 'LATEST_VALUES_REDIS_URL', None)
+            if url:
+                import redis
+                self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        return self._client
+
+    def _needs_write(self, register_id, value, timestamp, refresh_interval):
+        last = self._written.get(register_id)
+        if last is None or last[0] != value:
+            return True
+        return (timestamp - last[1]).total_seconds() >= refresh_interval
+
+    def pending(self, samples, test_run_id=None):
+        """Döngüdeki sayısal örneklerden değeri değişen (veya tazelenmesi gereken) register'ların satırları."""
+        refresh_interval = getattr(settings, 'LATEST_VALUE_REFRESH_INTERVAL', 60)
+        rows = {}
+        with self._lock:
+            for sample in samples:
+                register_id = sample.register.id
+                if self._needs_write(register_id, sample.value, sample.timestamp, refresh_interval):
+                    rows[register_id] = RegisterLatestValue(
+                        register_id=register_id, value=sample.value, timestamp=sample.timestamp, test_run_id=test_run_id,
+                    )
+        # Aynı sırayla kilitlensin diye (eşzamanlı yazıcılarda kilitlenmeyi önler) sıralanır
+        return [rows[register_id] for register_id in sorted(rows)]
+
+    def publish(self, objects):
+        """Tabloya yazılmış (veya yazıcıya gönderilmiş) satırları bellekte işaretler ve Redis'e yansıtır."""
+        with self._lock:
+            for obj in objects:
+                self._written[obj.register_id] = (obj.value, obj.timestamp)
+        self._mirror(objects)
+
+    def _mirror(self, objects):
+        client = self.client
+        if client is None:
+            return
+        try:
+            client.hset(LATEST_VALUES_KEY, mapping={
+                obj.register_id: json.dumps({'v': obj.value, 't': obj.timestamp.isoformat()}) for obj in objects
+            })
+        except Exception as e:
+            # Tablo esas kaynaktır; Redis bir sonraki yazımda tekrar denenir
+            with self._lock:
+                for obj in objects:
+                    self._written.pop(obj.register_id, None)
+            logger.warning(f"!!! SON DEĞER DEPOSU HATASI: Redis'e yazılamadı: {e}")
+
+    def get_entries(self, register_ids):
+        """{register_id: (değer, zaman damgası)} döndürür; değeri hiç okunmamış register'lar yer almaz."""
+        register_ids = list(dict.fromkeys(register_ids))
+        entries = {}
+        if not register_ids:
+            return entries
+
+        client = self.client
+        if client is not None:
+            try:
+                for register_id, raw in zip(register_ids, client.hmget(LATEST_VALUES_KEY, register_ids)):
+                    if raw is not None:
+                        data = json.loads(raw)
+                        entries[register_id] = (data['v'], parse_datetime(data['t']))
+            except Exception as e:
+                logger.warning(f"!!! SON DEĞER DEPOSU HATASI: Redis'ten okunamadı, tablodan okunuyor: {e}")
+                entries = {}
+
+        missing = [register_id for register_id in register_ids if register_id not in entries]
+        if missing:
+            for register_id, value, timestamp in RegisterLatestValue.objects.filter(register_id__in=missing).values_list('register_id', 'value', 'timestamp'):
+                entries[register_id] = (value, timestamp)
+        return entries
+
+    def get_values(self, register_ids):
+        """{register_id: son değer} döndürür."""
+        return {register_id: value for register_id, (value, _) in self.get_entries(register_ids).items()}
+
+
+latest_value_store = LatestValueStore()
+
+
+def upsert_latest_values(objects):
+    """RegisterLatestValue satırlarını tek INSERT ... ON CONFLICT DO UPDATE ile yazar."""
+    RegisterLatestValue.objects.bulk_create(
+        objects,
+        update_conflicts=True,
+        unique_fields=['register'],
+        update_fields=['value', 'timestamp', 'test_run'],
+    )
+
+
+def store_latest_values(rows, test_run_id=None):
+    """
+    Yazıcı süreç tarafı: stream mesajlarından gelen (register_id, zaman damgası, değer)
+    satırlarını tabloya yazar. Register başına en yeni satır alınır; tekrar teslim
+    edilen eski bir mesaj tablodaki daha yeni değerin üzerine yazılmaz.
+    """
+    newest = {}
+    for register_id, timestamp, value in rows:
+        if register_id not in newest or timestamp >= newest[register_id][0]:
+            newest[register_id] = (timestamp, value)
+    if not newest:
+        return 0
+    stored = dict(RegisterLatestValue.objects.filter(register_id__in=newest).values_list('register_id', 'timestamp'))
+    objects = [
+        RegisterLatestValue(register_id=register_id, value=value, timestamp=timestamp, test_run_id=test_run_id)
+        for register_id, (timestamp, value) in sorted(newest.items())
+        if register_id not in stored or stored[register_id] <= timestamp
+    ]
+    if objects:
+        upsert_latest_values(objects)
+    return len(objects)
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.archive import archivable_test_runs, archive_test_run, restore_test_run
+from monitoring.models import TestRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Tamamlanmış veya iptal edilmiş test seanslarının DataPoint satırlarını sıkıştırılmış "
+        "arşiv parçalarına taşır ve ham satırları siler. Raporlar arşivden okumaya devam eder. "
+        "--restore ile arşivlenmiş seans yeniden ham satırlara açılır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-run', type=int, action='append', dest='test_runs', help="Sadece bu test seansı (birden fazla verilebilir)")
+        parser.add_argument(
+            '--older-than', type=int, default=None, metavar='GÜN',
+            help="Bitişinin üzerinden bu kadar gün geçmiş tüm seansları arşivle (varsayılan: ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument('--chunk-size', type=int, default=None, help="Bir parçadaki en fazla örnek sayısı (varsayılan: ARCHIVE_CHUNK_SIZE)")
+        parser.add_argument('--restore', action='store_true', help="Arşivlenmiş seansları yeniden ham satırlara aç")
+
+    def handle(self, *args, **options):
+        if options['test_runs']:
+            test_runs = TestRun.objects.filter(id__in=options['test_runs'])
+        else:
+            if options['restore']:
+                raise CommandError("Geri yükleme için --test-run verilmelidir.")
+            older_than = options['older_than']
+            if older_than is None:
+                older_than = getattr(settings, 'ARCHIVE_AFTER_DAYS', None)
+            if older_than is None:
+                raise CommandError("--test-run veya --older-than verilmelidir (ARCHIVE_AFTER_DAYS tanımlı değil).")
+            test_runs = archivable_test_runs(older_than)
+
+        for test_run in test_runs:
+            started = time.monotonic()
+            if options['restore']:
+                restored = restore_test_run(test_run)
+                self.stdout.write(self.style.SUCCESS(f"Geri yüklendi: {test_run} ({restored} satır)"))
+                continue
+            try:
+                result = archive_test_run(test_run, chunk_size=options['chunk_size'])
+            except ValueError as e:
+                self.stdout.write(self.style.ERROR(f"Atlandı: {e}"))
+                continue
+            if not result.rows:
+                self.stdout.write(f"Atlandı: {test_run} zaten arşivlenmiş veya verisi yok.")
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Arşivlendi: {test_run} — {result.rows} satır, {result.chunks} parça, {result.archived_bytes} bayt "
+                f"(örnek başına {result.archived_bytes / result.rows:.1f} bayt, {time.monotonic() - started:.1f} sn)"
+            ))
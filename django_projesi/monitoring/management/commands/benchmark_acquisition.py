@@ -0,0 +1,201 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from monitoring.async_poller import shutdown_poller
+from monitoring.simulator import CountingChannelLayer, FaultProfile, SimulatedFleet, generate_register_map
+
+logger = logging.getLogger(__name__)
+
+# Karşılaştırmada "daha yüksek daha iyi" olan metrikler; diğerleri (süreler) için düşük olan iyidir
+HIGHER_IS_BETTER = ('samples_per_sec', 'inserts_per_sec', 'ws_messages_per_sec', 'modbus_requests_per_sec')
+
+
+def percentile(sorted_values, p):
+    """Sıralı listede en yakın sıra (nearest-rank) yöntemiyle yüzdelik değer."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Yerel pymodbus sunucularıyla simüle edilmiş bir cihaz filosu başlatır ve veri toplama "
+        "döngüsünün performansını ölçer (örnek/sn, döngü süresi yüzdelikleri, DB kayıt/sn, "
+        "WebSocket mesaj/sn). Ağ gerektirmez; ölçüm ayrı bir test veritabanında yapılır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, default=10, help="Simüle cihaz sayısı")
+        parser.add_argument('--registers', type=int, default=50, help="Cihaz başına register sayısı")
+        parser.add_argument('--gap', type=int, default=0, help="Aynı tip register'lar arasındaki boş adres sayısı")
+        parser.add_argument('--register-map', help="Register haritası JSON dosyası (Register alanlarıyla aynı adlar)")
+        parser.add_argument('--base-port', type=int, default=15020, help="İlk simüle cihazın TCP portu")
+        parser.add_argument('--dead-devices', type=int, default=0, help="Sunucusu açılmayan (bağlantı reddeden) cihaz sayısı")
+        parser.add_argument('--latency', type=float, default=0.0, help="İstek başına gecikme (ms)")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Gecikme sapması (± ms)")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="İsteğin Modbus hata cevabı alma olasılığı (0-1)")
+        parser.add_argument('--timeout-rate', type=float, default=0.0, help="İsteğin zaman aşımına uğrama olasılığı (0-1)")
+        parser.add_argument('--change-rate', type=float, default=0.0, help="Okunan her değerin değişme olasılığı (0-1)")
+        parser.add_argument('--cycles', type=int, default=20, help="Ölçülen döngü sayısı")
+        parser.add_argument('--warmup', type=int, default=2, help="Ölçüme dahil edilmeyen ısınma döngüsü sayısı")
+        parser.add_argument('--seed', type=int, default=None, help="Tekrarlanabilir değerler için rastgele tohum")
+        parser.add_argument('--keepdb', action='store_true', help="Test veritabanını silmeden yeniden kullan")
+        parser.add_argument(
+            '--use-configured-backends', action='store_true',
+            help="Cache, kanal katmanı ve durum deposu için settings'teki Redis'i kullan (varsayılan: bellek içi)",
+        )
+        parser.add_argument('--output', help="Sonuçların yazılacağı JSON dosyası")
+        parser.add_argument('--baseline', help="Karşılaştırma için önceki bir --output JSON dosyası")
+
+    def handle(self, *args, **options):
+        if options['dead_devices'] > options['devices']:
+            raise CommandError("--dead-devices, --devices değerinden büyük olamaz.")
+
+        if options['register_map']:
+            with open(options['register_map'], encoding='utf-8') as f:
+                register_map = json.load(f)
+        else:
+            register_map = generate_register_map(options['registers'], gap=options['gap'])
+
+        profile = FaultProfile(
+            latency=options['latency'] / 1000.0,
+            jitter=options['jitter'] / 1000.0,
+            error_rate=options['error_rate'],
+            timeout_rate=options['timeout_rate'],
+            timeout_delay=getattr(settings, 'MODBUS_TIMEOUT', 2) + 1,
+            change_rate=options['change_rate'],
+        )
+        fleet = SimulatedFleet(
+            options['devices'], base_port=options['base_port'], profile=profile,
+            dead_devices=options['dead_devices'], seed=options['seed'],
+        )
+
+        overrides = {}
+        if not options['use_configured_backends']:
+            overrides = {
+                'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                'CHANNEL_LAYERS': {'default': {'BACKEND': 'monitoring.simulator.CountingChannelLayer'}},
+                'RUNTIME_STATE_REDIS_URL': None,
+            }
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        fleet.start()
+        try:
+            with override_settings(**overrides):
+                results = self.run_benchmark(fleet, register_map, options)
+        finally:
+            fleet.stop()
+            shutdown_poller()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        self.report(results, options)
+
+    def run_benchmark(self, fleet, register_map, options):
+        # Test veritabanı oluşturulduktan sonra import edilmeli (önbellekler boş başlasın)
+        from monitoring.config_cache import invalidate_config
+        from monitoring.models import DataPoint, Device, Register, TestRun
+        from monitoring.tasks import load_acquisition_targets, run_single_flight_cycle
+
+        Device.objects.all().delete()
+        TestRun.objects.filter(status__in=['RUNNING', 'PAUSED']).update(status='COMPLETED')
+        TestRun.objects.create(test_name='Benchmark', status='RUNNING')
+        devices = Device.objects.bulk_create([
+            Device(name=f'SIM-{port}', connection_host=fleet.host, port=port) for port, alive in fleet.ports
+        ])
+        Register.objects.bulk_create(
+            [Register(device=device, **definition) for device in devices for definition in register_map],
+            batch_size=1000,
+        )
+        invalidate_config()
+
+        # Tek seferlik read_modbus_data gibi: scan sınıfı ayrımı yapılmadan tüm bloklar okunur
+        targets = [
+            (device, [block for blocks in groups.values() for block in blocks])
+            for device, groups in load_acquisition_targets()
+        ]
+        block_count = sum(len(blocks) for _, blocks in targets)
+
+        for _ in range(options['warmup']):
+            run_single_flight_cycle(targets)
+
+        CountingChannelLayer.counts = {}
+        rows_before = DataPoint.objects.count()
+        requests_before = fleet.request_count
+        durations = []
+        skipped = 0
+        started = time.monotonic()
+        for _ in range(options['cycles']):
+            executed, duration = run_single_flight_cycle(targets)
+            if executed and duration is not None:
+                durations.append(duration)
+            else:
+                skipped += 1
+        elapsed = time.monotonic() - started
+        rows = DataPoint.objects.count() - rows_before
+        requests = fleet.request_count - requests_before
+
+        counts = dict(CountingChannelLayer.counts)
+        samples = counts.get('send_live_data', 0)
+        ws_messages = sum(counts.values())
+        durations.sort()
+        busy = sum(durations) or elapsed or 1.0
+        return {
+            'devices': len(fleet.ports),
+            'dead_devices': options['dead_devices'],
+            'registers_per_device': len(register_map),
+            'read_requests_per_cycle': block_count,
+            'cycles': len(durations),
+            'skipped_cycles': skipped,
+            'samples_per_sec': samples / busy,
+            'inserts_per_sec': rows / busy,
+            'ws_messages_per_sec': ws_messages / busy,
+            'modbus_requests_per_sec': requests / busy,
+            'cycle_p50': percentile(durations, 50),
+            'cycle_p90': percentile(durations, 90),
+            'cycle_p99': percentile(durations, 99),
+            'cycle_max': durations[-1] if durations else 0.0,
+            'ws_messages_by_type': counts,
+        }
+
+    def report(self, results, options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        self.stdout.write(
+            f"{results['devices']} cihaz ({results['dead_devices']} ölü), cihaz başına "
+            f"{results['registers_per_device']} register, döngü başına {results['read_requests_per_cycle']} okuma isteği, "
+            f"{results['cycles']} döngü ({results['skipped_cycles']} atlandı)"
+        )
+        rows = [
+            ('samples_per_sec', "Örnek/sn", '{:.1f}'),
+            ('inserts_per_sec', "DB kayıt/sn", '{:.1f}'),
+            ('ws_messages_per_sec', "WebSocket mesaj/sn", '{:.1f}'),
+            ('modbus_requests_per_sec', "Modbus istek/sn", '{:.1f}'),
+            ('cycle_p50', "Döngü süresi p50 (sn)", '{:.4f}'),
+            ('cycle_p90', "Döngü süresi p90 (sn)", '{:.4f}'),
+            ('cycle_p99', "Döngü süresi p99 (sn)", '{:.4f}'),
+            ('cycle_max', "Döngü süresi maks (sn)", '{:.4f}'),
+        ]
+        for key, label, fmt in rows:
+            line = f"  {label:<24} {fmt.format(results[key]):>12}"
+            if baseline and baseline.get(key):
+                change = (results[key] - baseline[key]) / baseline[key] * 100.0
+                better = change >= 0 if key in HIGHER_IS_BETTER else change <= 0
+                style = self.style.SUCCESS if better else self.style.WARNING
+                line += style(f"  ({change:+.1f}% / temel: {fmt.format(baseline[key])})")
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Sonuçlar {options['output']} dosyasına yazıldı.")
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from monitoring.partitioning import (
+    PARTITION_INTERVALS, detach_partitions, ensure_partitions, is_partitioned, list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "DataPoint tablosunun zaman bölümlerini yönetir: ileriye dönük bölümleri oluşturur, "
+        "varsayılan bölüme düşmüş satırları taşır ve saklama süresini aşan bölümleri ana tablodan "
+        "ayırır (isteğe bağlı siler). Sadece PostgreSQL'de çalışır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=None, help="Şimdiden sonra hazır tutulacak bölüm sayısı")
+        parser.add_argument('--interval', choices=PARTITION_INTERVALS, default=None, help="Yeni bölümlerin uzunluğu")
+        parser.add_argument('--buckets', type=int, default=None, help="Yeni bölümlerdeki test_run HASH alt bölüm sayısı (0: yok)")
+        parser.add_argument(
+            '--detach-older-than', type=int, default=None, metavar='GÜN',
+            help="Bu kadar günden eski bölümleri ana tablodan ayır (varsayılan: DATAPOINT_PARTITION_RETENTION_DAYS)",
+        )
+        parser.add_argument('--drop', action='store_true', help="Ayrılan bölümleri sil")
+        parser.add_argument('--list', action='store_true', help="Sadece mevcut bölümleri listele")
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError("DataPoint tablosu bölümlenmiş değil (PostgreSQL ve 0006_partition_datapoint migration'ı gerekir).")
+            if options['list']:
+                for partition in list_partitions(cursor):
+                    self.stdout.write(f"  {partition.name:<40} {partition.start:%Y-%m-%d %H:%M} - {partition.end:%Y-%m-%d %H:%M}")
+                return
+
+        created = ensure_partitions(ahead=options['ahead'], interval=options['interval'], buckets=options['buckets'])
+        for partition, moved in created:
+            self.stdout.write(self.style.SUCCESS(f"Oluşturuldu: {partition.name} (taşınan satır: {moved})"))
+
+        retention_days = options['detach_older_than']
+        if retention_days is None:
+            retention_days = getattr(settings, 'DATAPOINT_PARTITION_RETENTION_DAYS', None)
+        if retention_days is not None:
+            detached = detach_partitions(timezone.now() - timedelta(days=retention_days), drop=options['drop'])
+            for partition in detached:
+                self.stdout.write(self.style.WARNING(f"{'Silindi' if options['drop'] else 'Ayrıldı'}: {partition.name}"))
+
+        self.stdout.write(f"Bölüm bakımı tamamlandı: {len(created)} bölüm oluşturuldu.")
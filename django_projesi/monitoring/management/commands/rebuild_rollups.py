@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from monitoring.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "DataPoint özet (rollup) tablolarını ham veriden yeniden oluşturur. Özetler yeni veriyle "
+        "birlikte otomatik güncellenir; bu komut mevcut veri için veya özetler bozulduğunda kullanılır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-run', type=int, action='append', dest='test_runs', help="Sadece bu test seansı (birden fazla verilebilir)")
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Belleğe tek seferde alınacak satır sayısı")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed = rebuild_rollups(test_run_ids=options['test_runs'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} satır özetlendi ({time.monotonic() - started:.1f} sn)."
+        ))
@@ -0,0 +1,68 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from monitoring.async_poller import shutdown_poller
+from monitoring.deferred_writes import deferred_writer
+from monitoring.scan_scheduler import ScanScheduler
+from monitoring.tasks import load_acquisition_targets, run_single_flight_cycle
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Modbus veri toplama servisini başlatır. Register yapılandırmasını bir kez derler, "
+        "bellekte tutar ve her scan sınıfını monotonic saate göre kendi periyodunda okur."
+    )
+
+    # Hiç register yokken yapılandırma değişikliği için bekleme süresi (saniye)
+    IDLE_WAIT = 5.0
+
+    def handle(self, *args, **options):
+        self.stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        scheduler = ScanScheduler(load_acquisition_targets())
+        logger.info(
+            f"Veri toplama servisi başladı: {len(scheduler.targets)} cihaz, "
+            f"scan sınıfları: {sorted(scheduler.next_due)} sn."
+        )
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    # Yapılandırma değişmediyse önbellek aynı listeyi döndürür (sorgu yapılmaz)
+                    targets = load_acquisition_targets()
+                    if targets is not scheduler.targets:
+                        scheduler.update_targets(targets)
+                        logger.info(f"Yapılandırma güncellendi: {len(targets)} cihaz, scan sınıfları: {sorted(scheduler.next_due)} sn.")
+                    due_targets = scheduler.pop_due()
+                    if due_targets:
+                        # Başka bir süreç döngü çalıştırıyorsa bu tur atlanır (bkz. cycle_guard.py)
+                        run_single_flight_cycle(
+                            due_targets,
+                            lag=scheduler.last_lag,
+                            interval=scheduler.last_interval,
+                            missed_cycles=scheduler.missed_cycles,
+                        )
+                except Exception as e:
+                    logger.exception(f"!!! DÖNGÜ HATASI: {e}")
+                    # Kopmuş veritabanı bağlantısı varsa bir sonraki döngüde yeniden açılsın
+                    close_old_connections()
+
+                wait = scheduler.seconds_until_next()
+                self.stop_event.wait(self.IDLE_WAIT if wait is None else wait)
+        finally:
+            # Arka planda bekleyen cihaz/alarm yazımları bitirilir
+            deferred_writer.drain()
+            shutdown_poller()
+            logger.info("Veri toplama servisi durduruldu.")
+
+    def _request_stop(self, signum, frame):
+        logger.info(f"Sinyal alındı ({signum}), mevcut döngü bitince servis duracak.")
+        self.stop_event.set()
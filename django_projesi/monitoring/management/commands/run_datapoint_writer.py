@@ -0,0 +1,36 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.datapoint_buffer import DataPointWriter, datapoint_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Yazma tamponundaki (Redis Stream) örnekleri büyük partiler halinde veritabanına yazan "
+        "servisi başlatır. Birden fazla kopya çalıştırılabilir; mesajlar consumer group ile paylaşılır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Tek transaction'da yazılacak en fazla mesaj (döngü) sayısı")
+        parser.add_argument('--consumer', default=None, help="Consumer group içindeki tüketici adı (varsayılan: makine adı-PID)")
+
+    def handle(self, *args, **options):
+        if datapoint_buffer.client is None:
+            raise CommandError("Yazma tamponu kapalı: DATAPOINT_BUFFER_REDIS_URL tanımlı değil.")
+        self.stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        writer = DataPointWriter(consumer=options['consumer'], batch_size=options['batch_size'])
+        logger.info(f"Veri yazıcı servisi başladı: tüketici {writer.consumer}, parti {writer.batch_size} mesaj.")
+        writer.run(self.stop_event)
+        logger.info("Veri yazıcı servisi durduruldu.")
+
+    def _request_stop(self, signum, frame):
+        logger.info(f"Sinyal alındı ({signum}), mevcut parti yazılınca servis duracak.")
+        self.stop_event.set()
@@ -0,0 +1,142 @@
+"""
+Register eşleştirme (Master/Slave) motoru.
+
+Aktif eşleştirme kuralları yapılandırmayla birlikte bir kaynak -> hedefler
+grafına derlenir (bkz. config_cache.py). Bir kaynağın değeri değiştiğinde
+hedeflere yazılacak değerler okuma döngüsünün içinde planlanır ve yazma
+kuyruğu üzerinden, okuma motorunun açık soketleriyle gönderilir; kural başına
+Celery görevi ve yeni bağlantı açılmaz. Zincirleme kurallar (A -> B -> C) aynı
+döngüde yayılır.
+
+Döngü oluşturan kurallar (A -> B -> A) değerlerin sürekli birbirini
+tetiklemesine yol açacağı için derleme sırasında devre dışı bırakılır ve
+loglanır; RegisterMapping.clean() da bu tür kuralların kaydedilmesini engeller.
+"""
+import logging
+from collections import deque
+from dataclasses import dataclass
+from math import isfinite
+from types import MappingProxyType
+
+from .decoder import BlockDecoder, encode_register_value
+from .write_queue import WRITABLE_REGISTER_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MappingGraph:
+    """Derlenmiş eşleştirme grafı."""
+    # kaynak register ID -> (hedef CompiledRegister, ...)
+    destinations: MappingProxyType
+    # hedef cihaz ID -> Device
+    devices: MappingProxyType
+    # Döngü oluşturduğu için çalıştırılmayan (kaynak ID, hedef ID) çiftleri
+    cyclic_edges: frozenset
+
+
+def find_cyclic_edges(edges):
+    """
+    `edges` ({kaynak ID: [hedef ID, ...]}) içinde bir döngünün parçası olan
+    kenarları döndürür: hedefinden kaynağına geri dönülebilen her kenar.
+    """
+    def reaches(start, target):
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                return True
+            for nxt in edges.get(node, ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return False
+
+    return frozenset(
+        (source, destination)
+        for source, destinations in edges.items()
+        for destination in destinations
+        if reaches(destination, source)
+    )
+
+
+def compile_mapping_graph(plans):
+    """Cihaz planlarındaki derlenmiş register'lardan eşleştirme grafını kurar."""
+    registers = {}
+    devices = {}
+    for plan in plans:
+        for blocks in plan.scan_groups.values():
+            for block in blocks:
+                for register, _, _ in block.items:
+                    registers[register.id] = register
+                    devices[register.id] = plan.device
+
+    edges = {r.id: list(r.mapping_destination_ids) for r in registers.values() if r.mapping_destination_ids}
+    cyclic_edges = find_cyclic_edges(edges)
+    for source_id, destination_id in sorted(cyclic_edges):
+        logger.warning(
+            f"!!! EŞLEŞTİRME DÖNGÜSÜ: Register {source_id} -> {destination_id} kuralı bir döngü oluşturuyor, çalıştırılmayacak."
+        )
+
+    destinations = {}
+    target_devices = {}
+    for source_id, destination_ids in edges.items():
+        compiled = []
+        for destination_id in destination_ids:
+            if (source_id, destination_id) in cyclic_edges:
+                continue
+            destination = registers.get(destination_id)
+            if destination is None or not destination.is_writable or destination.register_type not in WRITABLE_REGISTER_TYPES:
+                # Hedef cihaz pasif veya register yazılabilir değil
+                logger.warning(f"!!! EŞLEŞTİRME HATASI: Register {source_id} -> {destination_id} hedefi yazılabilir değil veya cihazı pasif.")
+                continue
+            compiled.append(destination)
+            target_devices[destination.device_id] = devices[destination_id]
+        if compiled:
+            destinations[source_id] = tuple(compiled)
+
+    return MappingGraph(
+        destinations=MappingProxyType(destinations),
+        devices=MappingProxyType(target_devices),
+        cyclic_edges=cyclic_edges,
+    )
+
+
+def mapped_value(register, value):
+    """
+    `value` yazıldıktan sonra hedef register'ın okunacak değeri (zincirde bir sonraki
+    kaynağa aktarılır). Okuma yoluyla aynıdır: coil'de tersleme ve çarpan, diğer
+    register'larda çarpanla kodlanıp (tamsayı tiplerde yuvarlanarak) çözülen değer.
+    """
+    if register.register_type == 'coil':
+        # Coil'e ham değer yazılır; okunurken tersleme ve çarpan uygulanır
+        return float(bool(value) != register.invert_value) * register.scaling_factor
+    try:
+        words = encode_register_value(register, value)
+    except (ValueError, TypeError, OverflowError):
+        # Değer register'a yazılamaz; yazma hatası write_queue'da raporlanır
+        return value
+    if register.data_type != 'STRING' and not isfinite(float(value)):
+        # NaN/sonsuz okumalar çözücüde atlanır; geçersiz okuma sayılmasın
+        return value
+    decoded = BlockDecoder(False, ((register, 0, len(words)),)).decode(words)
+    return decoded[0][1] if decoded else value
+
+
+def plan_mapping_writes(graph, changes):
+    """
+    Değeri değişen kaynaklardan (`changes`: [(register_id, değer), ...]) başlayarak
+    grafı dolaşır ve hedef register başına yazılacak son değeri belirler.
+    {hedef ID: (hedef CompiledRegister, değer)} döndürür. Graf döngüsüz
+    derlendiği için dolaşma her zaman sonlanır.
+    """
+    writes = {}
+    queue = deque(changes)
+    while queue:
+        source_id, value = queue.popleft()
+        for destination in graph.destinations.get(source_id, ()):
+            writes[destination.id] = (destination, value)
+            if destination.id in graph.destinations:
+                queue.append((destination.id, mapped_value(destination, value)))
+    return writes
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='register',
+            name='scan_interval',
+            field=models.PositiveIntegerField(choices=[(1, '1 sn (Hızlı - Coil/Kontaktör)'), (5, '5 sn'), (10, '10 sn (Standart)'), (30, '30 sn'), (60, '1 dk (Yavaş - Ortam Değerleri)'), (300, '5 dk')], default=10, help_text="Bu register'ın kaç saniyede bir okunacağı. Aynı periyottaki register'lar birlikte okunur.", verbose_name='Okuma Periyodu (Scan Sınıfı)'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_register_scan_interval'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datapoint',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_datapoint_acquisition_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='register',
+            name='deadband_mode',
+            field=models.CharField(choices=[('none', 'Kapalı (Her Okumayı Kaydet)'), ('absolute', 'Mutlak Değer'), ('percent', 'Yüzde (%)')], default='none', help_text='Açıksa değer yalnızca son kaydedilen değerden ölü bant kadar uzaklaştığında kaydedilir.', max_length=10, verbose_name='Ölü Bant Modu'),
+        ),
+        migrations.AddField(
+            model_name='register',
+            name='deadband_value',
+            field=models.FloatField(default=0.0, help_text='Mutlak modda register biriminde, yüzde modda son kaydedilen değere göre yüzde olarak girilir.', verbose_name='Ölü Bant Değeri'),
+        ),
+        migrations.AddField(
+            model_name='register',
+            name='heartbeat_interval',
+            field=models.PositiveIntegerField(default=300, help_text='Değer ölü bant içinde kalsa bile en geç bu sürede bir kayıt yazılır.', verbose_name='En Uzun Kayıt Aralığı (saniye)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_register_deadband'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='circuit_retry_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Sonraki Bağlantı Denemesi'),
+        ),
+        migrations.AddField(
+            model_name='device',
+            name='circuit_state',
+            field=models.CharField(choices=[('closed', 'Kapalı (Normal Okuma)'), ('open', 'Açık (Okuma Askıda)'), ('half_open', 'Yarı Açık (Deneme)')], default='closed', max_length=10, verbose_name='Devre Kesici Durumu'),
+        ),
+    ]
@@ -0,0 +1,167 @@
+"""
+DataPoint tablosunu timestamp'e göre RANGE bölümlenmiş tabloya dönüştürür.
+
+Sadece PostgreSQL'de çalışır; diğer veritabanlarında (örn. yerel SQLite) tablo
+olduğu gibi kalır. Model tanımı değişmez, ORM ana tabloyu kullanmaya devam eder.
+
+Bölümlenmiş tablolarda birincil anahtar bölüm anahtarını içermek zorunda olduğu
+için veritabanındaki birincil anahtar (id, timestamp) olur; id değerleri yine
+tek bir sequence'ten gelir. Mevcut satırlar, aralıkları için açılan bölümlere
+kopyalanır; büyük tablolarda bu işlem uzun sürebilir.
+
+Bölüm hesapları monitoring/partitioning.py'deki karşılıklarının bu migration
+için sabitlenmiş kopyalarıdır; modül ileride değişse de migration aynı kalır.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'monitoring_datapoint'
+LEGACY = 'monitoring_datapoint_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+COLUMNS = 'id, value, timestamp, register_id, test_run_id'
+
+
+def partition_start(moment, interval):
+    """`moment` anını içeren bölümün başlangıcı (UTC gün/hafta(Pazartesi)/ay başı)."""
+    moment = moment.astimezone(dt_timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    elif interval == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def next_partition_start(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start, interval):
+    suffix = start.strftime('%Y%m') if interval == 'month' else start.strftime('%Y%m%d')
+    return f'{TABLE}_p{suffix}'
+
+
+def create_partitions(schema_editor, since):
+    """
+    `since` ile şimdiden DATAPOINT_PARTITIONS_AHEAD bölüm sonrası arasındaki
+    bölümleri açar. Tablo yeni oluşturulduğu için mevcut bölüm veya varsayılan
+    bölümde taşınacak satır yoktur.
+    """
+    interval = getattr(settings, 'DATAPOINT_PARTITION_INTERVAL', 'month')
+    if interval not in ('day', 'week', 'month'):
+        interval = 'month'
+    ahead = getattr(settings, 'DATAPOINT_PARTITIONS_AHEAD', 3)
+    buckets = int(getattr(settings, 'DATAPOINT_PARTITION_TEST_RUN_BUCKETS', 0))
+    qn = schema_editor.connection.ops.quote_name
+
+    now = timezone.now()
+    start = partition_start(min(since, now) if since else now, interval)
+    last = partition_start(now, interval)
+    for _ in range(ahead):
+        last = next_partition_start(last, interval)
+
+    with schema_editor.connection.cursor() as cursor:
+        while start <= last:
+            end = next_partition_start(start, interval)
+            name = partition_name(start, interval)
+            sub_partition = " PARTITION BY HASH (test_run_id)" if buckets else ""
+            cursor.execute(
+                f"CREATE TABLE {qn(name)} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s){sub_partition}",
+                [start.isoformat(), end.isoformat()],
+            )
+            for remainder in range(buckets):
+                cursor.execute(
+                    f"CREATE TABLE {qn(f'{name}_h{remainder}')} PARTITION OF {qn(name)} "
+                    f"FOR VALUES WITH (MODULUS {buckets}, REMAINDER {remainder})"
+                )
+            start = end
+
+
+def create_table_sql(table, partitioned):
+    partition_clause = ' PARTITION BY RANGE (timestamp)' if partitioned else ''
+    primary_key = '(id, timestamp)' if partitioned else '(id)'
+    return [
+        f"""
+        CREATE TABLE {table} (
+            id bigint NOT NULL DEFAULT nextval('{TABLE}_id_seq'),
+            value double precision NOT NULL,
+            timestamp timestamp with time zone NOT NULL,
+            register_id bigint NOT NULL,
+            test_run_id bigint NOT NULL,
+            CONSTRAINT {table}_pk PRIMARY KEY {primary_key}
+        ){partition_clause}
+        """,
+        f"CREATE INDEX {table}_timestamp_idx ON {table} (timestamp)",
+        f"CREATE INDEX {table}_register_ts_idx ON {table} (register_id, timestamp)",
+        f"CREATE INDEX {table}_test_run_ts_idx ON {table} (test_run_id, timestamp)",
+        f"""
+        ALTER TABLE {table} ADD CONSTRAINT {table}_register_fk FOREIGN KEY (register_id)
+            REFERENCES monitoring_register (id) DEFERRABLE INITIALLY DEFERRED
+        """,
+        f"""
+        ALTER TABLE {table} ADD CONSTRAINT {table}_test_run_fk FOREIGN KEY (test_run_id)
+            REFERENCES monitoring_testrun (id) DEFERRABLE INITIALLY DEFERRED
+        """,
+    ]
+
+
+def partition_datapoint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    execute = schema_editor.execute
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+    # Eski tablonun sequence'i (identity veya serial) tabloyla birlikte silinecek; yenisi açılır
+    execute(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq RENAME TO {LEGACY}_id_seq")
+    execute(f"CREATE SEQUENCE {TABLE}_id_seq")
+    for sql in create_table_sql(TABLE, partitioned=True):
+        execute(sql)
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp), max(id) FROM {LEGACY}")
+        since, max_id = cursor.fetchone()
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, false)", [(max_id or 0) + 1])
+
+    # Mevcut verinin aralığı ve ileriye dönük bölümler açılır; satırlar doğrudan bölümlerine gider
+    create_partitions(schema_editor, since)
+    execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY}")
+    execute(f"DROP TABLE {LEGACY}")
+
+
+def unpartition_datapoint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    execute = schema_editor.execute
+
+    # Sequence bölümlenmiş tabloyla birlikte silinmesin diye önce sahipliği kaldırılır
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+    execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+    for suffix in ('pk', 'timestamp_idx', 'register_ts_idx', 'test_run_ts_idx'):
+        execute(f"ALTER INDEX {TABLE}_{suffix} RENAME TO {LEGACY}_{suffix}")
+    for sql in create_table_sql(TABLE, partitioned=False):
+        execute(sql)
+    execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY}")
+    execute(f"DROP TABLE {LEGACY}")
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0005_device_circuit_breaker'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_datapoint, unpartition_datapoint),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0006_partition_datapoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisterRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('sum_value', models.FloatField()),
+                ('first_value', models.FloatField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('last_value', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.register')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Günlük Özet',
+                'verbose_name_plural': 'Günlük Özetler',
+                'abstract': False,
+                'indexes': [models.Index(fields=['test_run', 'bucket'], name='monitoring__test_ru_3b7028_idx')],
+                'unique_together': {('register', 'test_run', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RegisterRollupHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('sum_value', models.FloatField()),
+                ('first_value', models.FloatField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('last_value', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.register')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Saatlik Özet',
+                'verbose_name_plural': 'Saatlik Özetler',
+                'abstract': False,
+                'indexes': [models.Index(fields=['test_run', 'bucket'], name='monitoring__test_ru_67e87f_idx')],
+                'unique_together': {('register', 'test_run', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RegisterRollupMinute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('sum_value', models.FloatField()),
+                ('first_value', models.FloatField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('last_value', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.register')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Dakikalık Özet',
+                'verbose_name_plural': 'Dakikalık Özetler',
+                'abstract': False,
+                'indexes': [models.Index(fields=['test_run', 'bucket'], name='monitoring__test_ru_5108eb_idx')],
+                'unique_together': {('register', 'test_run', 'bucket')},
+            },
+        ),
+    ]
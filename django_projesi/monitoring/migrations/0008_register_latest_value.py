@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_values(apps, schema_editor):
+    """Mevcut verideki her register'ın en son DataPoint'ini son değer tablosuna kopyalar."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "INSERT INTO monitoring_registerlatestvalue (register_id, value, timestamp, test_run_id) "
+            "SELECT DISTINCT ON (register_id) register_id, value, timestamp, test_run_id "
+            "FROM monitoring_datapoint ORDER BY register_id, timestamp DESC"
+        )
+        return
+    Register = apps.get_model('monitoring', 'Register')
+    DataPoint = apps.get_model('monitoring', 'DataPoint')
+    RegisterLatestValue = apps.get_model('monitoring', 'RegisterLatestValue')
+    latest = []
+    for register_id in Register.objects.values_list('id', flat=True):
+        datapoint = DataPoint.objects.filter(register_id=register_id).order_by('-timestamp').first()
+        if datapoint:
+            latest.append(RegisterLatestValue(
+                register_id=register_id, value=datapoint.value, timestamp=datapoint.timestamp, test_run_id=datapoint.test_run_id,
+            ))
+    RegisterLatestValue.objects.bulk_create(latest, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0007_datapoint_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisterLatestValue',
+            fields=[
+                ('register', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest', serialize=False, to='monitoring.register')),
+                ('value', models.FloatField()),
+                ('timestamp', models.DateTimeField()),
+                ('test_run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Son Değer',
+                'verbose_name_plural': 'Son Değerler',
+            },
+        ),
+        migrations.RunPython(backfill_latest_values, migrations.RunPython.noop),
+    ]
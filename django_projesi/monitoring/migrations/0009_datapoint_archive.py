@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0008_register_latest_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrun',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Arşivlenme Zamanı'),
+        ),
+        migrations.CreateModel(
+            name='DataPointArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_timestamp', models.DateTimeField()),
+                ('end_timestamp', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('data', models.BinaryField()),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.register')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_chunks', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Arşiv Parçası',
+                'verbose_name_plural': 'Arşiv Parçaları',
+                'indexes': [models.Index(fields=['test_run', 'register', 'start_timestamp'], name='monitoring__test_ru_73f9b1_idx'), models.Index(fields=['register', 'start_timestamp'], name='monitoring__registe_8794e2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0009_datapoint_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataPointBatchReceipt',
+            fields=[
+                ('message_id', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('written_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Yazma Tamponu Teslim Kaydı',
+                'verbose_name_plural': 'Yazma Tamponu Teslim Kayıtları',
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SEGMENT_STATUSES = ('RUNNING', 'PAUSED')
+
+
+def segments_from_events(events, current_status, start_time=None):
+    """
+    Olay kayıtlarından [(durum, başlangıç, bitiş)] segmentlerini çıkarır (segment
+    tablosundan önceki seanslar için). `events` zamana göre sıralı (olay tipi,
+    zaman) çiftleridir. Seans oluşturulurken yazılan START kaydı, seansın gerçek
+    başlangıcından (`start_time`) önce kaldığı için atlanır.
+    """
+    if start_time is not None:
+        events = [(event_type, timestamp) for event_type, timestamp in events if timestamp >= start_time]
+    segments = []
+    for (event_type, timestamp), (_, next_timestamp) in zip(events, events[1:] + [(None, None)]):
+        if event_type in ('START', 'RESUME'):
+            status = 'RUNNING'
+        elif event_type == 'PAUSE':
+            status = 'PAUSED'
+        else:
+            continue
+        if next_timestamp is None and current_status not in SEGMENT_STATUSES:
+            continue
+        segments.append((status, timestamp, next_timestamp))
+    return segments
+
+
+def backfill_segments(apps, schema_editor):
+    """Mevcut seansların segmentlerini olay kayıtlarından çıkarır."""
+    TestRun = apps.get_model('monitoring', 'TestRun')
+    TestEventLog = apps.get_model('monitoring', 'TestEventLog')
+    TestRunSegment = apps.get_model('monitoring', 'TestRunSegment')
+    segments = []
+    for test_run in TestRun.objects.all():
+        events = list(
+            TestEventLog.objects.filter(test_run=test_run).order_by('timestamp', 'id').values_list('event_type', 'timestamp')
+        )
+        for status, start_time, end_time in segments_from_events(events, test_run.status, test_run.start_time):
+            segments.append(TestRunSegment(test_run=test_run, status=status, start_time=start_time, end_time=end_time))
+    TestRunSegment.objects.bulk_create(segments, batch_size=1000)
+
+
+def backfill_register_manifest(apps, schema_editor):
+    """Mevcut seansların register listesini ham satırlardan ve arşiv parçalarından oluşturur."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "INSERT INTO monitoring_testrunregister (test_run_id, register_id) "
+            "SELECT test_run_id, register_id FROM monitoring_datapoint "
+            "UNION SELECT test_run_id, register_id FROM monitoring_datapointarchivechunk"
+        )
+        return
+    DataPoint = apps.get_model('monitoring', 'DataPoint')
+    DataPointArchiveChunk = apps.get_model('monitoring', 'DataPointArchiveChunk')
+    TestRunRegister = apps.get_model('monitoring', 'TestRunRegister')
+    pairs = set(DataPoint.objects.values_list('test_run_id', 'register_id').distinct())
+    pairs |= set(DataPointArchiveChunk.objects.values_list('test_run_id', 'register_id').distinct())
+    TestRunRegister.objects.bulk_create(
+        [TestRunRegister(test_run_id=test_run_id, register_id=register_id) for test_run_id, register_id in sorted(pairs)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0010_datapoint_batch_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestRunRegister',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='monitoring.register')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='register_manifest', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Test Register Kaydı',
+                'verbose_name_plural': 'Test Register Kayıtları',
+                'unique_together': {('test_run', 'register')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TestRunSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('RUNNING', 'Çalışıyor'), ('PAUSED', 'Duraklatıldı')], max_length=20)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='monitoring.testrun')),
+            ],
+            options={
+                'verbose_name': 'Test Durum Segmenti',
+                'verbose_name_plural': 'Test Durum Segmentleri',
+                'ordering': ['start_time'],
+                'indexes': [models.Index(fields=['test_run', 'status', 'start_time'], name='monitoring__test_ru_e4b437_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_segments, migrations.RunPython.noop),
+        migrations.RunPython(backfill_register_manifest, migrations.RunPython.noop),
+    ]
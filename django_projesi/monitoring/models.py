@@ -1,4 +1,6 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 # ==============================================================================
@@ -22,6 +24,16 @@ class Device(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="offline", verbose_name="Cihaz Durumu")
     last_seen = models.DateTimeField(null=True, blank=True, verbose_name="Son Görülme")
 
+    # --- YENİ EKLENEN ALAN: DEVRE KESİCİ ---
+    CIRCUIT_STATE_CHOICES = [
+        ("closed", "Kapalı (Normal Okuma)"),
+        ("open", "Açık (Okuma Askıda)"),
+        ("half_open", "Yarı Açık (Deneme)"),
+    ]
+    circuit_state = models.CharField(max_length=10, choices=CIRCUIT_STATE_CHOICES, default="closed", verbose_name="Devre Kesici Durumu")
+    circuit_retry_at = models.DateTimeField(null=True, blank=True, verbose_name="Sonraki Bağlantı Denemesi")
+    # --- BİTİŞ ---
+
     def __str__(self):
         return self.name
     class Meta:
@@ -106,6 +118,48 @@ class Register(models.Model):
     )
     # --- BİTİŞ ---
 
+    # --- YENİ EKLENEN ALAN: SCAN SINIFI ---
+    SCAN_INTERVAL_CHOICES = [
+        (1, '1 sn (Hızlı - Coil/Kontaktör)'),
+        (5, '5 sn'),
+        (10, '10 sn (Standart)'),
+        (30, '30 sn'),
+        (60, '1 dk (Yavaş - Ortam Değerleri)'),
+        (300, '5 dk'),
+    ]
+    scan_interval = models.PositiveIntegerField(
+        choices=SCAN_INTERVAL_CHOICES,
+        default=10,
+        verbose_name="Okuma Periyodu (Scan Sınıfı)",
+        help_text="Bu register'ın kaç saniyede bir okunacağı. Aynı periyottaki register'lar birlikte okunur."
+    )
+    # --- BİTİŞ ---
+
+    # --- YENİ EKLENEN ALAN: ÖLÜ BANT (REPORT-BY-EXCEPTION) ---
+    DEADBAND_MODE_CHOICES = [
+        ('none', 'Kapalı (Her Okumayı Kaydet)'),
+        ('absolute', 'Mutlak Değer'),
+        ('percent', 'Yüzde (%)'),
+    ]
+    deadband_mode = models.CharField(
+        max_length=10,
+        choices=DEADBAND_MODE_CHOICES,
+        default='none',
+        verbose_name="Ölü Bant Modu",
+        help_text="Açıksa değer yalnızca son kaydedilen değerden ölü bant kadar uzaklaştığında kaydedilir."
+    )
+    deadband_value = models.FloatField(
+        default=0.0,
+        verbose_name="Ölü Bant Değeri",
+        help_text="Mutlak modda register biriminde, yüzde modda son kaydedilen değere göre yüzde olarak girilir."
+    )
+    heartbeat_interval = models.PositiveIntegerField(
+        default=300,
+        verbose_name="En Uzun Kayıt Aralığı (saniye)",
+        help_text="Değer ölü bant içinde kalsa bile en geç bu sürede bir kayıt yazılır."
+    )
+    # --- BİTİŞ ---
+
 
     def __str__(self):
         return f"{self.device.name}: {self.name}"
@@ -176,6 +230,11 @@ class TestRun(models.Model):
         verbose_name="Test Kontrol Coili"
     )
 
+    # --- YENİ EKLENEN ALAN: ARŞİV ---
+    # Doluysa seansın DataPoint'leri sıkıştırılmış arşiv parçalarına taşınmıştır (bkz. archive.py)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Arşivlenme Zamanı")
+    # --- BİTİŞ ---
+
     class Meta:
         verbose_name = "Test Seansı"
         verbose_name_plural = "Test Seansları"
@@ -210,11 +269,65 @@ class TestEventLog(models.Model):
         return f"[{self.test_run.test_name}] - {self.get_event_type_display()}"
 
 
+# --- YENİ EKLENEN MODELLER: Test seansı durum segmentleri ve register listesi ---
+class TestRunSegment(models.Model):
+    """
+    Test seansının kesintisiz olarak aynı durumda (çalışıyor/duraklatıldı) geçirdiği
+    zaman aralığı. Başlat/duraklat/devam/iptal view'leri tarafından tutulur (bkz.
+    segments.py); raporların durum filtresi olay kayıtlarını yeniden işlemek yerine
+    bu tabloyla tek bir aralık join'i yapar.
+    """
+    STATUS_CHOICES = [
+        ('RUNNING', 'Çalışıyor'),
+        ('PAUSED', 'Duraklatıldı'),
+    ]
+
+    test_run = models.ForeignKey(TestRun, on_delete=models.CASCADE, related_name='segments')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    start_time = models.DateTimeField()
+    # Boşsa segment hâlâ sürüyor
+    end_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Test Durum Segmenti"
+        verbose_name_plural = "Test Durum Segmentleri"
+        ordering = ['start_time']
+        indexes = [models.Index(fields=['test_run', 'status', 'start_time'])]
+
+    def __str__(self):
+        return f"{self.test_run_id} {self.status}: {self.start_time} - {self.end_time or '...'}"
+
+
+class TestRunRegister(models.Model):
+    """
+    Test seansında verisi kaydedilmiş register'ların listesi. Örnekler yazılırken
+    eklenir; rapor filtrelerindeki register listesi DataPoint tablosunu taramadan
+    buradan okunur. Seans arşivlendiğinde de korunur.
+    """
+    test_run = models.ForeignKey(TestRun, on_delete=models.CASCADE, related_name='register_manifest')
+    register = models.ForeignKey(Register, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        verbose_name = "Test Register Kaydı"
+        verbose_name_plural = "Test Register Kayıtları"
+        unique_together = ('test_run', 'register')
+
+    def __str__(self):
+        return f"{self.test_run_id} -> {self.register_id}"
+# --- BİTİŞ ---
+
+
 class DataPoint(models.Model):
-    """Her bir veri okumasını temsil eder."""
+    """
+    Her bir veri okumasını temsil eder.
+
+    PostgreSQL'de tablo timestamp'e göre bölümlenmiştir (bkz. partitioning.py);
+    veritabanındaki birincil anahtar (id, timestamp) olsa da ORM için id benzersizdir.
+    """
     register = models.ForeignKey(Register, on_delete=models.CASCADE, related_name='datapoints')
     value = models.FloatField()
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Zaman damgası, veritabanına yazıldığı an değil okumanın yapıldığı andır (toplu yazımda ayrıca verilir)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     test_run = models.ForeignKey(TestRun, on_delete=models.CASCADE, related_name='datapoints')
     
     def __str__(self):
@@ -222,6 +335,133 @@ class DataPoint(models.Model):
 
 
 
+# --- YENİ EKLENEN MODELLER: DataPoint özet (rollup) tabloları ---
+class RegisterRollup(models.Model):
+    """
+    Bir register'ın bir test seansındaki okumalarının zaman dilimi (bucket) özeti.
+    Kayıtlar veri yazılırken artımlı olarak güncellenir (bkz. rollups.py).
+    """
+    register = models.ForeignKey(Register, on_delete=models.CASCADE, related_name='+')
+    test_run = models.ForeignKey(TestRun, on_delete=models.CASCADE, related_name='+')
+    # Dilimin başlangıcı
+    bucket = models.DateTimeField()
+    sample_count = models.PositiveIntegerField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    # Ortalama = sum_value / sample_count; toplam tutulduğu için artımlı güncellenebilir
+    sum_value = models.FloatField()
+    first_value = models.FloatField()
+    first_timestamp = models.DateTimeField()
+    last_value = models.FloatField()
+    last_timestamp = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+        unique_together = ('register', 'test_run', 'bucket')
+        indexes = [models.Index(fields=['test_run', 'bucket'])]
+
+    @property
+    def avg_value(self):
+        return self.sum_value / self.sample_count if self.sample_count else None
+
+    @property
+    def avg_is_sample_weighted(self):
+        """Ölü bantlı register'da ortalama zamana göre değil, kaydedilen örneklere göre hesaplanmıştır."""
+        return self.register.deadband_mode != 'none'
+
+    def __str__(self):
+        return f"{self.register_id} @ {self.bucket}: {self.sample_count} örnek"
+
+
+class RegisterRollupMinute(RegisterRollup):
+    class Meta(RegisterRollup.Meta):
+        verbose_name = "Dakikalık Özet"
+        verbose_name_plural = "Dakikalık Özetler"
+
+
+class RegisterRollupHour(RegisterRollup):
+    class Meta(RegisterRollup.Meta):
+        verbose_name = "Saatlik Özet"
+        verbose_name_plural = "Saatlik Özetler"
+
+
+class RegisterRollupDay(RegisterRollup):
+    class Meta(RegisterRollup.Meta):
+        verbose_name = "Günlük Özet"
+        verbose_name_plural = "Günlük Özetler"
+# --- BİTİŞ ---
+
+
+# --- YENİ EKLENEN MODEL: Arşivlenmiş DataPoint parçaları ---
+class DataPointArchiveChunk(models.Model):
+    """
+    Tamamlanmış bir test seansında bir register'ın ardışık örneklerinin sıkıştırılmış
+    hali: zaman damgaları delta-of-delta, değerler XOR kodlamasıyla saklanır
+    (bkz. archive.py). Zaman aralığı ve min/maks, parçayı açmadan elemek için tutulur.
+    """
+    register = models.ForeignKey(Register, on_delete=models.CASCADE, related_name='+')
+    test_run = models.ForeignKey(TestRun, on_delete=models.CASCADE, related_name='archive_chunks')
+    start_timestamp = models.DateTimeField()
+    end_timestamp = models.DateTimeField()
+    sample_count = models.PositiveIntegerField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    data = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Arşiv Parçası"
+        verbose_name_plural = "Arşiv Parçaları"
+        indexes = [
+            models.Index(fields=['test_run', 'register', 'start_timestamp']),
+            models.Index(fields=['register', 'start_timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.register_id} @ {self.start_timestamp} - {self.end_timestamp}: {self.sample_count} örnek"
+# --- BİTİŞ ---
+
+
+# --- YENİ EKLENEN MODEL: Yazma tamponu teslim kayıtları ---
+class DataPointBatchReceipt(models.Model):
+    """
+    Yazma tamponundan (Redis Stream) veritabanına yazılmış mesajların kimlikleri.
+    Yazıcı, mesajı yazıp onaylayamadan durursa mesaj yeniden teslim edilir; bu
+    kayıt aynı mesajın ikinci kez yazılmasını engeller (bkz. datapoint_buffer.py).
+    """
+    message_id = models.CharField(max_length=40, primary_key=True)
+    written_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Yazma Tamponu Teslim Kaydı"
+        verbose_name_plural = "Yazma Tamponu Teslim Kayıtları"
+
+    def __str__(self):
+        return self.message_id
+# --- BİTİŞ ---
+
+
+# --- YENİ EKLENEN MODEL: Register başına son değer ---
+class RegisterLatestValue(models.Model):
+    """
+    Her register'ın en son okunan değeri (register başına tek satır). Okuma döngüsü
+    tarafından güncellenir (bkz. latest_values.py); paneller son değeri DataPoint
+    tablosunu taramadan buradan okur.
+    """
+    register = models.OneToOneField(Register, on_delete=models.CASCADE, primary_key=True, related_name='latest')
+    value = models.FloatField()
+    # Okumanın yapıldığı an
+    timestamp = models.DateTimeField()
+    test_run = models.ForeignKey(TestRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        verbose_name = "Son Değer"
+        verbose_name_plural = "Son Değerler"
+
+    def __str__(self):
+        return f"{self.register_id} -> {self.value} ({self.timestamp})"
+# --- BİTİŞ ---
+
+
 class ScheduledTask(models.Model):
     """Her bir AÇ/KAPAT görevini saklayan basit zamanlama modelimiz."""
     ACTION_CHOICES = [(True, 'AÇIK'), (False, 'KAPALI')]
@@ -417,4 +657,18 @@ class RegisterMapping(models.Model):
     def __str__(self):
         return f"'{self.source_register}' değiştiğinde -> '{self.destination_register}' güncellenir"
 
+    def clean(self):
+        # --- YENİ EKLENEN BÖLÜM: Döngü oluşturan kurallar kaydedilemez ---
+        from .mapping_engine import find_cyclic_edges
+        if not self.is_active or not (self.source_register_id and self.destination_register_id):
+            return
+        edges = {}
+        active = RegisterMapping.objects.filter(is_active=True).exclude(pk=self.pk)
+        for source_id, destination_id in active.values_list('source_register_id', 'destination_register_id'):
+            edges.setdefault(source_id, []).append(destination_id)
+        edges.setdefault(self.source_register_id, []).append(self.destination_register_id)
+        if (self.source_register_id, self.destination_register_id) in find_cyclic_edges(edges):
+            raise ValidationError("Bu kural mevcut eşleştirmelerle bir döngü oluşturuyor (hedef, dolaylı olarak kaynağı tetikliyor).")
+        # --- BİTİŞ ---
+
 
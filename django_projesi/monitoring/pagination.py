@@ -0,0 +1,220 @@
+"""
+Rapor tablosu için keyset (imleç) sayfalama ve ucuz toplam sayısı.
+
+Django'nun Paginator'ı her istekte filtrelenmiş sorgu üzerinde COUNT(*) çalıştırır
+ve derin sayfalara OFFSET ile gider; ikisi de test seansı büyüdükçe doğrusal
+yavaşlar. Burada sayfalar, bir önceki sayfanın ilk/son satırının sıralama
+anahtarından (zaman damgası, id) devam eder:
+
+    WHERE timestamp <= :ts AND (timestamp < :ts OR id < :id)
+    ORDER BY timestamp DESC, id DESC LIMIT 51
+
+Sorgu (test_run_id, timestamp) / (register_id, timestamp) indekslerinden tek bir
+aralık taramasıdır; 10.000. sayfa 1. sayfa kadar ucuzdur. Arşivlenmiş seanslarda
+aynı imleç (zaman, register_id) ile parçaları atlayarak çalışır.
+
+Toplam kayıt sayısı ham tablo sayılmadan bulunur (bkz. datapoint_count): değer
+filtresi yoksa özet tablolarındaki örnek sayaçlarından, varsa PostgreSQL
+planlayıcısının satır tahmininden. Sayfa numarası ve sayfa sayısı bu yüzden
+yaklaşık olabilir.
+"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from math import ceil
+
+from django.db import connection
+from django.db.models import Q, Sum
+
+from .archive import ArchivedDataPoints
+from .rollups import rollup_queryset, rollup_summary
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(key):
+    """(zaman damgası, tam sayı) anahtarını URL parametresine çevirir."""
+    timestamp, tiebreaker = key
+    return f"{(timestamp - EPOCH) // ONE_MICROSECOND}_{tiebreaker}"
+
+
+def decode_cursor(value):
+    """encode_cursor()'ın tersi; geçersiz veya boş imleç için None."""
+    try:
+        microseconds, tiebreaker = value.split('_')
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(tiebreaker)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def planner_estimate(queryset):
+    """PostgreSQL planlayıcısının sorgu için satır tahmini; diğer veritabanlarında None."""
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def datapoint_count(datapoints, test_run, register_id=None, status=None, start=None, end=None, value_filtered=False):
+    """
+    Filtrelenmiş DataPoint sorgusunun satır sayısı, ham tablo sayılmadan.
+    (sayı, tahmin mi) döndürür:
+    - Değer filtresi yoksa özetlerdeki örnek sayaçları toplanır; durum veya zaman
+      filtresi yoksa sonuç kesindir, varsa dakikalık dilim hassasiyetinde yaklaşıktır.
+    - Değer filtresinde (veya özeti olmayan eski testlerde) PostgreSQL'in
+      planlayıcı tahmini kullanılır; diğer veritabanlarında COUNT(*) yapılır.
+    """
+    if not value_filtered:
+        if not (status or start or end):
+            count = rollup_summary(test_run, register_id)[0]
+            estimate = False
+        else:
+            count = rollup_queryset('1m', test_run, register_id, status, start, end).aggregate(
+                total=Sum('sample_count')
+            )['total'] or 0
+            estimate = True
+        if count:
+            return count, estimate
+
+    if isinstance(datapoints, ArchivedDataPoints):
+        return datapoints.count(), False
+    estimate = planner_estimate(datapoints)
+    if estimate is not None:
+        return estimate, True
+    return datapoints.count(), False
+
+
+class KeysetPage:
+    """
+    Paginator'ın Page nesnesinin şablonda kullanılan kısmının keyset karşılığı.
+    Satırlar en yeniden en eskiye sıralıdır; `next_cursor` daha eski, `previous_cursor`
+    daha yeni satırlara götürür.
+    """
+
+    def __init__(self, object_list, number, count, per_page, count_is_estimate,
+                 has_next, has_previous, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        if not has_next and not has_previous:
+            # Tek sayfa: sayı kesin olarak bilinir
+            count, count_is_estimate = len(object_list), False
+        self.count = count
+        self.count_is_estimate = count_is_estimate
+        self.num_pages = max(ceil(count / per_page), 1)
+        number = max(number, 1) if has_previous else 1
+        if not has_next:
+            # Sona ulaşıldı: sayfa sayısı tahmin yerine gerçek sayfa numarasıdır
+            self.num_pages = number
+        elif number >= self.num_pages:
+            # Tahmin eksik kaldıysa en azından bir sonraki sayfa gösterilir
+            self.num_pages = number + 1
+        self.number = number
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def _seek(rows, fields, key, descending, limit):
+    """`rows`'u `fields` anahtarına göre `key`'den sonra (anahtar hariç) verilen yönde `limit` satır okur."""
+    if isinstance(rows, ArchivedDataPoints):
+        points = []
+        for point in rows.seek(key, descending=descending):
+            points.append(point)
+            if len(points) >= limit:
+                break
+        return points
+
+    field, tiebreaker = fields
+    if key is not None:
+        timestamp, tie = key
+        # İlk koşul indeks üzerinde aralık sınırı verir; ikincisi eşit zamanlı satırları ayırır
+        if descending:
+            rows = rows.filter(Q(**{f'{field}__lte': timestamp}), Q(**{f'{field}__lt': timestamp}) | Q(**{f'{tiebreaker}__lt': tie}))
+        else:
+            rows = rows.filter(Q(**{f'{field}__gte': timestamp}), Q(**{f'{field}__gt': timestamp}) | Q(**{f'{tiebreaker}__gt': tie}))
+    order = (f'-{field}', f'-{tiebreaker}') if descending else (field, tiebreaker)
+    return list(rows.order_by(*order)[:limit])
+
+
+def keyset_page(rows, params, count, per_page=50, count_is_estimate=False, fields=('timestamp', 'id')):
+    """
+    İstek parametrelerine göre sayfayı okur:
+    - `after`: bu imleçten sonraki (daha eski) satırlar — "Sonraki"
+    - `before`: bu imleçten önceki (daha yeni) satırlar — "Önceki"
+    - `last`: en eski satırlar — "Son"
+    - hiçbiri yoksa ilk (en yeni) sayfa.
+    `fields`, (zaman alanı, eşitlik bozucu alan) sıralama anahtarıdır. Arşivlenmiş
+    seanslarda anahtar (timestamp, register_id) olur.
+    """
+    if isinstance(rows, ArchivedDataPoints):
+        fields = ('timestamp', 'register_id')
+    field, tiebreaker = fields
+
+    def key_of(row):
+        return getattr(row, field), getattr(row, tiebreaker)
+
+    try:
+        number = int(params.get('page') or 1)
+    except ValueError:
+        number = 1
+    after = decode_cursor(params.get('after'))
+    before = decode_cursor(params.get('before'))
+
+    if params.get('last'):
+        object_list = _seek(rows, fields, None, descending=False, limit=per_page + 1)
+        has_previous = len(object_list) > per_page
+        object_list = object_list[:per_page][::-1]
+        has_next = False
+        number = ceil(count / per_page)
+    elif before is not None:
+        object_list = _seek(rows, fields, before, descending=False, limit=per_page + 1)
+        has_previous = len(object_list) > per_page
+        if not has_previous:
+            # En başa ulaşıldı: sayfa kaymasın diye ilk sayfa baştan okunur
+            return keyset_page(rows, {}, count, per_page, count_is_estimate, fields)
+        object_list = object_list[:per_page][::-1]
+        has_next = True
+    else:
+        object_list = _seek(rows, fields, after, descending=True, limit=per_page + 1)
+        has_next = len(object_list) > per_page
+        object_list = object_list[:per_page]
+        has_previous = after is not None
+        if after is None:
+            number = 1
+
+    previous_cursor = None
+    if has_previous:
+        # Boş sayfada (ör. satırlar bu arada silindiyse) geri dönüş geldiği imleçten yapılır
+        previous_cursor = encode_cursor(key_of(object_list[0])) if object_list else params.get('after')
+    return KeysetPage(
+        object_list, number, count, per_page, count_is_estimate, has_next, has_previous,
+        next_cursor=encode_cursor(key_of(object_list[-1])) if has_next else None,
+        previous_cursor=previous_cursor,
+    )
@@ -0,0 +1,204 @@
+"""
+DataPoint tablosunun zamana göre bölümlenmesi (PostgreSQL native partitioning).
+
+monitoring_datapoint, timestamp'e göre RANGE bölümlenmiş bir ana tablodur
+(bkz. migrations/0006_partition_datapoint.py). ORM her zaman ana tabloya
+yazar ve okur; PostgreSQL satırı ilgili bölüme yönlendirir, zaman aralıklı
+sorgularda da yalnızca aralığa düşen bölümleri tarar. Bu yüzden views.py'deki
+sorgularda değişiklik gerekmez.
+
+Bölüm uzunluğu DATAPOINT_PARTITION_INTERVAL ('day', 'week', 'month') ile
+belirlenir. DATAPOINT_PARTITION_TEST_RUN_BUCKETS sıfırdan büyükse her zaman
+bölümü test_run_id'ye göre o sayıda HASH alt bölüme ayrılır.
+
+Aralığı henüz oluşturulmamış satırlar varsayılan (DEFAULT) bölüme düşer; bölüm
+oluşturma gecikse bile yazma hatası olmaz. ensure_partitions() ileriye dönük
+bölümleri açar ve varsayılan bölüme düşmüş satırları yeni bölümlerine taşır.
+Eski bölümler detach_partitions() ile ana tablodan ayrılır (isteğe bağlı
+silinir); ayrılan tablo ORM sorgularında artık görünmez.
+
+bkz. management/commands/datapoint_partitions.py
+"""
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DataPoint
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = DataPoint._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+COLUMNS = 'id, value, timestamp, register_id, test_run_id'
+PARTITION_INTERVALS = ('day', 'week', 'month')
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: datetime
+    end: datetime
+
+
+def partition_start(moment, interval):
+    """`moment` anını içeren bölümün başlangıcı (UTC gün/hafta(Pazartesi)/ay başı)."""
+    moment = moment.astimezone(dt_timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    elif interval == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def next_partition_start(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start, interval):
+    suffix = start.strftime('%Y%m') if interval == 'month' else start.strftime('%Y%m%d')
+    return f'{PARENT_TABLE}_p{suffix}'
+
+
+def is_partitioned(cursor):
+    """DataPoint ana tablosu bölümlenmiş mi? (PostgreSQL dışında her zaman False)"""
+    if connection.vendor != 'postgresql':
+        return False
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [PARENT_TABLE])
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor):
+    """Ana tabloya bağlı zaman bölümlerini başlangıca göre sıralı döndürür (varsayılan bölüm hariç)."""
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        [PARENT_TABLE],
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND_RE.search(bound or '')
+        if match:
+            partitions.append(Partition(name, parse_datetime(match.group(1)), parse_datetime(match.group(2))))
+    return sorted(partitions, key=lambda p: p.start)
+
+
+def create_partition(cursor, start, end, name, buckets=0):
+    """
+    [start, end) aralığı için bölüm oluşturur. Varsayılan bölümde bu aralığa düşen
+    satırlar varsa, varsayılan bölüm geçici olarak ayrılır ve satırlar yeni bölüme
+    taşınır (PostgreSQL aksi halde bölüm oluşturmayı reddeder). Taşınan satır
+    sayısını döndürür.
+    """
+    qn = connection.ops.quote_name
+    bounds = [start.isoformat(), end.isoformat()]
+    with transaction.atomic():
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s)",
+            bounds,
+        )
+        has_rows = cursor.fetchone()[0]
+        if has_rows:
+            cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(DEFAULT_PARTITION)}")
+
+        sub_partition = " PARTITION BY HASH (test_run_id)" if buckets else ""
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} PARTITION OF {qn(PARENT_TABLE)} FOR VALUES FROM (%s) TO (%s){sub_partition}",
+            bounds,
+        )
+        for remainder in range(buckets):
+            cursor.execute(
+                f"CREATE TABLE {qn(f'{name}_h{remainder}')} PARTITION OF {qn(name)} "
+                f"FOR VALUES WITH (MODULUS {int(buckets)}, REMAINDER {remainder})"
+            )
+
+        moved = 0
+        if has_rows:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s RETURNING {COLUMNS}) "
+                f"INSERT INTO {qn(PARENT_TABLE)} ({COLUMNS}) SELECT {COLUMNS} FROM moved",
+                bounds,
+            )
+            moved = cursor.rowcount
+            cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} ATTACH PARTITION {qn(DEFAULT_PARTITION)} DEFAULT")
+    return moved
+
+
+def ensure_partitions(since=None, ahead=None, interval=None, buckets=None):
+    """
+    `since` (verilmezse varsayılan bölümdeki en eski satır) ile şimdiden `ahead`
+    bölüm sonrası arasındaki eksik bölümleri oluşturur. Oluşturulan bölümleri
+    (Partition, taşınan satır sayısı) çiftleri olarak döndürür.
+    """
+    interval = interval or getattr(settings, 'DATAPOINT_PARTITION_INTERVAL', 'month')
+    ahead = getattr(settings, 'DATAPOINT_PARTITIONS_AHEAD', 3) if ahead is None else ahead
+    buckets = getattr(settings, 'DATAPOINT_PARTITION_TEST_RUN_BUCKETS', 0) if buckets is None else buckets
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"Geçersiz bölüm aralığı: {interval} (seçenekler: {', '.join(PARTITION_INTERVALS)})")
+
+    created = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        existing = list_partitions(cursor)
+
+        if since is None:
+            cursor.execute(f"SELECT min(timestamp) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}")
+            since = cursor.fetchone()[0]
+        now = timezone.now()
+        start = partition_start(min(since, now) if since else now, interval)
+        last = partition_start(now, interval)
+        for _ in range(ahead):
+            last = next_partition_start(last, interval)
+
+        while start <= last:
+            end = next_partition_start(start, interval)
+            overlapping = [p for p in existing if p.start < end and p.end > start]
+            if not overlapping:
+                partition = Partition(partition_name(start, interval), start, end)
+                moved = create_partition(cursor, start, end, partition.name, buckets)
+                created.append((partition, moved))
+                logger.info(f"--> BÖLÜM OLUŞTURULDU: {partition.name} ({start:%Y-%m-%d} - {end:%Y-%m-%d}), taşınan satır: {moved}")
+            elif any(p.start != start or p.end != end for p in overlapping):
+                # Bölüm aralığı ayarı değiştirilmiş; mevcut bölümlerle çakışan aralık atlanır
+                logger.warning(f"!!! BÖLÜM ATLANDI: {start:%Y-%m-%d} - {end:%Y-%m-%d} aralığı mevcut bölümlerle çakışıyor.")
+            start = end
+    return created
+
+
+def detach_partitions(before, drop=False):
+    """
+    Tamamı `before` anından önce kalan bölümleri ana tablodan ayırır; `drop`
+    verilirse tabloyu siler. Ayrılan bölümlerin listesini döndürür.
+    """
+    detached = []
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return detached
+        for partition in list_partitions(cursor):
+            if partition.end > before:
+                continue
+            with transaction.atomic():
+                cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(partition.name)}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {qn(partition.name)}")
+            detached.append(partition)
+            logger.info(f"--> BÖLÜM {'SİLİNDİ' if drop else 'AYRILDI'}: {partition.name}")
+    return detached
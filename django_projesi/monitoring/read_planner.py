@@ -0,0 +1,185 @@
+"""
+Okuma planlayıcısı: bir cihazın register'larını tip ve PDU adresine göre
+gruplayıp, tek istekte okunabilecek bitişik bloklara dönüştürür.
+
+Bazı cihazlar, blok register'lar arasındaki tanımsız bir adresi kapsadığında
+bütün isteği hata cevabıyla (Illegal Data Address / Illegal Function) reddeder.
+Böyle bir blok register başına kendi aralığına bölünerek okunur ve bölünme cihaz
+başına hatırlanır; sonraki döngülerde reddedilen büyük istek tekrar gönderilmez.
+Cihazın yazılımı değişmiş olabileceği için bölünmüş blok her
+MODBUS_SPLIT_REPROBE_INTERVAL saniyede bir yeniden tek istekle denenir.
+Meşgul cihaz veya ağ geçidi hataları gibi diğer hata cevaplarında blok bölünmez.
+Yapılandırma yeniden derlendiğinde hatırlanan bölünmeler unutulur.
+"""
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .decoder import BlockDecoder
+
+# Modbus protokolünün tek istekte izin verdiği üst sınırlar
+MAX_READ_WORDS = 125
+MAX_READ_BITS = 2000
+
+WORD_REGISTER_TYPES = ('holding', 'input')
+BIT_REGISTER_TYPES = ('coil', 'discrete_input')
+
+# Bloğun bölünmesini gerektiren Modbus hata kodları: ILLEGAL_FUNCTION, ILLEGAL_DATA_ADDRESS
+SPLIT_EXCEPTION_CODES = (1, 2)
+
+# Tek istekte okunamadığı için bölünen bloklar:
+# (cihaz, register tipi, başlangıç, uzunluk) -> (blok, register başına alt bloklar, yeniden deneme zamanı)
+_split_blocks = {}
+
+
+def forget_split_blocks():
+    """Hatırlanan bölünmeleri unutur; bloklar bir sonraki okumada yeniden tek istekle denenir."""
+    _split_blocks.clear()
+
+
+def get_pdu_address(register):
+    """Kullanıcının girdiği adresi (örn: 40001) protokol adresine (örn: 0) çevirir."""
+    addr = register.address
+    if register.register_type == 'coil' and 1 <= addr < 10000: return addr - 1
+    if register.register_type == 'discrete_input' and 10001 <= addr < 20000: return addr - 10001
+    if register.register_type == 'input' and 30001 <= addr < 40000: return addr - 30001
+    if register.register_type == 'holding' and 40001 <= addr < 50000: return addr - 40001
+    return addr
+
+
+def get_register_count(register):
+    """Bir register'ın kaç word (veya bit) kapladığını döndürür."""
+    if register.register_type in BIT_REGISTER_TYPES:
+        return 1
+    if register.data_type in ['FLOAT32', 'INT32', 'UINT32']:
+        return 2
+    if register.data_type == 'STRING':
+        return max(register.string_length, 1)
+    return 1
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """Tek bir Modbus isteğiyle okunacak bitişik adres aralığı."""
+    register_type: str
+    start: int
+    count: int
+    # (register, bloğun başından itibaren offset, kapladığı word/bit sayısı)
+    items: tuple
+    # Plan oluşturulurken bu blok için önceden derlenen çözücü
+    decoder: BlockDecoder
+
+    @property
+    def end(self):
+        return self.start + self.count
+
+    def decode(self, data):
+        """Blok için okunan ham veriyi çözer; (register, değer) çiftleri döndürür."""
+        return self.decoder.decode(data)
+
+
+def plan_device_reads(registers, gap_tolerance=None):
+    """
+    Register'ları tiplerine göre ayırır, PDU adresine göre sıralar ve
+    aralarındaki boşluk `gap_tolerance` değerini aşmayan komşuları
+    protokol sınırlarını (125 word / 2000 bit) geçmeyecek şekilde tek blokta toplar.
+    """
+    if gap_tolerance is None:
+        gap_tolerance = getattr(settings, 'MODBUS_READ_GAP_TOLERANCE', 10)
+
+    by_type = {}
+    for register in registers:
+        by_type.setdefault(register.register_type, []).append(
+            (get_pdu_address(register), get_register_count(register), register)
+        )
+
+    blocks = []
+    for register_type, entries in by_type.items():
+        limit = MAX_READ_BITS if register_type in BIT_REGISTER_TYPES else MAX_READ_WORDS
+        entries.sort(key=lambda entry: entry[0])
+
+        # Her grup: [başlangıç, bitiş, [(register, adres, sayı), ...]]
+        groups = []
+        for address, count, register in entries:
+            if groups:
+                start, end, members = groups[-1]
+                new_end = max(end, address + count)
+                if address - end <= gap_tolerance and new_end - start <= limit:
+                    groups[-1][1] = new_end
+                    members.append((register, address, count))
+                    continue
+            groups.append([address, address + count, [(register, address, count)]])
+
+        for start, end, members in groups:
+            items = tuple((register, address - start, count) for register, address, count in members)
+            decoder = BlockDecoder(register_type in BIT_REGISTER_TYPES, items)
+            blocks.append(ReadBlock(register_type, start, end - start, items, decoder))
+
+    return blocks
+
+
+def split_block(block):
+    """Bloğu, her register'ı kendi adres aralığını okuyan tek elemanlı bloklara böler."""
+    is_bits = block.register_type in BIT_REGISTER_TYPES
+    return tuple(
+        ReadBlock(block.register_type, block.start + offset, count, ((register, 0, count),),
+                  BlockDecoder(is_bits, ((register, 0, count),)))
+        for register, offset, count in block.items
+    )
+
+
+async def read_block(client, block, slave_id):
+    """
+    Bir bloğu AsyncModbusTcpClient ile tek istekte okur.
+    Word register'lar için word listesi, bit'ler için bit listesi, hata cevabında None döner.
+    """
+    return block_data(block, await request_block(client, block, slave_id))
+
+
+def block_data(block, result):
+    """Modbus cevabından bloğun ham verisi; hata cevabında None."""
+    if result.isError():
+        return None
+    if block.register_type in BIT_REGISTER_TYPES:
+        return result.bits
+    return result.registers
+
+
+async def request_block(client, block, slave_id):
+    """Bloğu tek istekte okur ve Modbus cevabını (hata cevabı dahil) döndürür."""
+    if block.register_type == 'holding':
+        result = await client.read_holding_registers(address=block.start, count=block.count, slave=slave_id)
+    elif block.register_type == 'input':
+        result = await client.read_input_registers(address=block.start, count=block.count, slave=slave_id)
+    elif block.register_type == 'coil':
+        result = await client.read_coils(address=block.start, count=block.count, slave=slave_id)
+    else:
+        result = await client.read_discrete_inputs(address=block.start, count=block.count, slave=slave_id)
+    return result
+
+
+async def read_device_block(client, block, slave_id, device_key):
+    """
+    Bir cihazın bloğunu okur ve (blok, ham veri) çiftleri döndürür. Blok adres
+    veya fonksiyon hatası (SPLIT_EXCEPTION_CODES) alırsa register'lar tek tek
+    okunur ve bölünme `device_key` için hatırlanır; okunamayan register'ın ham
+    verisi None olur.
+    """
+    key = (device_key, block.register_type, block.start, block.count)
+    split = _split_blocks.get(key)
+    if split is not None and split[0] is not block:
+        # Yapılandırma yeniden yüklendi: aynı aralığın alt blokları yeni register'larla kurulur
+        split = _split_blocks[key] = (block, split_block(block), split[2])
+    if split is None or time.monotonic() >= split[2]:
+        result = await request_block(client, block, slave_id)
+        if not result.isError():
+            if split is not None:
+                _split_blocks.pop(key, None)
+            return [(block, block_data(block, result))]
+        if len(block.items) == 1 or (split is None and getattr(result, 'exception_code', None) not in SPLIT_EXCEPTION_CODES):
+            return [(block, None)]
+        retry_at = time.monotonic() + getattr(settings, 'MODBUS_SPLIT_REPROBE_INTERVAL', 600)
+        split = _split_blocks[key] = (block, split[1] if split else split_block(block), retry_at)
+
+    return [(part, await read_block(client, part, slave_id)) for part in split[1]]
@@ -0,0 +1,234 @@
+"""
+DataPoint özet (rollup) tabloları: register ve test seansı başına 1 dakikalık,
+1 saatlik ve 1 günlük dilimlerde min, maks, ortalama, ilk, son ve örnek sayısı.
+
+Özetler, DataPoint satırlarıyla aynı transaction içinde artımlı güncellenir
+(INSERT ... ON CONFLICT DO UPDATE); yani her zaman kaydedilmiş ham verinin
+özetidir. Raporlar ve grafikler istenen aralık için nokta bütçesini
+(ROLLUP_TARGET_POINTS) aşmayan en ince çözünürlüğü seçer: aralık küçükse ham
+veri, büyüdükçe dakikalık, saatlik ve günlük özetler okunur. Böylece 5000
+saatlik bir test, her örnek taranmadan gösterilebilir.
+
+Mevcut veri için özetler `manage.py rebuild_rollups` ile oluşturulur.
+
+Ortalama (sum_value / sample_count) kaydedilen örneklerin ortalamasıdır. Ölü
+bantlı register'larda satır yalnızca değer değiştiğinde (veya kalp atışında)
+yazıldığı için bu ortalama zamana göre ağırlıklı değildir; uzun süre sabit
+kalan değer az, sık değişen değer çok ağırlık alır. Rapor ve grafikler bu
+register'ların ortalamasını "örnek ortalaması" olarak işaretler.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+from .archive import ArchivedDataPoints
+from .models import DataPoint, RegisterRollupDay, RegisterRollupHour, RegisterRollupMinute, TestRun
+from .segments import in_status
+
+# (ad, dilim uzunluğu (saniye), model) — inceden kabaya
+RESOLUTIONS = (
+    ('1m', 60, RegisterRollupMinute),
+    ('1h', 3600, RegisterRollupHour),
+    ('1d', 86400, RegisterRollupDay),
+)
+ROLLUP_MODELS = {name: model for name, _, model in RESOLUTIONS}
+RESOLUTION_SECONDS = {name: seconds for name, seconds, _ in RESOLUTIONS}
+RESOLUTION_LABELS = {None: 'Ham veri', '1m': '1 dakikalık özet', '1h': '1 saatlik özet', '1d': '1 günlük özet'}
+
+ROLLUP_COLUMNS = (
+    'register_id', 'test_run_id', 'bucket', 'sample_count', 'min_value', 'max_value',
+    'sum_value', 'first_value', 'first_timestamp', 'last_value', 'last_timestamp',
+)
+UPSERT_BATCH_SIZE = 500
+
+
+def bucket_start(timestamp, resolution):
+    """Zaman damgasının düştüğü dilimin başlangıcı. Günlük dilimler yerel saat gün başından başlar."""
+    if resolution == '1m':
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == '1h':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timezone.localtime(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RollupAccumulator:
+    """Örnekleri bellekte dilimlere toplar; flush() ile özet tablolarına ekler."""
+
+    def __init__(self):
+        # (çözünürlük, register_id, test_run_id, dilim) -> [sayı, min, maks, toplam, ilk_zaman, ilk, son_zaman, son]
+        self.buckets = {}
+
+    def add(self, register_id, test_run_id, timestamp, value):
+        for resolution, _, _ in RESOLUTIONS:
+            key = (resolution, register_id, test_run_id, bucket_start(timestamp, resolution))
+            entry = self.buckets.get(key)
+            if entry is None:
+                self.buckets[key] = [1, value, value, value, timestamp, value, timestamp, value]
+                continue
+            entry[0] += 1
+            entry[1] = min(entry[1], value)
+            entry[2] = max(entry[2], value)
+            entry[3] += value
+            if timestamp < entry[4]:
+                entry[4], entry[5] = timestamp, value
+            if timestamp >= entry[6]:
+                entry[6], entry[7] = timestamp, value
+
+    def flush(self):
+        """Toplananları tablolara yazar ve belleği boşaltır; yazılan dilim sayısını döndürür."""
+        by_resolution = {}
+        for (resolution, register_id, test_run_id, bucket), entry in self.buckets.items():
+            count, minimum, maximum, total, first_ts, first, last_ts, last = entry
+            by_resolution.setdefault(resolution, []).append(
+                (register_id, test_run_id, bucket, count, minimum, maximum, total, first, first_ts, last, last_ts)
+            )
+        self.buckets = {}
+        for resolution, rows in by_resolution.items():
+            # Aynı sırayla kilitlensin diye (eşzamanlı yazıcılarda kilitlenmeyi önler) sıralanır
+            rows.sort(key=lambda row: (row[0], row[1], row[2]))
+            upsert_rollups(ROLLUP_MODELS[resolution], rows)
+        return sum(len(rows) for rows in by_resolution.values())
+
+
+def upsert_rollups(model, rows):
+    """Dilimleri ekler; dilim zaten varsa mevcut özetle birleştirir."""
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    # PostgreSQL'de LEAST/GREATEST, SQLite'ta çok argümanlı MIN/MAX
+    least, greatest = ('LEAST', 'GREATEST') if connection.vendor == 'postgresql' else ('MIN', 'MAX')
+    t = qn(table)
+    update = (
+        f"sample_count = {t}.sample_count + EXCLUDED.sample_count, "
+        f"min_value = {least}({t}.min_value, EXCLUDED.min_value), "
+        f"max_value = {greatest}({t}.max_value, EXCLUDED.max_value), "
+        f"sum_value = {t}.sum_value + EXCLUDED.sum_value, "
+        f"first_value = CASE WHEN EXCLUDED.first_timestamp < {t}.first_timestamp THEN EXCLUDED.first_value ELSE {t}.first_value END, "
+        f"first_timestamp = {least}({t}.first_timestamp, EXCLUDED.first_timestamp), "
+        f"last_value = CASE WHEN EXCLUDED.last_timestamp >= {t}.last_timestamp THEN EXCLUDED.last_value ELSE {t}.last_value END, "
+        f"last_timestamp = {greatest}({t}.last_timestamp, EXCLUDED.last_timestamp)"
+    )
+    placeholders = '(' + ', '.join(['%s'] * len(ROLLUP_COLUMNS)) + ')'
+    adapt = connection.ops.adapt_datetimefield_value
+
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[offset:offset + UPSERT_BATCH_SIZE]
+            params = []
+            for register_id, test_run_id, bucket, count, minimum, maximum, total, first, first_ts, last, last_ts in batch:
+                params.extend((
+                    register_id, test_run_id, adapt(bucket), count, minimum, maximum,
+                    total, first, adapt(first_ts), last, adapt(last_ts),
+                ))
+            cursor.execute(
+                f"INSERT INTO {t} ({', '.join(ROLLUP_COLUMNS)}) VALUES {', '.join([placeholders] * len(batch))} "
+                f"ON CONFLICT (register_id, test_run_id, bucket) DO UPDATE SET {update}",
+                params,
+            )
+
+
+def update_rollups(rows, test_run_id):
+    """
+    Kaydedilen (register_id, zaman damgası, değer) satırlarını özetlere ekler
+    (DataPoint yazımıyla aynı transaction'da çağrılır).
+    """
+    accumulator = RollupAccumulator()
+    for register_id, timestamp, value in rows:
+        accumulator.add(register_id, test_run_id, timestamp, value)
+    return accumulator.flush()
+
+
+def rebuild_rollups(test_run_ids=None, chunk_size=10000):
+    """
+    Özetleri ham DataPoint satırlarından yeniden oluşturur. `test_run_ids`
+    verilirse yalnızca o test seanslarının özetleri silinip yeniden hesaplanır.
+    İşlenen satır sayısını döndürür.
+    """
+    datapoints = DataPoint.objects.all()
+    for _, _, model in RESOLUTIONS:
+        rollups = model.objects.all()
+        if test_run_ids is not None:
+            rollups = rollups.filter(test_run_id__in=test_run_ids)
+        rollups.delete()
+    if test_run_ids is not None:
+        datapoints = datapoints.filter(test_run_id__in=test_run_ids)
+
+    accumulator = RollupAccumulator()
+    processed = 0
+    rows = datapoints.order_by('test_run_id', 'register_id', 'timestamp').values_list(
+        'register_id', 'test_run_id', 'timestamp', 'value'
+    )
+    for register_id, test_run_id, timestamp, value in rows.iterator(chunk_size=chunk_size):
+        accumulator.add(register_id, test_run_id, timestamp, value)
+        processed += 1
+        if processed % chunk_size == 0:
+            accumulator.flush()
+
+    # Arşivlenmiş seansların ham satırları silinmiştir; örnekler arşiv parçalarından okunur
+    archived_runs = TestRun.objects.filter(archived_at__isnull=False)
+    if test_run_ids is not None:
+        archived_runs = archived_runs.filter(id__in=test_run_ids)
+    for test_run in archived_runs:
+        for timestamp, register_id, value in ArchivedDataPoints(test_run).rows():
+            accumulator.add(register_id, test_run.id, timestamp, value)
+            processed += 1
+            if processed % chunk_size == 0:
+                accumulator.flush()
+    accumulator.flush()
+    return processed
+
+
+def choose_resolution(start, end, raw_count=None, series_count=1, max_points=None):
+    """
+    [start, end] aralığı için nokta bütçesini aşmayan en ince çözünürlüğü seçer.
+    Ham satır sayısı (`raw_count`) bütçeye sığıyorsa None (ham veri) döner;
+    hiçbiri sığmazsa en kaba özet ('1d') kullanılır. `series_count`, aynı anda
+    gösterilen register sayısıdır.
+    """
+    max_points = max_points or getattr(settings, 'ROLLUP_TARGET_POINTS', 5000)
+    if raw_count is not None and raw_count <= max_points:
+        return None
+    span = max((end - start).total_seconds(), 0) if start and end else 0
+    for name, seconds, _ in RESOLUTIONS:
+        if (span / seconds + 1) * series_count <= max_points:
+            return name
+    return RESOLUTIONS[-1][0]
+
+
+def rollup_summary(test_run=None, register_id=None, start=None, end=None):
+    """
+    Günlük özetlerden ucuzca (ham tabloyu taramadan) yaklaşık satır sayısı ve veri
+    aralığını döndürür: (ham satır sayısı, ilk zaman, son zaman).
+    """
+    days = RegisterRollupDay.objects.all()
+    if test_run is not None:
+        days = days.filter(test_run=test_run)
+    if register_id is not None:
+        days = days.filter(register_id=register_id)
+    if start:
+        days = days.filter(last_timestamp__gte=start)
+    if end:
+        days = days.filter(first_timestamp__lte=end)
+    summary = days.aggregate(count=Sum('sample_count'), first=Min('first_timestamp'), last=Max('last_timestamp'))
+    return summary['count'] or 0, summary['first'], summary['last']
+
+
+def rollup_queryset(resolution, test_run=None, register_id=None, status=None, start=None, end=None):
+    """
+    Ham veri sorgusuyla aynı filtreleri (test, register, seans durumu, zaman aralığı)
+    özet tablosuna uygular. Durum filtresinde segmentle kesişen dilimler dahil edilir.
+    """
+    rollups = ROLLUP_MODELS[resolution].objects.all()
+    if test_run is not None:
+        rollups = rollups.filter(test_run=test_run)
+    if register_id:
+        rollups = rollups.filter(register_id=register_id)
+    if status:
+        rollups = rollups.filter(in_status(status, field='bucket', bucket=timedelta(seconds=RESOLUTION_SECONDS[resolution])))
+    if start:
+        rollups = rollups.filter(bucket__gte=bucket_start(start, resolution))
+    if end:
+        rollups = rollups.filter(bucket__lte=end)
+    return rollups
@@ -0,0 +1,168 @@
+"""
+Register çalışma zamanı durumu: son değer, son değişim zamanı ve aktif alarmlar.
+
+Durum Redis'te tek bir hash'te tutulur (alan: register ID, değer: JSON). Süreç
+başlarken tüm hash tek HGETALL ile belleğe alınır; döngü boyunca yalnızca bellek
+kullanılır ve değişen register'lar döngü sonunda tek HSET ile geri yazılır.
+Böylece yeniden başlatmadan veya yeni bir worker eklendikten sonra eşleştirme
+kuralları boş yere tekrar tetiklenmez.
+
+Her yazımda bir sürüm sayacı artırılır. Başka bir süreç (örn. farklı bir Celery
+worker'ı) durumu güncellemişse bir sonraki döngü başında hash yeniden yüklenir.
+Redis erişilemezse durum yalnızca süreç belleğinde tutulur.
+"""
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+STATE_HASH_KEY = 'monitoring:runtime_state'
+STATE_VERSION_KEY = 'monitoring:runtime_state:version'
+
+
+@dataclass
+class RegisterState:
+    value: object = None
+    changed_at: object = None
+    # alarm kuralı ID -> açık AlarmLog ID
+    active_alarms: dict = field(default_factory=dict)
+
+    def to_json(self):
+        return json.dumps({
+            'v': self.value,
+            't': self.changed_at.isoformat() if self.changed_at else None,
+            'a': self.active_alarms,
+        })
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        return cls(
+            value=data.get('v'),
+            changed_at=parse_datetime(data['t']) if data.get('t') else None,
+            active_alarms={int(rule_id): log_id for rule_id, log_id in (data.get('a') or {}).items()},
+        )
+
+
+class RuntimeStateStore:
+    """Register durumlarının süreç içi kopyası; Redis hash'i ile toplu eşitlenir."""
+
+    def __init__(self, redis_url=None):
+        self.redis_url = redis_url
+        self._client = None
+        self._states = {}
+        self._dirty = set()
+        self._version = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            url = self.redis_url or getattr(settings, 'RUNTIME_STATE_REDIS_URL', None)
+            if url:
+                import redis
+                self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        return self._client
+
+    def load(self, open_alarms=None):
+        """
+        Durumu Redis'ten tek seferde yükler. Başka süreç tarafından güncellenmediyse
+        (sürüm aynıysa) hiçbir şey yapmaz. İlk yüklemede aktif alarmlar, veritabanındaki
+        açık alarm kayıtlarından (`open_alarms`: {register_id: {rule_id: log_id}}) alınır.
+        """
+        with self._lock:
+            client = self.client
+            if client is None:
+                if not self._loaded:
+                    self._seed_alarms(open_alarms)
+                    self._loaded = True
+                return
+            try:
+                version = int(client.get(STATE_VERSION_KEY) or 0)
+                if self._loaded and version == self._version:
+                    return
+                raw = client.hgetall(STATE_HASH_KEY)
+            except Exception as e:
+                logger.warning(f"!!! DURUM DEPOSU HATASI: Redis'ten okunamadı, bellekteki durumla devam ediliyor: {e}")
+                if not self._loaded:
+                    self._seed_alarms(open_alarms)
+                    self._loaded = True
+                return
+
+            self._states = {int(register_id): RegisterState.from_json(data) for register_id, data in raw.items()}
+            self._dirty.clear()
+            self._version = version
+            if not self._loaded:
+                self._seed_alarms(open_alarms)
+                self._loaded = True
+                logger.info(f"Çalışma zamanı durumu yüklendi: {len(self._states)} register.")
+
+    def _seed_alarms(self, open_alarms):
+        if open_alarms is None:
+            return
+        # Alarm kayıtları elle kapatılmış/silinmiş olabilir; veritabanı esas alınır
+        for state in self._states.values():
+            state.active_alarms = {}
+        for register_id, alarms in open_alarms.items():
+            self.get(register_id).active_alarms = dict(alarms)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self, register_id):
+        state = self._states.get(register_id)
+        if state is None:
+            state = self._states[register_id] = RegisterState()
+        return state
+
+    def update_value(self, register_id, value, timestamp):
+        """Yeni değeri kaydeder. Değer değiştiyse önceki değeri, değişmediyse (False, None) döndürür."""
+        state = self.get(register_id)
+        if state.value == value and state.changed_at is not None:
+            return False, None
+        previous = state.value
+        state.value = value
+        state.changed_at = timestamp
+        self._dirty.add(register_id)
+        return True, previous
+
+    def set_alarm(self, register_id, rule_id, log_id):
+        self.get(register_id).active_alarms[rule_id] = log_id
+        self._dirty.add(register_id)
+
+    def clear_alarm(self, register_id, rule_id):
+        self.get(register_id).active_alarms.pop(rule_id, None)
+        self._dirty.add(register_id)
+
+    def flush(self):
+        """Döngüde değişen register durumlarını tek HSET ile Redis'e yazar."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            client = self.client
+            dirty = self._dirty
+            self._dirty = set()
+            if client is None:
+                return len(dirty)
+            try:
+                pipe = client.pipeline()
+                pipe.hset(STATE_HASH_KEY, mapping={register_id: self._states[register_id].to_json() for register_id in dirty})
+                pipe.incr(STATE_VERSION_KEY)
+                _, version = pipe.execute()
+                # Arada başka süreç yazmadıysa kendi yazdığımız sürüm yeniden okuma gerektirmez
+                self._version = version if self._version is not None and self._version + 1 == version else None
+            except Exception as e:
+                # Yazılamayanlar bir sonraki döngüde tekrar denenir
+                self._dirty |= dirty
+                logger.warning(f"!!! DURUM DEPOSU HATASI: Redis'e yazılamadı: {e}")
+            return len(dirty)
+
+
+runtime_state = RuntimeStateStore()
@@ -0,0 +1,75 @@
+"""
+Scan sınıfı zamanlayıcısı: register'lar kendi okuma periyotlarına (scan_interval)
+göre gruplanır ve her grup, diğerlerinden bağımsız olarak kendi hızında okunur.
+"""
+import logging
+import time
+
+from .read_planner import plan_device_reads
+
+logger = logging.getLogger(__name__)
+
+
+def plan_scan_groups(registers):
+    """Bir cihazın register'larını scan_interval'a göre ayırır ve her grup için okuma planı çıkarır."""
+    by_interval = {}
+    for register in registers:
+        by_interval.setdefault(register.scan_interval, []).append(register)
+    return {interval: plan_device_reads(group) for interval, group in by_interval.items()}
+
+
+class ScanScheduler:
+    """
+    Her scan sınıfının bir sonraki okuma zamanını monotonic saate göre tutar.
+    `targets`: (device, {scan_interval: blocks}) çiftleri.
+    """
+
+    def __init__(self, targets):
+        self.next_due = {}
+        self.missed_cycles = 0
+        # Son pop_due çağrısında döngünün planlanan zamandan ne kadar geç başladığı
+        # ve zamanı gelen en kısa periyot (döngü taşmasını ölçmek için)
+        self.last_lag = 0.0
+        self.last_interval = None
+        self.update_targets(targets)
+
+    def update_targets(self, targets):
+        """Yapılandırma yeniden yüklendiğinde çağrılır; mevcut sınıfların zamanlaması korunur."""
+        self.targets = targets
+        intervals = {interval for _, groups in targets for interval in groups}
+        now = time.monotonic()
+        self.next_due = {interval: self.next_due.get(interval, now) for interval in intervals}
+
+    def pop_due(self, now=None):
+        """
+        Zamanı gelmiş scan sınıflarının bloklarını cihaz bazında birleştirip döndürür
+        ve bu sınıfların bir sonraki okuma zamanını ilerletir.
+        """
+        now = time.monotonic() if now is None else now
+        due = [interval for interval, next_due in self.next_due.items() if next_due <= now]
+        if due:
+            self.last_lag = now - min(self.next_due[interval] for interval in due)
+            self.last_interval = min(due)
+        for interval in due:
+            # Sabit adımlarla ilerle ki periyot zamanla kaymasın; geride kalındıysa kaçırılanları atla
+            next_due = self.next_due[interval] + interval
+            if next_due <= now:
+                missed = int((now - next_due) // interval) + 1
+                next_due += missed * interval
+                self.missed_cycles += missed
+                logger.warning(f"!!! DÖNGÜ GECİKMESİ: {interval} sn'lik scan sınıfı periyodu aştı, {missed} döngü atlandı.")
+            self.next_due[interval] = next_due
+
+        targets = []
+        for device, groups in self.targets:
+            blocks = [block for interval in due for block in groups.get(interval, [])]
+            if blocks:
+                targets.append((device, blocks))
+        return targets
+
+    def seconds_until_next(self, now=None):
+        """Bir sonraki scan sınıfının zamanı gelene kadar beklenecek süre."""
+        if not self.next_due:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self.next_due.values()) - now)
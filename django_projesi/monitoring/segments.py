@@ -0,0 +1,79 @@
+"""
+Test seansı durum segmentleri ve seans başına register listesi.
+
+Seansın çalıştığı ve duraklatıldığı zaman aralıkları, durum değiştiği anda
+TestRunSegment tablosuna yazılır (record_transition). Raporların durum filtresi
+artık her istekte olay kayıtlarını baştan işleyip aralık başına bir
+`timestamp__range` koşulunu OR'lamaz; tek bir EXISTS (segment başlangıcı <=
+zaman <= segment bitişi) koşuluyla (test_run, status, start_time) indeksi
+üzerinden segment tablosuna join yapar. Sorgunun boyutu duraklatma sayısından
+bağımsızdır.
+
+Seansta verisi olan register'lar, örnekler yazılırken TestRunRegister tablosuna
+eklenir (record_registers); rapor filtrelerindeki register listesi DataPoint
+üzerinde DISTINCT join yerine buradan okunur.
+"""
+from django.db import transaction
+from django.db.models import DateTimeField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils import timezone
+
+from .models import TestRunRegister, TestRunSegment
+
+SEGMENT_STATUSES = ('RUNNING', 'PAUSED')
+
+# Süreç içinde listeye eklendiği bilinen (test_run_id, register_id) çiftleri; her
+# döngüde aynı satırlar için veritabanına gidilmez
+_known_registers = set()
+
+
+def record_transition(test_run, status, at=None):
+    """
+    Seansın durum değişikliğini segmentlere işler: açık segment `at` anında kapanır,
+    yeni durum çalışıyor/duraklatıldı ise o andan başlayan yeni segment açılır.
+    """
+    at = at or timezone.now()
+    with transaction.atomic():
+        TestRunSegment.objects.filter(test_run=test_run, end_time__isnull=True).update(end_time=at)
+        if status in SEGMENT_STATUSES:
+            TestRunSegment.objects.create(test_run=test_run, status=status, start_time=at)
+
+
+def status_time_ranges(test_run, status):
+    """Seansın `status` durumunda geçirdiği (başlangıç, bitiş) aralıkları; süren segment şimdiye kadar sayılır."""
+    now = timezone.now()
+    return [
+        (start_time, end_time or now)
+        for start_time, end_time in test_run.segments.filter(status=status).order_by('start_time').values_list(
+            'start_time', 'end_time'
+        )
+    ]
+
+
+def in_status(status, field='timestamp', test_run_field='test_run', bucket=None):
+    """
+    Satırın zamanı (`field`) seansın `status` durumundaki bir segmentine düşüyorsa
+    doğru olan EXISTS ifadesi; QuerySet.filter() ile kullanılır. `bucket` (timedelta)
+    verilirse satır o uzunlukta bir özet dilimidir ve segmentle kesişmesi yeterlidir.
+    """
+    moment = OuterRef(field)
+    segments = TestRunSegment.objects.filter(test_run=OuterRef(test_run_field), status=status).filter(
+        Q(end_time__isnull=True) | Q(end_time__gte=moment)
+    )
+    if bucket is None:
+        segments = segments.filter(start_time__lte=moment)
+    else:
+        segments = segments.filter(start_time__lt=ExpressionWrapper(moment + bucket, output_field=DateTimeField()))
+    return Exists(segments)
+
+
+def record_registers(test_run_id, register_ids):
+    """Yazılan örneklerin register'larını seansın listesine ekler (DataPoint yazımıyla aynı transaction'da çağrılır)."""
+    missing = {register_id for register_id in register_ids if (test_run_id, register_id) not in _known_registers}
+    if not missing:
+        return
+    TestRunRegister.objects.bulk_create(
+        [TestRunRegister(test_run_id=test_run_id, register_id=register_id) for register_id in sorted(missing)],
+        ignore_conflicts=True,
+    )
+    # Transaction geri alınırsa satırlar yazılmamış olur; önbelleğe ancak commit sonrası eklenir
+    transaction.on_commit(lambda: _known_registers.update((test_run_id, register_id) for register_id in missing))
@@ -0,0 +1,77 @@
+"""
+Seyrek kayıtlardan basamaklı (step-hold) seri oluşturma yardımcıları.
+
+Ölü bandı açık register'larda bir satır yalnızca değer değiştiğinde veya kalp
+atışı süresi dolduğunda yazılır; iki satır arasındaki sürede değer, önceki
+satırdaki değerde sabit kabul edilir. Raporlama ve grafikler seriyi bu
+kurala göre yeniden oluşturur.
+"""
+import heapq
+from datetime import timedelta
+from operator import itemgetter
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .archive import ArchivedDataPoints, archived_value_at
+from .models import DataPoint
+
+
+def value_at(register_id, moment, test_run=None):
+    """
+    Verilen andaki değeri, o andan önceki son kayıttan taşıyarak bulur.
+    (zaman damgası, değer) döndürür; kayıt yoksa None. Arşivlenmiş seanslar dahildir.
+    """
+    datapoints = DataPoint.objects.filter(register_id=register_id, timestamp__lte=moment)
+    if test_run is not None:
+        datapoints = datapoints.filter(test_run=test_run)
+    latest = datapoints.order_by('-timestamp').values_list('timestamp', 'value').first()
+
+    if test_run is None or test_run.archived_at:
+        if isinstance(moment, str):
+            moment = parse_datetime(moment)
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+        archived = archived_value_at(register_id, moment, test_run)
+        if archived and (latest is None or archived[0] > latest[0]):
+            latest = archived
+    return latest
+
+
+def stored_points(register_id, start=None, end=None):
+    """
+    Register'ın kayıtlı (zaman damgası, değer) noktaları; ham tablo ve arşiv birlikte,
+    zaman sırasıyla. `start`/`end` verilirse yalnızca o aralık (sınırlar dahil) okunur.
+    """
+    datapoints = DataPoint.objects.filter(register_id=register_id)
+    if start:
+        datapoints = datapoints.filter(timestamp__gte=start)
+    if end:
+        datapoints = datapoints.filter(timestamp__lte=end)
+    datapoints = datapoints.order_by('timestamp').values_list('timestamp', 'value')
+    archived = (
+        (timestamp, value)
+        for timestamp, _, value in ArchivedDataPoints(register_id=register_id, start=start, end=end).rows()
+    )
+    return heapq.merge(datapoints.iterator(), archived, key=itemgetter(0))
+
+
+def step_hold_series(points, register, start=None, carry_in=None, end=None):
+    """
+    Zamana göre sıralı (zaman damgası, değer) listesini basamaklı seriye tamamlar:
+    - `carry_in` verilirse, aralık başlangıcına o değer taşınır.
+    - Son değer, bir sonraki kaydın en geç gelmesi gereken ana (son kayıt +
+      kalp atışı süresi) kadar, ancak `end`'i geçmeyecek şekilde uzatılır.
+      Bu süreden sonrası için veri yok sayılır (cihaz çevrimdışı olabilir).
+    """
+    series = list(points)
+    if carry_in is not None and start is not None and (not series or series[0][0] > start):
+        series.insert(0, (start, carry_in[1]))
+
+    if series and register.deadband_mode != 'none':
+        end = end or timezone.now()
+        last_timestamp, last_value = series[-1]
+        hold_until = min(end, last_timestamp + timedelta(seconds=register.heartbeat_interval))
+        if hold_until > last_timestamp:
+            series.append((hold_until, last_value))
+    return series
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .config_cache import invalidate_config
+from .models import AlarmRule, Device, EnumValue, Register, RegisterMapping
+
+# Okuma döngüsünün kendisinin güncellediği, yapılandırma sayılmayan Device alanları
+DEVICE_RUNTIME_FIELDS = {'status', 'last_seen', 'circuit_state', 'circuit_retry_at'}
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def device_changed(sender, instance, update_fields=None, **kwargs):
+    """Cihaz yapılandırması değiştiğinde derlenmiş okuma planlarını geçersiz kılar."""
+    # Durum/son görülme/devre kesici güncellemeleri döngü içinde yapılır; planı yeniden derletmemeli
+    if update_fields and set(update_fields) <= DEVICE_RUNTIME_FIELDS:
+        return
+    invalidate_config()
+
+
+@receiver(post_save, sender=Register)
+@receiver(post_delete, sender=Register)
+@receiver(post_save, sender=EnumValue)
+@receiver(post_delete, sender=EnumValue)
+@receiver(post_save, sender=AlarmRule)
+@receiver(post_delete, sender=AlarmRule)
+@receiver(post_save, sender=RegisterMapping)
+@receiver(post_delete, sender=RegisterMapping)
+def register_config_changed(sender, **kwargs):
+    """Register, enum, alarm kuralı veya eşleştirme değiştiğinde okuma planlarını geçersiz kılar."""
+    invalidate_config()
@@ -0,0 +1,200 @@
+"""
+Modbus cihaz filosu simülatörü.
+
+Gerçek PLC olmadan veri toplama performansını ölçmek için 127.0.0.1 üzerinde
+N adet pymodbus TCP sunucusu başlatır. Ağ bağlantısı gerektirmez; tüm sunucular
+tek bir arka plan event loop'unda çalışır. Her istek için gecikme, Modbus hata
+cevabı ve zaman aşımı enjekte edilebilir. "Ölü" cihazların
+portunda sunucu açılmaz, bağlantı reddedilir.
+
+bkz. management/commands/benchmark_acquisition.py
+"""
+import asyncio
+import logging
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+from channels.layers import InMemoryChannelLayer
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+from pymodbus.server import ModbusTcpServer
+
+logger = logging.getLogger(__name__)
+
+# Datastore boyutu (her tip için adres sayısı)
+DATASTORE_SIZE = 10000
+
+# Varsayılan register haritasında sırayla kullanılan register tanımları:
+# (register_type, data_type, başlangıç adresi, word/bit sayısı)
+DEFAULT_REGISTER_PATTERN = (
+    ('holding', 'FLOAT32', 40001, 2),
+    ('holding', 'UINT16', 40001, 1),
+    ('holding', 'INT32', 40001, 2),
+    ('input', 'INT16', 30001, 1),
+    ('coil', 'UINT16', 1, 1),
+    ('discrete_input', 'UINT16', 10001, 1),
+)
+
+
+def generate_register_map(count, gap=0):
+    """
+    Benchmark için `count` register'lık bir harita üretir. Aynı tipteki
+    register'lar arasında `gap` kadar boş adres bırakılır. Dönen her öğe
+    Register modelinin alanlarıyla aynı adları taşıyan bir sözlüktür.
+    """
+    next_address = {}
+    register_map = []
+    for index in range(count):
+        register_type, data_type, base_address, size = DEFAULT_REGISTER_PATTERN[index % len(DEFAULT_REGISTER_PATTERN)]
+        address = next_address.get(register_type, base_address)
+        next_address[register_type] = address + size + gap
+        register_map.append({
+            'name': f'R{index + 1:04d}',
+            'register_type': register_type,
+            'data_type': data_type,
+            'address': address,
+        })
+    return register_map
+
+
+@dataclass
+class FaultProfile:
+    """Her Modbus isteğine uygulanacak gecikme ve hata enjeksiyonu (süreler saniye)."""
+    latency: float = 0.0
+    jitter: float = 0.0
+    # İsteğin Modbus hata cevabı (ILLEGAL_ADDRESS) alma olasılığı
+    error_rate: float = 0.0
+    # İsteğin `timeout_delay` kadar bekletilme (istemcide zaman aşımı) olasılığı
+    timeout_rate: float = 0.0
+    timeout_delay: float = 5.0
+    # Okunan her word/bit'in bu okumada değişme olasılığı
+    change_rate: float = 0.0
+
+
+class SimulatedSlaveContext(ModbusSlaveContext):
+    """Okuma ve yazmalara gecikme, hata ve değer değişimi enjekte eden datastore."""
+
+    def __init__(self, profile, rng):
+        super().__init__(
+            di=ModbusSequentialDataBlock(0, [rng.random() < 0.5 for _ in range(DATASTORE_SIZE + 1)]),
+            co=ModbusSequentialDataBlock(0, [rng.random() < 0.5 for _ in range(DATASTORE_SIZE + 1)]),
+            hr=ModbusSequentialDataBlock(0, [rng.randrange(65536) for _ in range(DATASTORE_SIZE + 1)]),
+            ir=ModbusSequentialDataBlock(0, [rng.randrange(65536) for _ in range(DATASTORE_SIZE + 1)]),
+        )
+        self.profile = profile
+        self.rng = rng
+        self.requests = 0
+
+    def validate(self, fc_as_hex, address, count=1):
+        # Doğrulama başarısız olursa sunucu isteğin fonksiyon koduyla ILLEGAL_ADDRESS
+        # hata cevabı döner (istemci zaman aşımına uğramadan hata alır)
+        if self.profile.error_rate and self.rng.random() < self.profile.error_rate:
+            self.requests += 1
+            return False
+        return super().validate(fc_as_hex, address, count)
+
+    async def _inject_faults(self):
+        self.requests += 1
+        profile = self.profile
+        if profile.timeout_rate and self.rng.random() < profile.timeout_rate:
+            await asyncio.sleep(profile.timeout_delay)
+        elif profile.latency or profile.jitter:
+            await asyncio.sleep(max(0.0, profile.latency + self.rng.uniform(-profile.jitter, profile.jitter)))
+
+    def _mutate(self, fc_as_hex, address, count):
+        store = self.store[self.decode(fc_as_hex)]
+        for offset in range(count):
+            if self.rng.random() < self.profile.change_rate:
+                if fc_as_hex in (1, 2):
+                    value = self.rng.random() < 0.5
+                else:
+                    value = self.rng.randrange(65536)
+                store.setValues(address + 1 + offset, [value])
+
+    async def async_getValues(self, fc_as_hex, address, count=1):
+        await self._inject_faults()
+        if self.profile.change_rate:
+            self._mutate(fc_as_hex, address, count)
+        return self.getValues(fc_as_hex, address, count)
+
+    async def async_setValues(self, fc_as_hex, address, values):
+        await self._inject_faults()
+        self.setValues(fc_as_hex, address, values)
+
+
+class SimulatedFleet:
+    """
+    `device_count` adet simüle cihaz. Son `dead_devices` tanesi için sunucu
+    açılmaz. `ports` listesi cihaz sırasıyla (port, çalışıyor_mu) çiftlerini verir.
+    """
+
+    def __init__(self, device_count, base_port=15020, profile=None, dead_devices=0, host='127.0.0.1', seed=None):
+        self.host = host
+        self.profile = profile or FaultProfile()
+        self.ports = [(base_port + index, index < device_count - dead_devices) for index in range(device_count)]
+        self.rng = random.Random(seed)
+        self.contexts = []
+        self._servers = []
+        self._loop = None
+        self._thread = None
+
+    def start(self, wait=10.0):
+        """Sunucuları arka plan thread'inde başlatır ve hepsi dinlemeye başlayana kadar bekler."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='modbus-simulator', daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_servers(), self._loop).result(timeout=wait)
+
+        deadline = time.monotonic() + wait
+        for port, alive in self.ports:
+            while alive and not self._is_listening(port):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Simülatör sunucusu başlatılamadı: {self.host}:{port}")
+                time.sleep(0.05)
+        logger.info(f"Simülatör başladı: {len(self._servers)} çalışan, {len(self.ports) - len(self._servers)} ölü cihaz.")
+
+    async def _start_servers(self):
+        for port, alive in self.ports:
+            if not alive:
+                continue
+            context = SimulatedSlaveContext(self.profile, random.Random(self.rng.random()))
+            server = ModbusTcpServer(ModbusServerContext(slaves=context, single=True), address=(self.host, port))
+            await server.serve_forever(background=True)
+            self.contexts.append(context)
+            self._servers.append(server)
+
+    def _is_listening(self, port):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            probe.settimeout(0.5)
+            return probe.connect_ex((self.host, port)) == 0
+
+    @property
+    def request_count(self):
+        return sum(context.requests for context in self.contexts)
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            for server in self._servers:
+                await server.shutdown()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=10)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            self._loop = None
+
+
+class CountingChannelLayer(InMemoryChannelLayer):
+    """Gönderilen grup mesajlarını tipine göre sayan bellek içi kanal katmanı (Redis gerektirmez)."""
+
+    counts = {}
+
+    async def group_send(self, group, message):
+        CountingChannelLayer.counts[message['type']] = CountingChannelLayer.counts.get(message['type'], 0) + 1
+        await super().group_send(group, message)
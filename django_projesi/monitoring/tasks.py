@@ -1,41 +1,51 @@
 import logging
 import time
+from datetime import timedelta
+from functools import partial
 from asgiref.sync import async_to_sync
 from celery import shared_task
 from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
-from pymodbus.client import ModbusTcpClient
-from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadDecoder
-from .models import AlarmRule, AlarmLog, RegisterMapping
+from .models import AlarmLog
+from .archive import archivable_test_runs, archive_test_run
+from .async_poller import poll_devices
+from .circuit_breaker import OPEN, circuit_breakers
+from .config_cache import config_cache
+from .cycle_guard import record_cycle, record_skipped_cycle, single_flight
+from .deferred_writes import deferred_writer
+from .ingestion import CycleBatch, Sample
+from .mapping_engine import mapped_value, plan_mapping_writes
+from .partitioning import detach_partitions, ensure_partitions
+from .read_planner import get_pdu_address
+from .runtime_state import runtime_state
+from .write_queue import WRITABLE_REGISTER_TYPES, write_queue
 
 # Yeni modellerimizi import ediyoruz
-from .models import DataPoint, Device, Register, TestRun, ScheduledTask
+from .models import Register, TestRun, ScheduledTask
 
 logger = logging.getLogger(__name__)
-last_known_values = {} # YENİ SATIR eşleşme coili için değer tanımladık.
 
 # --- YARDIMCI FONKSİYONLAR ---
 
-def send_device_status(device_id, status):
-    """Cihaz durumunu WebSocket kanalına gönderir."""
+def send_device_statuses(changes):
+    """Bir döngüdeki tüm cihaz durum değişikliklerini tek mesajla WebSocket kanalına gönderir."""
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
         'live_data_group',
-        {'type': 'send_device_status', 'data': {'device_id': device_id, 'status': status}}
+        {'type': 'send_device_statuses', 'data': changes}
     )
 
 
 
 
-def get_pdu_address(register):
-    # Bu fonksiyon doğru, aynı kalıyor
-    addr = register.address
-    if register.register_type == 'coil' and 1 <= addr < 10000: return addr - 1
-    if register.register_type == 'discrete_input' and 10001 <= addr < 20000: return addr - 10001
-    if register.register_type == 'input' and 30001 <= addr < 40000: return addr - 30001
-    if register.register_type == 'holding' and 40001 <= addr < 50000: return addr - 40001
-    return addr
+def flush_device_statuses(devices):
+    """Döngünün cihaz güncellemelerini yazar ve durum değişikliklerini yayınlar."""
+    status_changes = devices.flush()
+    if status_changes:
+        send_device_statuses(status_changes)
+
 
 def send_websocket_message(msg_type, data):
     """WebSocket kanalına belirli bir formatta mesaj gönderir."""
@@ -47,239 +57,340 @@ def send_websocket_message(msg_type, data):
 
 # --- CELERY GÖREVLERİ ---
 
-@shared_task
-def read_modbus_data():
-    """Aktif bir test seansı varsa, tüm cihazları ve register'ları okur."""
+def load_acquisition_targets():
+    """
+    Aktif cihazların derlenmiş okuma planlarını önbellekten döndürür.
+    Dönen değer: (device, {scan_interval: [ReadBlock, ...]}) çiftleri. Yapılandırma
+    değişmediği sürece aynı liste nesnesi döner ve hiç sorgu yapılmaz.
+    """
+    return config_cache.get_plans()
+
+
+def run_acquisition_cycle(targets, lag=0.0, interval=None, missed_cycles=0):
+    """
+    Tek bir okuma döngüsü çalıştırır. Aktif test seansı yoksa None, varsa döngü süresini döndürür.
+    Hem Celery görevi hem de run_acquisition servisi bu fonksiyonu single_flight kilidiyle çağırır.
+    """
+    started = time.monotonic()
     active_test_run = TestRun.objects.filter(status__in=['RUNNING', 'PAUSED']).first()
     if not active_test_run:
-        return "Çalışan veya duraklatılmış test seansı bulunamadı. Veri okunmuyor."
+        return None
+
+    # Son değerler ve aktif alarmlar: ilk döngüde toplu yüklenir, başka süreç yazdıysa tazelenir
+    load_runtime_state()
+
+    # Devresi açık (bağlantı hatası nedeniyle askıya alınmış) cihazlar bu döngüde okunmaz
+    targets = [(device, blocks) for device, blocks in targets if circuit_breakers.allow(device)]
+
+    # Modbus I/O tüm cihazlar için aynı anda yapılır, sonuçlar burada sırayla işlenir
+    results, cycle_time = poll_devices(targets)
+    batch = CycleBatch(active_test_run)
+    for result in results:
+        handle_device_result(result, batch)
+
+    # Cihaz son görülme/durum güncellemeleri toplu yazılır, değişiklikler tek mesajla yayınlanır
+    # (yazma tamponu açıksa arka planda, bkz. deferred_writes.py)
+    deferred_writer.submit(partial(flush_device_statuses, batch.devices))
+
+    # Döngünün tüm örnekleri tek seferde yazılır; alarm ve eşleştirmeler de aynı partiyi kullanır
+    written = batch.write_datapoints()
+    check_and_update_alarms(batch.numeric_samples)
+    run_register_mappings(batch.samples)
+    runtime_state.flush()
+
+    duration = time.monotonic() - started
+    record_cycle(duration, lag=lag, interval=interval, missed_cycles=missed_cycles)
+    logger.info(
+        f"Okuma döngüsü tamamlandı: {len(results)} cihaz, {written} kayıt, "
+        f"Modbus {cycle_time:.2f} sn, toplam {duration:.2f} sn, gecikme {lag:.2f} sn."
+    )
+    return duration
 
-    active_devices = Device.objects.filter(is_active=True)
-    for device in active_devices:
-        client = None
-        try:
-            client = ModbusTcpClient(device.connection_host, port=device.port, timeout=2)
-            if not client.connect():
-                if device.status == 'online':
-                    device.status = 'offline'
-                    device.save(update_fields=['status'])
-                    send_device_status(device.id, 'offline')
-                logger.warning(f"!!! BAĞLANTI HATASI: {device.name} cihazına bağlanılamadı.")
-                continue
-            
-            if device.status == 'offline':
-                device.status = 'online'
-                device.save(update_fields=['status'])
-                send_device_status(device.id, 'online')
-
-            device.last_seen = timezone.now()
-            device.save(update_fields=['last_seen'])
-
-            for register in device.registers.all():
-                try:
-                    pdu_address = get_pdu_address(register)
-                    value = None
-                    result = None
-                    
-                    # --- BU BLOK TAMAMEN YENİLENİYOR ---
-                    if register.register_type in ['holding', 'input']:
-                        # Adım 1: Okunacak register sayısını belirle
-                        if register.data_type in ['FLOAT32', 'INT32', 'UINT32']:
-                            count = 2
-                        elif register.data_type == 'STRING':
-                            count = register.string_length
-                        else:
-                            count = 1
-                        
-                        # Adım 2: Veriyi oku
-                        if register.register_type == 'holding':
-                            result = client.read_holding_registers(address=pdu_address, count=count, slave=device.slave_id)
-                        else:
-                            result = client.read_input_registers(address=pdu_address, count=count, slave=device.slave_id)
-                        
-                        # Adım 3: Gelen veriyi çöz
-                        if not result.isError():
-                            # NOT: Bu kısım hala eski BinaryPayloadDecoder kullanıyor. 
-                            # Önce çalışmasını sağlıyoruz, sonra modernize edeceğiz.
-                            byteorder = Endian.BIG if register.byte_order == 'BIG' else Endian.LITTLE
-                            wordorder = Endian.BIG if register.byte_order == 'BIG' else Endian.LITTLE
-                            decoder = BinaryPayloadDecoder.fromRegisters(result.registers, byteorder=byteorder, wordorder=wordorder)
-                            
-                            # Yeni veri tiplerini de içeren if/elif bloğu
-                            if register.data_type == 'STRING':
-                                value = decoder.decode_string(count * 2).rstrip(b'\x00').decode('utf-8', 'ignore')
-                            elif register.data_type == 'UINT16': value = decoder.decode_16bit_uint()
-                            elif register.data_type == 'INT16': value = decoder.decode_16bit_int()
-                            elif register.data_type == 'UINT32': value = decoder.decode_32bit_uint()
-                            elif register.data_type == 'INT32': value = decoder.decode_32bit_int()
-                            elif register.data_type == 'FLOAT32': value = decoder.decode_32bit_float()
-
-                    elif register.register_type in ['coil', 'discrete_input']:
-                        if register.register_type == 'coil':
-                            result = client.read_coils(address=pdu_address, count=1, slave=device.slave_id)
-                        else:
-                            result = client.read_discrete_inputs(address=pdu_address, count=1, slave=device.slave_id)
-                        
-                        if not result.isError() and result.bits:
-                            value = float(result.bits[0])
-                    
-                    # --- GÜNCELLEME BİTİŞİ ---
-
-                    
-
-                    if value is not None:
-                        # Değeri işle (tersleme ve çarpan)
-                        processed_value = value
-                        is_string = isinstance(processed_value, str)
-
-                        if not is_string:
-                            if register.register_type in ['coil', 'discrete_input'] and register.invert_value:
-                                processed_value = 1.0 - value
-                            processed_value = processed_value * register.scaling_factor
-
-                        # --- YENİ ENUM KONTROLÜ ---
-                        display_label = None
-                        if register.display_preference == 'enum' and not is_string:
-                            try:
-                                # Not: veritabanı sorgusunu azaltmak için bu bilgi önbelleğe alınabilir
-                                enum_match = register.enum_values.filter(raw_value=int(processed_value)).first()
-                                if enum_match:
-                                    display_label = enum_match.label
-                            except (ValueError, TypeError):
-                                pass # Değer sayıya çevrilemezse yoksay
-                        # --- BİTİŞ ---
-                        
-                    
-                        # Veritabanına kaydet ve WebSocket'e gönder
-                        if active_test_run:
-                            # String değerleri kaydetmiyoruz, sadece sayısal olanları
-                            if not is_string:
-                                DataPoint.objects.create(register=register, value=processed_value, test_run=active_test_run)
-
-                        send_websocket_message('send_live_data', {
-                            'register_id': register.id, 
-                            'value': processed_value, 
-                            'timestamp': timezone.now().isoformat(),
-                            'label': display_label # Metin etiketini de ekliyoruz
-                        })
-                        # --- YENİ EKLENEN ALARM KONTROLÜ ---
-                        check_and_update_alarms(register, processed_value)
-                        # --- BİTİŞ ---
-                        # Register'ın ID'sini bir anahtar olarak kullanalım
-                        register_key = str(register.id)
-                        # Bu register'ın değeri gerçekten değişti mi?
-                        # Önceki değeri al, eğer yoksa mevcut değerden farklı bir şey varsay
-                        previous_value = last_known_values.get(register_key, None)
-
-                        # Sadece değer değişmişse tetikleme yap
-                        if processed_value != previous_value:
-                            # Yeni değeri hafızaya al
-                            last_known_values[register_key] = processed_value
-
-                            # Eşleştirme kurallarını bul ve çalıştır
-                            mappings = RegisterMapping.objects.filter(source_register=register, is_active=True)
-                            if mappings.exists():
-                                logger.info(f"==> DEĞİŞİKLİK TESPİT EDİLDİ: '{register.name}' değeri {previous_value}'dan {processed_value}'a değişti. {mappings.count()} kural çalıştırılıyor.")
-                                for mapping in mappings:
-                                    write_coil_value.delay(
-                                        register_id=mapping.destination_register.id, 
-                                        value=processed_value
-                                    )
-                        # --- BİTİŞ ---
-
-                except Exception as e:
-                    if device.status == 'online':
-                        device.status = 'offline'
-                        device.save(update_fields=['status'])
-                        send_device_status(device.id, 'offline')
-                    logger.error(f"!!! GENEL HATA: {device.name} işlenirken hata oluştu: {e}")
-
-        
-        finally:
-            if client and client.is_socket_open():
-                client.close()
-        time.sleep(0.5)
-
-
-
-def check_and_update_alarms(register, current_value):
-    """Bir register için tanımlı alarmları kontrol eder ve logları günceller."""
-    for rule in register.alarm_rules.filter(is_active=True):
-        # Mevcut aktif (henüz bitmemiş) bir alarm var mı?
-        active_log = AlarmLog.objects.filter(alarm_rule=rule, end_time__isnull=True).first()
-
-        # Kural ihlal ediliyor mu?
-        is_violated = False
-        if rule.condition == 'gt' and current_value > rule.threshold: is_violated = True
-        elif rule.condition == 'lt' and current_value < rule.threshold: is_violated = True
-        elif rule.condition == 'eq' and current_value == rule.threshold: is_violated = True
-
-        if is_violated:
-            if not active_log:
-                new_log = AlarmLog.objects.create(alarm_rule=rule, status='ACTIVE_UNACK')
-                logger.warning(f"!!! YENİ ALARM ({rule.get_severity_display()}): {rule.name} !!!")
-                send_websocket_message('send_alarm_update', {
-                    'log_id': new_log.id, 'rule_name': rule.name,
-                    'severity': rule.severity, 'status': new_log.status
-                })
-        else:
-            if active_log:
-                active_log.end_time = timezone.now()
-                # DÜZELTME: Alarm aktifken onaylandıysa bile, normale döndüğünde tekrar onay bekle
-                if active_log.status in ['ACTIVE_UNACK', 'ACTIVE_ACK']:
-                    active_log.status = 'CLEARED_UNACK'
-                active_log.save()
-                logger.info(f"--- ALARM NORMALE DÖNDÜ: {rule.name} ---")
-                send_websocket_message('send_alarm_update', {
-                    'log_id': active_log.id, 'status': active_log.status, 'cleared': True
-                })
 
+def run_single_flight_cycle(targets, **cycle_info):
+    """
+    Başka bir okuma döngüsü çalışmıyorsa döngüyü çalıştırır; çalışıyorsa bu tetiklemeyi
+    atlar ve sayar. (çalıştırıldı mı, run_acquisition_cycle sonucu) döndürür.
+    """
+    with single_flight() as acquired:
+        if not acquired:
+            skipped = record_skipped_cycle()
+            logger.warning(f"!!! DÖNGÜ ATLANDI: Önceki okuma döngüsü hâlâ çalışıyor (toplam atlanan: {skipped}).")
+            return False, None
+        return True, run_acquisition_cycle(targets, **cycle_info)
 
 
+def load_runtime_state():
+    """Çalışma zamanı durumunu yükler; ilk yüklemede açık alarmlar veritabanından alınır."""
+    open_alarms = None
+    if not runtime_state.loaded:
+        open_alarms = {}
+        open_logs = AlarmLog.objects.filter(end_time__isnull=True).values_list('id', 'alarm_rule_id', 'alarm_rule__register_id')
+        for log_id, rule_id, register_id in open_logs:
+            open_alarms.setdefault(register_id, {})[rule_id] = log_id
+    runtime_state.load(open_alarms)
 
 
+@shared_task
+def read_modbus_data():
+    """Aktif bir test seansı varsa, tüm cihazları eşzamanlı okur ve sonuçları işler."""
+    # Tek seferlik çalıştırmada scan sınıfı ayrımı yapılmaz, tüm bloklar okunur
+    targets = [
+        (device, [block for blocks in groups.values() for block in blocks])
+        for device, groups in load_acquisition_targets()
+    ]
+    executed, cycle_time = run_single_flight_cycle(targets)
+    if not executed:
+        return "Önceki okuma döngüsü hâlâ çalışıyor. Bu tetikleme atlandı."
+    if cycle_time is None:
+        return "Çalışan veya duraklatılmış test seansı bulunamadı. Veri okunmuyor."
+    return f"Okuma döngüsü {cycle_time:.2f} sn içinde tamamlandı."
 
 
-@shared_task
-def write_coil_value(register_id, value):
-    """Belirli bir coil register'ına değer (True/False) yazar ve durumu yayınlar."""
-    try:
-        register = Register.objects.get(id=register_id, register_type='coil', is_writable=True)
-        device = register.device
+def set_circuit_state(device, state, devices):
+    """Devre kesici durumunu ve (açıksa) sonraki deneme zamanını döngünün cihaz güncellemelerine ekler."""
+    devices.set_circuit_state(device, state, circuit_breakers.retry_time(device))
 
-        client = ModbusTcpClient(device.connection_host, port=device.port, timeout=3)
-        client.connect()
 
-        pdu_address = get_pdu_address(register)
+def record_device_failure(device, devices):
+    """
+    Bağlantı hatasını devre kesiciye bildirir. Cihaz tek bir hatada değil, devre
+    açıldığında çevrimdışı sayılır; böylece durum mesajları gidip gelmez.
+    """
+    state = circuit_breakers.record_failure(device)
+    set_circuit_state(device, state, devices)
+    if state == OPEN:
+        devices.set_status(device, 'offline')
 
-        logger.info(f"--> YAZILIYOR: Register '{register.name}' (PDU: {pdu_address}) < Değer: {value}")
-        client.write_coil(address=pdu_address, value=bool(value), slave=device.slave_id)
-        client.close()
 
-        logger.info(f"BAŞARILI: '{register.name}' için değer {value} olarak yazıldı.")
+def handle_device_result(result, batch):
+    """Bir cihazın okuma sonucunu işler: durum, son görülme ve register değerleri partiye eklenir."""
+    device = result.device
+    if not result.connected:
+        logger.warning(f"!!! BAĞLANTI HATASI: {device.name} cihazına bağlanılamadı.")
+        record_device_failure(device, batch.devices)
+        return
+
+    # Son görülme zamanı döngü sonunda tüm cihazlar için tek UPDATE ile yazılır
+    batch.devices.mark_seen(device)
 
-        # --- YENİ EKLENEN BÖLÜM ---
+    for block, data in result.blocks:
+        if data is None:
+            logger.warning(f"!!! OKUMA HATASI: {device.name} / {block.register_type} {block.start}-{block.end - 1} bloğu okunamadı.")
+            continue
+        try:
+            # Bloktaki tüm register'lar önceden derlenmiş çözücüyle tek seferde çözülür
+            for register, value in block.decode(data):
+                batch.add(process_register_value(register, value, result.timestamp))
+        except Exception as e:
+            logger.error(f"!!! GENEL HATA: {device.name} işlenirken hata oluştu: {e}")
+
+    if result.error:
+        # Okuma yarıda kesildi (zaman aşımı, kopan soket); bağlantı hatası sayılır
+        logger.error(f"!!! GENEL HATA: {device.name} işlenirken hata oluştu: {result.error}")
+        record_device_failure(device, batch.devices)
+        return
+
+    set_circuit_state(device, circuit_breakers.record_success(device), batch.devices)
+    batch.devices.set_status(device, 'online')
+
+
+def process_register_value(register, processed_value, timestamp):
+    """
+    Çözülmüş bir değeri (tersleme ve çarpan çözücüde uygulanmış olarak) işler:
+    enum etiketini bulur, WebSocket'e gönderir ve bir Sample döndürür.
+    """
+    is_string = isinstance(processed_value, str)
+
+    # --- YENİ ENUM KONTROLÜ ---
+    display_label = None
+    if register.display_preference == 'enum' and not is_string:
+        try:
+            # Enum eşleşmeleri derlenmiş yapılandırmada hazır bekliyor, sorgu yapılmaz
+            display_label = register.enum_map.get(int(processed_value))
+        except (ValueError, TypeError):
+            pass # Değer sayıya çevrilemezse yoksay
+    # --- BİTİŞ ---
+
+    send_websocket_message('send_live_data', {
+        'register_id': register.id, 
+        'value': processed_value, 
+        'timestamp': timestamp.isoformat(),
+        'label': display_label # Metin etiketini de ekliyoruz
+    })
+    return Sample(register=register, value=processed_value, timestamp=timestamp, label=display_label)
+
+
+def run_register_mappings(samples):
+    """
+    Değeri değişen register'lar için eşleştirme kurallarını çalıştırır. Hedef
+    yazmaları döngü içinde, okuma motorunun açık bağlantıları üzerinden yapılır.
+    """
+    changes = []
+    for sample in samples:
+        # Önceki değer paylaşılan durum deposunda; yeniden başlatmadan sonra da korunur
+        is_changed, previous_value = runtime_state.update_value(sample.register.id, sample.value, sample.timestamp)
+        # Sadece değer değişmişse tetikleme yap
+        if is_changed and sample.register.mapping_destination_ids:
+            logger.info(f"==> DEĞİŞİKLİK TESPİT EDİLDİ: '{sample.register.name}' değeri {previous_value}'dan {sample.value}'a değişti.")
+            changes.append((sample.register.id, sample.value))
+    if not changes:
+        return
+
+    # Kaynak -> hedefler grafı yapılandırmayla birlikte derlendi; zincirleme kurallar da burada çözülür
+    graph = config_cache.get_mapping_graph()
+    writes = []
+    for destination, value in plan_mapping_writes(graph, changes).values():
+        device = graph.devices[destination.device_id]
+        if circuit_breakers.is_open(device):
+            logger.warning(f"!!! EŞLEŞTİRME ATLANDI: '{destination.name}' yazılamadı, {device.name} cihazının devresi açık.")
+            continue
+        writes.append((device, destination, value))
+    if not writes:
+        return
+    logger.info(f"==> {len(writes)} eşleştirme yazması çalıştırılıyor.")
+
+    timestamp = timezone.now()
+    results = write_register_values(writes, coalesce=False)
+    for device, destination, value in writes:
+        if results[destination.id] is None:
+            # Hedefin yeni değeri biliniyor; bir sonraki okumada boş yere yeniden tetiklenmesin
+            runtime_state.update_value(destination.id, mapped_value(destination, value), timestamp)
+
+
+
+def check_and_update_alarms(samples):
+    """
+    Döngüdeki örnekler için tanımlı alarmları kontrol eder. Açılan ve normale dönen
+    alarmların kayıtları döngü başına tek iş olarak yazılır (yazma tamponu açıksa
+    arka planda, bkz. deferred_writes.py).
+    """
+    # Kurallar derlenmiş yapılandırmadan, aktif alarmlar durum deposundan gelir;
+    # kararlı durumda (yeni veya biten alarm yokken) hiç sorgu yapılmaz
+    opened = []
+    cleared = []
+    for sample in samples:
+        current_value = sample.value
+        register = sample.register
+        if not register.alarm_rules:
+            continue
+        active_alarms = runtime_state.get(register.id).active_alarms
+        for rule in register.alarm_rules:
+            # Kural ihlal ediliyor mu?
+            is_violated = False
+            if rule.condition == 'gt' and current_value > rule.threshold: is_violated = True
+            elif rule.condition == 'lt' and current_value < rule.threshold: is_violated = True
+            elif rule.condition == 'eq' and current_value == rule.threshold: is_violated = True
+
+            if is_violated:
+                # Mevcut aktif (henüz bitmemiş) bir alarm yoksa yenisini aç
+                if rule.id not in active_alarms:
+                    # Kaydın ID'si yazımdan sonra belli olur; kapanışta kural üzerinden bulunur
+                    runtime_state.set_alarm(register.id, rule.id, None)
+                    opened.append((sample, rule))
+            elif rule.id in active_alarms:
+                cleared.append((sample, rule, active_alarms[rule.id]))
+                runtime_state.clear_alarm(register.id, rule.id)
+
+    if opened or cleared:
+        deferred_writer.submit(partial(write_alarm_logs, opened, cleared))
+
+
+def write_alarm_logs(opened, cleared):
+    """Yeni alarmların kayıtlarını açar, normale dönenleri kapatır ve değişiklikleri yayınlar."""
+    for sample, rule in opened:
+        new_log = AlarmLog.objects.create(alarm_rule_id=rule.id, status='ACTIVE_UNACK')
+        # Yazım ertelenmiş olabilir; başlangıç, alarmı tetikleyen örneğin zamanıdır
+        AlarmLog.objects.filter(pk=new_log.pk).update(start_time=sample.timestamp)
+        logger.warning(f"!!! YENİ ALARM ({rule.severity_display}): {rule.name} !!!")
+        send_websocket_message('send_alarm_update', {
+            'log_id': new_log.id, 'rule_name': rule.name,
+            'severity': rule.severity, 'status': new_log.status
+        })
+
+    if not cleared:
+        return
+    # Normale dönen alarmların kayıtları tek sorguyla alınır; ID'si bilinmeyenler kuralın açık kaydıdır
+    open_logs = AlarmLog.objects.filter(
+        Q(id__in=[log_id for _, _, log_id in cleared if log_id is not None])
+        | Q(alarm_rule_id__in=[rule.id for _, rule, log_id in cleared if log_id is None], end_time__isnull=True)
+    )
+    active_logs = {log.id: log for log in open_logs}
+    logs_by_rule = {log.alarm_rule_id: log for log in active_logs.values() if log.end_time is None}
+    for sample, rule, log_id in cleared:
+        active_log = active_logs.get(log_id) if log_id is not None else logs_by_rule.get(rule.id)
+        if active_log is None:
+            continue
+        active_log.end_time = sample.timestamp
+        # DÜZELTME: Alarm aktifken onaylandıysa bile, normale döndüğünde tekrar onay bekle
+        if active_log.status in ['ACTIVE_UNACK', 'ACTIVE_ACK']:
+            active_log.status = 'CLEARED_UNACK'
+        active_log.save()
+        logger.info(f"--- ALARM NORMALE DÖNDÜ: {rule.name} ---")
+        send_websocket_message('send_alarm_update', {
+            'log_id': active_log.id, 'status': active_log.status, 'cleared': True
+        })
+
+
+
+
+
+
+
+def write_register_values(writes, coalesce=True):
+    """
+    (cihaz, register, değer) üçlülerini cihazların yazma kuyruğuna ekler ve sonuçları
+    bekler. Aynı cihaza giden yazmalar tek seferde, bitişik adresler tek istekte
+    gönderilir. Başarılı yazmalar arayüze hemen bildirilir.
+    {register_id: hata mesajı veya None} döndürür.
+    """
+    futures = zip(writes, write_queue.submit_many(writes, coalesce))
+    timeout = getattr(settings, 'MODBUS_WRITE_TIMEOUT', 10)
+    results = {}
+    for (_, register, value), future in futures:
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            logger.error(f"!!! YAZMA HATASI: Register '{register.name}' yazılamadı. Hata: {e}")
+            results[register.id] = str(e) or e.__class__.__name__
+            continue
+        logger.info(f"BAŞARILI: '{register.name}' için değer {value} olarak yazıldı.")
+        results[register.id] = None
         # Yazma işlemi başarılı olduğuna göre, bu yeni durumu hemen arayüze bildir.
         # Sahte bir DataPoint gibi davranarak anlık güncelleme yapıyoruz.
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            'live_data_group',
-            {
-                'type': 'send_live_data',
-                'data': {
-                    'register_id': register_id,
-                    'value': float(value), # True/False değerini 1.0/0.0'a çevir
-                    'timestamp': timezone.now().isoformat() # O anki zamanı kullan
-                }
-            }
+        # STRING register'larda metin olduğu gibi gider; True/False ve sayılar 1.0/0.0 gibi sayıya çevrilir
+        live_value = value if register.data_type == 'STRING' else float(value)
+        send_websocket_message('send_live_data', {
+            'register_id': register.id,
+            'value': live_value,
+            'timestamp': timezone.now().isoformat() # O anki zamanı kullan
+        })
+    return results
+
+
+@shared_task
+def write_register_value(register_id, value, register_types=WRITABLE_REGISTER_TYPES):
+    """Yazılabilir bir coil veya holding register'a değer yazar ve durumu yayınlar."""
+    try:
+        register = Register.objects.select_related('device').get(
+            id=register_id, register_type__in=register_types, is_writable=True
         )
-        # --- BİTİŞ ---
+    except Register.DoesNotExist:
+        message = f"Register ID {register_id} bulunamadı veya yazılabilir değil."
+        logger.error(f"!!! YAZMA HATASI: {message}")
+        return {"status": "error", "message": message}
 
-        return {"status": "success", "message": f"Value written to {register.name}."}
+    logger.info(f"--> YAZILIYOR: Register '{register.name}' (PDU: {get_pdu_address(register)}) < Değer: {value}")
+    error = write_register_values([(register.device, register, value)])[register.id]
+    if error:
+        return {"status": "error", "message": error}
+    return {"status": "success", "message": f"Value written to {register.name}."}
 
-    except Exception as e:
-        logger.error(f"!!! YAZMA HATASI: Register ID {register_id} yazılamadı. Hata: {e}")
-        return {"status": "error", "message": str(e)}
+
+@shared_task
+def write_coil_value(register_id, value):
+    """Belirli bir coil register'ına değer (True/False) yazar ve durumu yayınlar."""
+    return write_register_value(register_id, bool(value), register_types=('coil',))
 
 
 
@@ -291,24 +402,58 @@ def check_scheduled_tasks():
     now_local = timezone.localtime(timezone.now())
 
     # O anki saate ve dakikaya uyan tüm aktif görevleri bul
-    tasks_to_run = ScheduledTask.objects.filter(
+    tasks_to_run = list(ScheduledTask.objects.filter(
         is_active=True,
+        register__register_type='coil',
+        register__is_writable=True,
         time_to_run__hour=now_local.hour,
         time_to_run__minute=now_local.minute
-    )
+    ).select_related('register__device'))
 
     if not tasks_to_run:
         # Bu mesajı loglarda görüyorsanız, o dakika için bir görev yok demektir.
         return "Zamanı gelmiş bir görev bulunamadı."
 
-    logger.info(f"--- {tasks_to_run.count()} adet otomasyon görevi çalıştırılıyor ---")
+    logger.info(f"--- {len(tasks_to_run)} adet otomasyon görevi çalıştırılıyor ---")
+    writes = []
     for task in tasks_to_run:
         # Herhangi bir test durumu kontrolü yapmıyoruz. Görev her zaman çalışır.
         logger.info(f"Otomasyon: {task}")
-        # İlgili coil'e AÇ/KAPAT komutunu gönder
-        write_coil_value.delay(register_id=task.register.id, value=task.action)
+        # İlgili coil'e AÇ/KAPAT komutu; aynı cihazdaki komutlar birlikte gönderilir
+        writes.append((task.register.device, task.register, bool(task.action)))
+    errors = [error for error in write_register_values(writes).values() if error]
+
+    return f"{len(tasks_to_run)} adet görev tetiklendi, {len(errors)} yazma başarısız."
+
 
-    return f"{tasks_to_run.count()} adet görev başarıyla tetiklendi."
+    
 
 
-    
\ No newline at end of file
+
+@shared_task
+def maintain_datapoint_partitions():
+    """Günlük olarak ileriye dönük DataPoint bölümlerini açar; saklama süresi tanımlıysa eski bölümleri ayırır."""
+    created = ensure_partitions()
+    retention_days = getattr(settings, 'DATAPOINT_PARTITION_RETENTION_DAYS', None)
+    detached = []
+    if retention_days is not None:
+        detached = detach_partitions(timezone.now() - timedelta(days=retention_days))
+    return f"{len(created)} bölüm oluşturuldu, {len(detached)} bölüm ayrıldı."
+
+
+@shared_task
+def archive_finished_test_runs():
+    """Bitişinin üzerinden ARCHIVE_AFTER_DAYS gün geçmiş test seanslarını sıkıştırılmış arşive taşır."""
+    archive_after_days = getattr(settings, 'ARCHIVE_AFTER_DAYS', None)
+    if archive_after_days is None:
+        return "Otomatik arşivleme kapalı."
+    archived = []
+    failed = 0
+    for test_run in archivable_test_runs(archive_after_days):
+        # Bir seansın hatası diğerlerinin arşivlenmesini engellemez; seans bir sonraki turda yeniden denenir
+        try:
+            archived.append(archive_test_run(test_run))
+        except Exception as e:
+            failed += 1
+            logger.exception(f"!!! ARŞİVLEME HATASI: '{test_run.test_name}' (ID {test_run.id}) arşivlenemedi: {e}")
+    return f"{len(archived)} seans arşivlendi, {sum(r.rows for r in archived)} satır taşındı, {failed} seans başarısız."
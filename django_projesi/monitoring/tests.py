@@ -1,3 +1,229 @@
-from django.test import TestCase
+import math
+import random
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import MappingProxyType, SimpleNamespace
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from .archive import ArchivedDataPoints, _build_chunk, archive_test_run, decode_samples, encode_samples, restore_test_run
+from .mapping_engine import MappingGraph, mapped_value, plan_mapping_writes
+from .models import DataPoint, DataPointArchiveChunk, Device, Register, TestRun
+from .segments import in_status, status_time_ranges
+
+BASE_TIME = datetime(2025, 1, 6, 8, 0, tzinfo=dt_timezone.utc)
+
+
+def float_bits(value):
+    """-0.0 ile 0.0'ı ve NaN'ı ayırt edebilmek için değerler bit düzeyinde karşılaştırılır."""
+    return struct.unpack('>Q', struct.pack('>d', value))[0]
+
+
+class SampleEncodingTests(TestCase):
+    """encode_samples / decode_samples gidiş-dönüşü."""
+
+    def assertRoundTrip(self, samples):
+        decoded = decode_samples(encode_samples(samples), len(samples))
+        self.assertEqual([timestamp for timestamp, _ in decoded], [timestamp for timestamp, _ in samples])
+        self.assertEqual([float_bits(value) for _, value in decoded], [float_bits(value) for _, value in samples])
+
+    def test_empty_and_single_sample(self):
+        self.assertEqual(decode_samples(encode_samples([]), 0), [])
+        self.assertRoundTrip([(BASE_TIME, 21.5)])
+
+    def test_regular_period_with_jitter(self):
+        rng = random.Random(1)
+        samples = []
+        timestamp = BASE_TIME
+        for _ in range(500):
+            timestamp += timedelta(seconds=1, microseconds=rng.randint(-3000, 3000))
+            samples.append((timestamp, round(20 + rng.random() * 5, 2)))
+        self.assertRoundTrip(samples)
+
+    def test_special_values(self):
+        values = [
+            0.0, -0.0, 0.0, -0.0,
+            5e-324, -5e-324, 2.2250738585072014e-308 / 3, 2.2250738585072014e-308,
+            1.7976931348623157e308, -1.7976931348623157e308, float('inf'), float('-inf'), float('nan'),
+            1.0, 1.0, 1.0000000000000002, -1.0,
+        ]
+        samples = [(BASE_TIME + timedelta(seconds=index), value) for index, value in enumerate(values)]
+        self.assertRoundTrip(samples)
+
+    def test_large_and_irregular_gaps(self):
+        offsets = [
+            timedelta(0),
+            timedelta(seconds=1),
+            timedelta(seconds=2),
+            # Günlerce süren duraklatmalar 32 bitlik delta-of-delta kovasını aşar
+            timedelta(days=40, seconds=2),
+            timedelta(days=40, seconds=3),
+            timedelta(days=400, seconds=3),
+            timedelta(days=400, seconds=3, microseconds=1),
+            timedelta(days=400, seconds=3, microseconds=2),
+            timedelta(days=400, seconds=4),
+        ]
+        samples = [(BASE_TIME + offset, float(index)) for index, offset in enumerate(offsets)]
+        self.assertRoundTrip(samples)
+
+    def test_timestamps_before_epoch(self):
+        start = datetime(1969, 12, 31, 23, 59, 58, tzinfo=dt_timezone.utc)
+        self.assertRoundTrip([(start + timedelta(seconds=index), 1.5) for index in range(5)])
+
+    def test_chunk_with_nan_passes_verification(self):
+        samples = [(BASE_TIME + timedelta(seconds=index), value) for index, value in enumerate([1.0, float('nan'), 3.0, float('nan')])]
+        chunk = _build_chunk(None, 1, samples)
+        self.assertEqual((chunk.min_value, chunk.sample_count), (1.0, 4))
+        self.assertTrue(math.isnan(chunk.max_value))
+
+
+class ArchiveTestCase(TestCase):
+    """İki register'lı, duraklatmalı ve değerleri tekrar eden bitmiş bir seans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device = Device.objects.create(name='Test PLC', connection_host='127.0.0.1')
+        cls.registers = [
+            Register.objects.create(device=device, name='Sıcaklık', address=40001, register_type='holding', data_type='FLOAT32'),
+            Register.objects.create(device=device, name='Basınç', address=40003, register_type='holding', data_type='INT16'),
+        ]
+        cls.test_run = TestRun.objects.create(
+            test_name='Arşiv testi', status='COMPLETED', start_time=BASE_TIME, end_time=BASE_TIME + timedelta(hours=2),
+        )
+        rng = random.Random(7)
+        datapoints = []
+        for index in range(600):
+            # 200. ve 400. örnekler arasında seans duraklatılmış gibi boşluk bırakılır
+            timestamp = BASE_TIME + timedelta(seconds=index, microseconds=rng.randint(0, 2000))
+            if index >= 200:
+                timestamp += timedelta(minutes=30)
+            if index >= 400:
+                timestamp += timedelta(minutes=20)
+            for register in cls.registers:
+                value = float(rng.choice([10, 10, 10, 12, 15, 20])) if register.data_type == 'INT16' else round(rng.uniform(15, 25), 3)
+                datapoints.append(DataPoint(register=register, test_run=cls.test_run, timestamp=timestamp, value=value))
+        if connection.vendor == 'postgresql':
+            # Eski çözücü NaN değerleri de yazıyordu (SQLite NaN'ı NULL olarak sakladığı için orada eklenmez)
+            datapoints.append(DataPoint(register=cls.registers[0], test_run=cls.test_run, timestamp=BASE_TIME + timedelta(microseconds=2500), value=float('nan')))
+        DataPoint.objects.bulk_create(datapoints)
+
+    def raw_rows(self, queryset=None):
+        queryset = DataPoint.objects.filter(test_run=self.test_run) if queryset is None else queryset
+        return [
+            (timestamp, register_id, float_bits(value))
+            for timestamp, register_id, value in queryset.order_by('timestamp', 'register_id').values_list('timestamp', 'register_id', 'value')
+        ]
+
+    def archived_rows(self, archived):
+        return [(point.timestamp, point.register_id, float_bits(point.value)) for point in archived]
+
+
+class ArchiveRestoreTests(ArchiveTestCase):
+
+    def test_archive_then_restore_keeps_rows(self):
+        before = self.raw_rows()
+
+        result = archive_test_run(self.test_run, chunk_size=64)
+        self.assertEqual(result.rows, len(before))
+        self.assertFalse(DataPoint.objects.filter(test_run=self.test_run).exists())
+        self.assertEqual(DataPointArchiveChunk.objects.filter(test_run=self.test_run).count(), result.chunks)
+
+        self.assertEqual(restore_test_run(self.test_run), len(before))
+        self.assertEqual(self.raw_rows(), before)
+        self.assertFalse(DataPointArchiveChunk.objects.filter(test_run=self.test_run).exists())
+        self.test_run.refresh_from_db()
+        self.assertIsNone(self.test_run.archived_at)
+
+    def test_unfinished_run_is_not_archived(self):
+        test_run = TestRun.objects.create(test_name='Süren test', status='RUNNING', start_time=BASE_TIME)
+        with self.assertRaises(ValueError):
+            archive_test_run(test_run)
+
+
+class ArchivedDataPointsTests(ArchiveTestCase):
+    """ArchivedDataPoints, aynı filtrelerle ham DataPoint sorgusuyla aynı satırları vermeli."""
+
+    def setUp(self):
+        register_a, register_b = self.registers
+        window_start = BASE_TIME + timedelta(seconds=150)
+        window_end = BASE_TIME + timedelta(minutes=30, seconds=300)
+        time_ranges = [
+            (BASE_TIME + timedelta(seconds=50), BASE_TIME + timedelta(seconds=120)),
+            (BASE_TIME + timedelta(minutes=50, seconds=420), BASE_TIME + timedelta(minutes=50, seconds=500)),
+        ]
+        ranges_q = Q()
+        for range_start, range_end in time_ranges:
+            ranges_q |= Q(timestamp__range=(range_start, range_end))
+
+        # (ArchivedDataPoints parametreleri, ham sorgu filtresi)
+        self.cases = [
+            ({}, Q()),
+            ({'register_id': register_b.id}, Q(register_id=register_b.id)),
+            ({'start': window_start, 'end': window_end}, Q(timestamp__gte=window_start, timestamp__lte=window_end)),
+            ({'time_ranges': time_ranges}, ranges_q),
+            # Seansın hiç duraklatılmadığı (segmenti olmayan) durum filtresi hiçbir satır seçmez
+            ({'time_ranges': status_time_ranges(self.test_run, 'PAUSED')}, in_status('PAUSED')),
+            ({'value_condition': ('gt', 15.0)}, Q(value__gt=15.0)),
+            ({'value_condition': ('lt', 12.0)}, Q(value__lt=12.0)),
+            ({'value_condition': ('exact', 15.0)}, Q(value=15.0)),
+            (
+                {'register_id': register_a.id, 'time_ranges': time_ranges, 'start': window_start, 'value_condition': ('gt', 18.0)},
+                Q(register_id=register_a.id, timestamp__gte=window_start, value__gt=18.0) & ranges_q,
+            ),
+        ]
+        self.expected = [
+            self.raw_rows(DataPoint.objects.filter(raw_filter, test_run=self.test_run)) for _, raw_filter in self.cases
+        ]
+        archive_test_run(self.test_run, chunk_size=64)
+
+    def test_filters_match_raw_queryset(self):
+        for (params, _), expected in zip(self.cases, self.expected):
+            with self.subTest(params=params):
+                archived = ArchivedDataPoints(test_run=self.test_run, **params)
+                if params.get('time_ranges') != []:
+                    self.assertTrue(expected, "Filtre hiç satır seçmiyor, test anlamsız olur.")
+                self.assertEqual(self.archived_rows(archived.order_by('timestamp')), expected)
+                self.assertEqual(self.archived_rows(archived.order_by('-timestamp')), expected[::-1])
+                self.assertEqual(archived.count(), len(expected))
+
+    def test_slicing_matches_raw_queryset(self):
+        archived = ArchivedDataPoints(test_run=self.test_run).order_by('-timestamp')
+        expected = self.expected[0][::-1]
+        self.assertEqual(self.archived_rows(archived[100:150]), expected[100:150])
+        self.assertEqual(archived[5].timestamp, expected[5][0])
+
+
+def mapping_register(register_id, register_type='holding', data_type='INT16', scaling_factor=1.0, invert_value=False):
+    """Eşleştirme motorunun kullandığı CompiledRegister alanlarını taşıyan sade nesne."""
+    return SimpleNamespace(
+        id=register_id, register_type=register_type, data_type=data_type, scaling_factor=scaling_factor,
+        invert_value=invert_value, byte_order='BIG', string_length=1,
+    )
+
+
+class MappingChainTests(SimpleTestCase):
+    """Zincirleme eşleştirmede bir sonraki kurala, hedefin okunacak değeri aktarılmalı."""
+
+    def plan(self, *chain):
+        destinations = {source.id: (destination,) for source, destination in zip(chain, chain[1:])}
+        graph = MappingGraph(destinations=MappingProxyType(destinations), devices=MappingProxyType({}), cyclic_edges=frozenset())
+        return {register_id: value for register_id, (_, value) in plan_mapping_writes(graph, [(chain[0].id, 1.0)]).items()}
+
+    def test_scaled_destination_passes_read_back_value(self):
+        # 1.0 çarpanı 0.1 olan INT16'ya ham 10 olarak yazılır ve 1.0 okunur; 0.4 çarpanlıya ham 2 yazılır, 0.8 okunur
+        source, scaled, coarse, last = mapping_register(1), mapping_register(2, scaling_factor=0.1), mapping_register(3, scaling_factor=0.4), mapping_register(4)
+        writes = self.plan(source, scaled, coarse, last)
+        self.assertEqual(writes[2], 1.0)
+        self.assertEqual(writes[3], 1.0)
+        self.assertAlmostEqual(writes[4], 0.8)
+
+    def test_inverted_coil_passes_read_back_value(self):
+        source, coil, last = mapping_register(1), mapping_register(2, register_type='coil', invert_value=True, scaling_factor=2.0), mapping_register(3)
+        writes = self.plan(source, coil, last)
+        self.assertEqual(writes[3], 0.0)
+        self.assertEqual(mapped_value(mapping_register(5, register_type='coil', scaling_factor=2.0), True), 2.0)
+
+    def test_unencodable_value_is_passed_unchanged(self):
+        self.assertEqual(mapped_value(mapping_register(1, data_type='UINT16'), -5.0), -5.0)
@@ -38,6 +38,8 @@ urlpatterns = [
     # Raporlama ve PDF URL'leri (Bunlar kalıyor, daha sonra güncelleyeceğiz)
     path('reports/', views.historical_data_view, name='historical_data'),
     path('reports/export-pdf/', views.export_pdf_view, name='export_pdf'), 
+    path('reports/export-csv/', views.export_csv_view, name='export_csv'),
+    path('reports/export-parquet/', views.export_parquet_view, name='export_parquet'),
 
     path('status-panel/', views.status_panel_view, name='status_panel'),
 
@@ -58,4 +60,8 @@ urlpatterns = [
 
     path('api/available-coils/', views.AvailableCoilsAPIView.as_view(), name='api_available_coils'),
 
+    path('api/acquisition-status/', views.AcquisitionStatusAPIView.as_view(), name='api_acquisition_status'),
+
+    path('api/registers/<int:pk>/range/', views.RegisterRangeAPIView.as_view(), name='api_register_range'),
+
 ]
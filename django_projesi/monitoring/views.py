@@ -4,12 +4,14 @@ from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
@@ -18,8 +20,17 @@ from django.views.decorators.http import require_POST
 from .models import Device, Register, DataPoint, TestRun, TestEventLog, ScheduledTask, DashboardWidget, AlarmRule, AlarmLog
 from .forms import DeviceForm, RegisterForm, TestRunForm
 from .tasks import write_coil_value
+from .series import value_at
+from .cycle_guard import get_cycle_stats
+from .datapoint_buffer import datapoint_buffer
+from .downsampling import from_ms, register_range_series
+from .exports import PARQUET_AVAILABLE, stream_csv, stream_parquet
+from .archive import ArchivedDataPoints
+from .latest_values import latest_value_store
+from .segments import in_status, record_transition, status_time_ranges
+from .pagination import datapoint_count, keyset_page
+from .rollups import RESOLUTION_LABELS, ROLLUP_MODELS, choose_resolution, rollup_queryset, rollup_summary
 from django.core.paginator import Paginator
-from django.db.models import Q
 from weasyprint import HTML
 
 
@@ -83,6 +94,103 @@ class RegisterDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # Raporlama 
+def parse_filter_datetime(value):
+    """Formdan gelen (datetime-local) zamanı, yerel saat dilimine göre datetime'a çevirir."""
+    parsed = parse_datetime(value) if value else None
+    if parsed and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def pick_resolution(requested, test_run, register_id=None, time_ranges=None, start=None, end=None, series_count=1):
+    """
+    Raporun okuyacağı çözünürlüğü belirler: 'raw' ham veri, '1m'/'1h'/'1d' ilgili
+    özet tablosu, 'auto' ise aralığa göre nokta bütçesini aşmayan en ince çözünürlük.
+    Ham veri için None döner.
+    """
+    if requested == 'raw':
+        return None
+    if requested in ROLLUP_MODELS:
+        return requested
+    if time_ranges:
+        start = start or min(range_start for range_start, _ in time_ranges)
+        end = end or max(range_end for _, range_end in time_ranges)
+    raw_count, first, last = rollup_summary(test_run, register_id, start, end)
+    return choose_resolution(start or first, end or last, raw_count=raw_count, series_count=series_count)
+
+
+def filter_datapoints(test_run, params):
+    """
+    Raporlama filtrelerini (durum, register, değer ve zaman aralığı) test seansının
+    DataPoint sorgusuna uygular. historical_data_view ve dışa aktarımlar aynı
+    filtreleri kullanır.
+    (datapoints, time_ranges, selected_register, value_filtered) döndürür.
+    """
+    status_filter = params.get('status_filter', 'all')
+    selected_register_id = params.get('register_id', None)
+    value_operator = params.get('value_operator', 'gt')
+    filter_value_analog = params.get('filter_value_analog', '')
+    filter_value_binary = params.get('filter_value_binary', '')
+    start_datetime = params.get('start_datetime', '')
+    end_datetime = params.get('end_datetime', '')
+
+    datapoints_list = DataPoint.objects.filter(test_run=test_run)
+    selected_register = None
+
+    # Durum filtresi "Tümü" değilse, seansın o durumdaki segmentlerine düşen veriler alınır
+    time_ranges = []
+    if status_filter in ['RUNNING', 'PAUSED']:
+        time_ranges = status_time_ranges(test_run, status_filter)
+
+        # Segment tablosuyla tek bir aralık join'i (bkz. segments.py)
+        datapoints_list = datapoints_list.filter(in_status(status_filter))
+
+    # Değer filtresi ancak ham veride uygulanabilir
+    value_filtered = False
+
+    # YENİ: Register filtresini uygula
+    if selected_register_id:
+        datapoints_list = datapoints_list.filter(register_id=selected_register_id)
+        selected_register = get_object_or_404(Register, pk=selected_register_id)
+
+        # Analog filtre için 'filter_value_analog' kullan
+        if selected_register.register_type in ['holding', 'input'] and filter_value_analog:
+            try:
+                numeric_value = float(filter_value_analog)
+                if value_operator == 'gt': datapoints_list = datapoints_list.filter(value__gt=numeric_value)
+                elif value_operator == 'lt': datapoints_list = datapoints_list.filter(value__lt=numeric_value)
+                elif value_operator == 'exact': datapoints_list = datapoints_list.filter(value=numeric_value)
+                value_filtered = True
+            except (ValueError, TypeError): pass
+
+        # Binary filtre için 'filter_value_binary' kullan
+        elif selected_register.register_type in ['coil', 'discrete_input'] and filter_value_binary:
+            datapoints_list = datapoints_list.filter(value=float(filter_value_binary))
+            value_filtered = True
+
+    # Zaman aralığı filtresi
+    if start_datetime: datapoints_list = datapoints_list.filter(timestamp__gte=start_datetime)
+    if end_datetime: datapoints_list = datapoints_list.filter(timestamp__lte=end_datetime)
+
+    if test_run.archived_at:
+        # Arşivlenmiş seansta aynı filtreler sıkıştırılmış parçalara uygulanır
+        value_condition = None
+        if value_filtered and selected_register.register_type in ['holding', 'input']:
+            if value_operator in ['gt', 'lt', 'exact']:
+                value_condition = (value_operator, float(filter_value_analog))
+        elif value_filtered:
+            value_condition = ('exact', float(filter_value_binary))
+        # Durum filtresi yoksa aralık filtresi de yoktur (None); segmentsiz durumda boş liste hiçbir satır seçmez
+        datapoints_list = ArchivedDataPoints(
+            test_run, register_id=selected_register_id,
+            time_ranges=time_ranges if status_filter in ['RUNNING', 'PAUSED'] else None,
+            start=parse_filter_datetime(start_datetime), end=parse_filter_datetime(end_datetime),
+            value_condition=value_condition,
+        )
+
+    return datapoints_list, time_ranges, selected_register, value_filtered
+
+
 @login_required
 def historical_data_view(request):
     selected_test_id = request.GET.get('test_run_id', None)
@@ -93,78 +201,55 @@ def historical_data_view(request):
     filter_value_binary = request.GET.get('filter_value_binary', '')
     start_datetime = request.GET.get('start_datetime', '')
     end_datetime = request.GET.get('end_datetime', '')
+    requested_resolution = request.GET.get('resolution', 'auto')
 
     datapoints_list = DataPoint.objects.none()
     test_run = None
     all_registers_in_test = Register.objects.none()
     selected_register = None
+    carried_in = None
+    resolution = None
+    rollups_list = None
 
     if selected_test_id:
         test_run = get_object_or_404(TestRun, pk=selected_test_id)
-        datapoints_list = DataPoint.objects.filter(test_run=test_run)
-        all_registers_in_test = Register.objects.filter(datapoints__test_run_id=selected_test_id).distinct()
+        # Testteki register'lar seansın register listesinden bulunur; ham tablo taranmaz
+        all_registers_in_test = Register.objects.filter(
+            id__in=test_run.register_manifest.values('register_id')
+        )
 
-        # Durum filtresi "Tümü" değilse, zaman aralıklarını hesapla
-        if status_filter in ['RUNNING', 'PAUSED']:
-            events = test_run.event_logs.order_by('timestamp')
-            time_ranges = []
-            last_event_time = None
-            last_event_type = None
-
-            for event in events:
-                if last_event_time:
-                    # İki event arasındaki zaman aralığının durumunu belirle
-                    # Örneğin, bir önceki event START ise, bu aralık RUNNING durumundadır.
-                    interval_status = 'RUNNING' if last_event_type in ['START', 'RESUME'] else 'PAUSED'
-
-                    # Eğer kullanıcının aradığı durum, bu aralığın durumuyla eşleşiyorsa listeye ekle
-                    if interval_status == status_filter:
-                        time_ranges.append((last_event_time, event.timestamp))
-
-                last_event_time = event.timestamp
-                last_event_type = event.event_type
-
-            # Eğer test hala bitmediyse, son olaydan şimdiki zamana kadar olan aralığı da hesaba kat
-            if last_event_time and test_run.status in ['RUNNING', 'PAUSED']:
-                if test_run.status == status_filter:
-                    time_ranges.append((last_event_time, timezone.now()))
-
-            # Oluşturulan zaman aralıklarına uyan tüm verileri filtrele
-            q_objects = Q()
-            for start, end in time_ranges:
-                q_objects |= Q(timestamp__range=(start, end))
-
-            datapoints_list = datapoints_list.filter(q_objects)
-
-        # YENİ: Register filtresini uygula
-        if selected_register_id:
-            datapoints_list = datapoints_list.filter(register_id=selected_register_id)
-            selected_register = get_object_or_404(Register, pk=selected_register_id)
-
-            # Analog filtre için 'filter_value_analog' kullan
-            if selected_register.register_type in ['holding', 'input'] and filter_value_analog:
-                try:
-                    numeric_value = float(filter_value_analog)
-                    if value_operator == 'gt': datapoints_list = datapoints_list.filter(value__gt=numeric_value)
-                    elif value_operator == 'lt': datapoints_list = datapoints_list.filter(value__lt=numeric_value)
-                    elif value_operator == 'exact': datapoints_list = datapoints_list.filter(value=numeric_value)
-                except (ValueError, TypeError): pass
+        datapoints_list, time_ranges, selected_register, value_filtered = filter_datapoints(test_run, request.GET)
+        segment_status = status_filter if status_filter in ['RUNNING', 'PAUSED'] else None
 
-            # Binary filtre için 'filter_value_binary' kullan
-            elif selected_register.register_type in ['coil', 'discrete_input'] and filter_value_binary:
-                datapoints_list = datapoints_list.filter(value=float(filter_value_binary))
-            
+        # Uzun aralıklarda ham satırlar yerine özet tablosu okunur
+        if not value_filtered:
+            range_start = parse_filter_datetime(start_datetime)
+            range_end = parse_filter_datetime(end_datetime)
+            resolution = pick_resolution(
+                requested_resolution, test_run, selected_register_id, time_ranges, range_start, range_end,
+                series_count=1 if selected_register_id else all_registers_in_test.count(),
+            )
+            if resolution:
+                rollups_list = rollup_queryset(resolution, test_run, selected_register_id, segment_status, range_start, range_end)
 
-        # Zaman aralığı filtresi
-        if start_datetime: datapoints_list = datapoints_list.filter(timestamp__gte=start_datetime)
-        if end_datetime: datapoints_list = datapoints_list.filter(timestamp__lte=end_datetime)
+        # Ölü bantlı register'da başlangıç anındaki değer, aralıktan önceki son kayıttan taşınır
+        if selected_register and selected_register.deadband_mode != 'none' and start_datetime and not resolution:
+            carried_in = value_at(selected_register.id, start_datetime, test_run)
 
 
     all_tests = TestRun.objects.all().order_by('-id')
-    ordered_datapoints = datapoints_list.order_by('-timestamp')
-    paginator = Paginator(datapoints_list.order_by('-timestamp'), 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset sayfalama: derin sayfalar da ilk sayfa kadar ucuzdur, ham tablo sayılmaz (bkz. pagination.py)
+    if rollups_list is not None:
+        rows = rollups_list.select_related('register__device')
+        page_obj = keyset_page(rows, request.GET, rows.count(), fields=('bucket', 'register_id'))
+    elif test_run is not None:
+        count, count_is_estimate = datapoint_count(
+            datapoints_list, test_run, selected_register_id, segment_status,
+            parse_filter_datetime(start_datetime), parse_filter_datetime(end_datetime), value_filtered,
+        )
+        page_obj = keyset_page(datapoints_list.select_related('register__device'), request.GET, count, count_is_estimate=count_is_estimate)
+    else:
+        page_obj = keyset_page(datapoints_list, request.GET, 0)
 
     context = {
         'page_title': 'Gelişmiş Raporlama', 
@@ -180,6 +265,10 @@ def historical_data_view(request):
         'filter_value_binary': filter_value_binary, 
         'start_datetime': start_datetime, 
         'end_datetime': end_datetime,
+        'carried_in': carried_in,
+        'requested_resolution': requested_resolution,
+        'resolution': resolution,
+        'resolution_label': RESOLUTION_LABELS[resolution],
     }
     return render(request, 'monitoring/historical_data.html', context)
 
@@ -194,36 +283,46 @@ def export_pdf_view(request):
     # URL'den filtreleri al
     selected_test_id = request.GET.get('test_run_id', None)
     status_filter = request.GET.get('status_filter', 'all')
+    requested_resolution = request.GET.get('resolution', 'auto')
 
     datapoints_list = DataPoint.objects.none()
     test_run = None
+    resolution = None
+    rollups_list = None
 
     if selected_test_id:
         test_run = get_object_or_404(TestRun, pk=selected_test_id)
         datapoints_list = DataPoint.objects.filter(test_run=test_run)
 
         # historical_data_view'deki durum filtresi mantığının aynısını uygula
+        time_ranges = []
+        segment_status = None
         if status_filter in ['RUNNING', 'PAUSED']:
-            events = test_run.event_logs.order_by('timestamp')
-            time_ranges, last_event_time, last_event_type = [], None, None
-            for event in events:
-                if last_event_time:
-                    interval_status = 'RUNNING' if last_event_type in ['START', 'RESUME'] else 'PAUSED'
-                    if interval_status == status_filter:
-                        time_ranges.append((last_event_time, event.timestamp))
-                last_event_time, last_event_type = event.timestamp, event.event_type
-            if last_event_time and test_run.status == status_filter:
-                time_ranges.append((last_event_time, timezone.now()))
-
-            q_objects = Q()
-            for start, end in time_ranges: q_objects |= Q(timestamp__range=(start, end))
-            datapoints_list = datapoints_list.filter(q_objects) if time_ranges else DataPoint.objects.none()
+            time_ranges = status_time_ranges(test_run, status_filter)
+            segment_status = status_filter
+            datapoints_list = datapoints_list.filter(in_status(status_filter)) if time_ranges else DataPoint.objects.none()
+        if test_run.archived_at and (status_filter not in ['RUNNING', 'PAUSED'] or time_ranges):
+            datapoints_list = ArchivedDataPoints(test_run, time_ranges=time_ranges if segment_status else None)
+
+        # Uzun testlerde rapor her örneği değil, aralığa uygun özet satırlarını içerir
+        if status_filter not in ['RUNNING', 'PAUSED'] or time_ranges:
+            series_count = test_run.register_manifest.count()
+            resolution = pick_resolution(requested_resolution, test_run, time_ranges=time_ranges, series_count=max(series_count, 1))
+            if resolution:
+                rollups_list = rollup_queryset(resolution, test_run, status=segment_status)
 
     # PDF'i oluştur
-    html_string = render_to_string('monitoring/report_pdf.html', {
-        'datapoints': datapoints_list.order_by('timestamp'),
-        'test_run': test_run
-    })
+    if rollups_list is not None:
+        html_string = render_to_string('monitoring/report_pdf.html', {
+            'rollups': rollups_list.select_related('register__device').order_by('bucket', 'register_id'),
+            'resolution_label': RESOLUTION_LABELS[resolution],
+            'test_run': test_run
+        })
+    else:
+        html_string = render_to_string('monitoring/report_pdf.html', {
+            'datapoints': datapoints_list.select_related('register__device').order_by('timestamp'),
+            'test_run': test_run
+        })
 
     pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
     response = HttpResponse(pdf_file, content_type='application/pdf')
@@ -231,6 +330,30 @@ def export_pdf_view(request):
     return response
 
 
+# Ham verinin tamamı (özet değil) akış olarak dışa aktarılır; bellek kullanımı satır sayısından bağımsızdır
+
+@login_required
+def export_csv_view(request):
+    test_run = get_object_or_404(TestRun, pk=request.GET.get('test_run_id'))
+    datapoints_list, _, _, _ = filter_datapoints(test_run, request.GET)
+
+    response = StreamingHttpResponse(stream_csv(datapoints_list), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="rapor_test_{test_run.id}.csv"'
+    return response
+
+
+@login_required
+def export_parquet_view(request):
+    if not PARQUET_AVAILABLE:
+        return HttpResponse("Parquet dışa aktarımı için sunucuda pyarrow kurulu olmalıdır.", status=501)
+    test_run = get_object_or_404(TestRun, pk=request.GET.get('test_run_id'))
+    datapoints_list, _, _, _ = filter_datapoints(test_run, request.GET)
+
+    response = StreamingHttpResponse(stream_parquet(datapoints_list), content_type='application/vnd.apache.parquet')
+    response['Content-Disposition'] = f'attachment; filename="rapor_test_{test_run.id}.parquet"'
+    return response
+
+
 
 
 @login_required
@@ -291,15 +414,18 @@ def start_test_view(request, pk):
     """Oluşturulmuş bir testi 'Çalışıyor' durumuna getirir."""
     test_run = get_object_or_404(TestRun, pk=pk)
     if request.method == 'POST' and test_run.status == 'NOT_STARTED':
+        now = timezone.now()
         test_run.status = 'RUNNING'
-        test_run.start_time = timezone.now()
-        test_run.last_resumed_time = timezone.now()
-        test_run.save()
-
-        TestEventLog.objects.create(
-            test_run=test_run, event_type='START',
-            notes="Test başlatıldı.", user=request.user
-        )
+        test_run.start_time = now
+        test_run.last_resumed_time = now
+        # Durum, segment ve olay kaydı birlikte yazılır; biri başarısız olursa hiçbiri kalmaz
+        with transaction.atomic():
+            test_run.save()
+            record_transition(test_run, 'RUNNING', now)
+            TestEventLog.objects.create(
+                test_run=test_run, event_type='START',
+                notes="Test başlatıldı.", user=request.user
+            )
 
         if test_run.control_coil:
             write_coil_value.delay(register_id=test_run.control_coil.id, value=True)
@@ -313,17 +439,19 @@ def pause_test_view(request, pk):
     test_run = get_object_or_404(TestRun, pk=pk)
     if request.method == 'POST' and test_run.status == 'RUNNING':
         # Geçen süreyi hesapla ve toplam süreye ekle
-        time_since_resume = timezone.now() - test_run.last_resumed_time
+        now = timezone.now()
+        time_since_resume = now - test_run.last_resumed_time
         test_run.elapsed_seconds += time_since_resume.total_seconds()
 
         # Durumu güncelle
         test_run.status = 'PAUSED'
-        test_run.save()
-
-        TestEventLog.objects.create(
-            test_run=test_run, event_type='PAUSE',
-            notes="Test kullanıcı tarafından duraklatıldı.", user=request.user
-        )
+        with transaction.atomic():
+            test_run.save()
+            record_transition(test_run, 'PAUSED', now)
+            TestEventLog.objects.create(
+                test_run=test_run, event_type='PAUSE',
+                notes="Test kullanıcı tarafından duraklatıldı.", user=request.user
+            )
 
         # Kontrol coil'ini KAPAT
         if test_run.control_coil:
@@ -336,14 +464,16 @@ def resume_test_view(request, pk):
     """Duraklatılmış bir testi devam ettirir."""
     test_run = get_object_or_404(TestRun, pk=pk)
     if request.method == 'POST' and test_run.status == 'PAUSED':
+        now = timezone.now()
         test_run.status = 'RUNNING'
-        test_run.last_resumed_time = timezone.now() # Geri sayım için başlangıç noktasını güncelle
-        test_run.save()
-
-        TestEventLog.objects.create(
-            test_run=test_run, event_type='RESUME',
-            notes="Test devam ettirildi.", user=request.user
-        )
+        test_run.last_resumed_time = now # Geri sayım için başlangıç noktasını güncelle
+        with transaction.atomic():
+            test_run.save()
+            record_transition(test_run, 'RUNNING', now)
+            TestEventLog.objects.create(
+                test_run=test_run, event_type='RESUME',
+                notes="Test devam ettirildi.", user=request.user
+            )
 
         # Kontrol coil'ini AÇ
         if test_run.control_coil:
@@ -357,18 +487,20 @@ def abort_test_view(request, pk):
     test_run = get_object_or_404(TestRun, pk=pk)
     if request.method == 'POST' and test_run.status in ['RUNNING', 'PAUSED']:
         # Eğer test çalışıyorsa, son geçen süreyi de hesaba kat
+        now = timezone.now()
         if test_run.status == 'RUNNING':
-            time_since_resume = timezone.now() - test_run.last_resumed_time
+            time_since_resume = now - test_run.last_resumed_time
             test_run.elapsed_seconds += time_since_resume.total_seconds()
 
         test_run.status = 'ABORTED' # Durumu "İptal Edildi" yap
-        test_run.end_time = timezone.now()
-        test_run.save()
-
-        TestEventLog.objects.create(
-            test_run=test_run, event_type='ABORT',
-            notes="Test kullanıcı tarafından sonlandırıldı.", user=request.user
-        )
+        test_run.end_time = now
+        with transaction.atomic():
+            test_run.save()
+            record_transition(test_run, 'ABORTED', now)
+            TestEventLog.objects.create(
+                test_run=test_run, event_type='ABORT',
+                notes="Test kullanıcı tarafından sonlandırıldı.", user=request.user
+            )
 
         # Kontrol coil'ini KAPAT
         if test_run.control_coil:
@@ -397,9 +529,9 @@ def dashboard_view(request):
     ).select_related('device')
 
     # Her bir coil'in son durumunu bul (switch'lerin başlangıç durumu için)
+    latest_values = latest_value_store.get_values(coil.id for coil in writable_coils)
     for coil in writable_coils:
-        latest_datapoint = DataPoint.objects.filter(register=coil).order_by('-timestamp').first()
-        coil.latest_value = bool(latest_datapoint.value) if latest_datapoint else False
+        coil.latest_value = bool(latest_values.get(coil.id))
 
     # Grafiklerin JavaScript'te oluşturulması için JSON verisi hazırla
     registers_for_js = [{'pk': r.pk, 'name': r.name} for r in readable_registers]
@@ -417,17 +549,11 @@ def dashboard_view(request):
 def register_detail_view(request, pk):
     register = get_object_or_404(Register.objects.select_related('device'), pk=pk)
 
-    # O register'a ait tüm veri noktalarını alıyoruz
-    # Not: Eğer bu register bir teste bağlıysa, sadece o testin verilerini de alabiliriz.
-    datapoints = DataPoint.objects.filter(register=register).order_by('timestamp')
-
-    # ApexCharts'ın anlayacağı formata çeviriyoruz
-    chart_data = [[int(dp.timestamp.timestamp() * 1000), dp.value] for dp in datapoints]
-
+    # Grafik verisi sayfaya gömülmez; grafik, görünen pencereyi ekran genişliği kadar
+    # noktayla RegisterRangeAPIView'den ister ve yakınlaştırdıkça yeniden ister.
     context = {
         'page_title': f"{register.name} - Detaylı Grafik",
         'register': register,
-        'chart_data_json': json.dumps(chart_data)
     }
     return render(request, 'monitoring/register_detail.html', context)
 
@@ -472,7 +598,7 @@ def schedule_designer_view(request):
 @login_required
 def status_panel_view(request):
     widgets = DashboardWidget.objects.filter(target_page='status_panel').prefetch_related('registers')
-    latest_values = {dp['register_id']: dp['value'] for dp in DataPoint.objects.order_by('register_id', '-timestamp').distinct('register_id').values('register_id', 'value')}
+    latest_values = latest_value_store.get_values(r.id for w in widgets for r in w.registers.all())
 
     for widget in widgets:
         for register in widget.registers.all():
@@ -491,7 +617,7 @@ def mosaic_dashboard_view(request):
 
     # Sadece son değerleri ve enumları alıyoruz. Grafik için geçmiş veri hazırlamıyoruz.
     all_needed_register_ids = {r.id for w in widgets for r in w.registers.all()}
-    latest_values = {dp['register_id']: dp['value'] for dp in DataPoint.objects.filter(register_id__in=all_needed_register_ids).order_by('register_id', '-timestamp').distinct('register_id').values('register_id', 'value')}
+    latest_values = latest_value_store.get_values(all_needed_register_ids)
     enum_maps = {ev.id: {em.raw_value: em.label for em in ev.enum_values.all()} for ev in Register.objects.filter(display_preference='enum', id__in=all_needed_register_ids)}
 
     for widget in widgets:
@@ -570,6 +696,38 @@ class UpdateScheduleAPIView(APIView):
             return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AcquisitionStatusAPIView(APIView):
+    """Veri toplama döngüsünün son süresi, gecikmesi, taşma ve atlanan döngü sayıları ile yazma tamponu birikimi."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        stats = get_cycle_stats()
+        # Yazma tamponunda veritabanına yazılmayı bekleyen döngü sayısı (tampon kapalıysa None)
+        stats['write_buffer_backlog'] = datapoint_buffer.backlog()
+        return Response(stats)
+
+
+class RegisterRangeAPIView(APIView):
+    """
+    Register grafiği için seyreltilmiş aralık verisi (bkz. downsampling.py).
+    Parametreler: start, end (epoch milisaniye, opsiyonel), points (istenen nokta sayısı).
+    """
+    # Veri, giriş gerektiren register detay sayfasındakiyle aynıdır; oturum açmış kullanıcıya açık
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, format=None):
+        register = get_object_or_404(Register, pk=pk)
+        try:
+            start = from_ms(int(request.GET['start'])) if request.GET.get('start') else None
+            end = from_ms(int(request.GET['end'])) if request.GET.get('end') else None
+            points = int(request.GET['points']) if request.GET.get('points') else None
+        except (ValueError, OverflowError, OSError):
+            return Response({"error": "start, end ve points tam sayı olmalıdır."}, status=status.HTTP_400_BAD_REQUEST)
+        if start and end and start > end:
+            return Response({"error": "start, end'den büyük olamaz."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(register_range_series(register, start=start, end=end, points=points))
+
+
 # API View'leri
 class WriteCoilView(APIView):
     authentication_classes = []
@@ -0,0 +1,206 @@
+"""
+Cihaz bazında birleştirilmiş yazma kuyruğu.
+
+Yazma istekleri (manuel komut, zaman çizelgesi, eşleştirme kuralları) önce
+cihazın kuyruğuna girer. Aynı register'a henüz gönderilmemiş bir yazma varsa
+yeni değer onun yerine geçer; yalnızca son değer yazılır. Kuyruk, okuma
+motorunun (async_poller.py) arka plan loop'unda ve aynı soketler üzerinden
+boşaltılır. Bitişik adreslere giden yazmalar tek bir write_coils /
+write_registers isteğinde birleştirilir.
+
+submit() bir concurrent.futures.Future döndürür: senkron kod .result() ile,
+async kod asyncio.wrap_future() ile sonucu bekleyebilir. Sonuç, yazılan
+değerdir; yazılamazsa Future istisna ile tamamlanır.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from pymodbus.exceptions import ConnectionException, ModbusException
+
+from .async_poller import get_poller
+from .decoder import encode_register_value
+from .read_planner import get_pdu_address
+
+logger = logging.getLogger(__name__)
+
+# Tek istekte yazılabilecek en fazla word / bit sayısı (Modbus protokol sınırları)
+MAX_WRITE_WORDS = 123
+MAX_WRITE_BITS = 1968
+WRITABLE_REGISTER_TYPES = ('coil', 'holding')
+
+
+class WriteRejected(ModbusException):
+    """Cihaz yazma isteğine Modbus hata cevabı verdi (örn. ILLEGAL_ADDRESS)."""
+
+
+@dataclass
+class PendingWrite:
+    """Bir register'a bekleyen yazma; aynı register'a gelen tüm çağıranların Future'ları burada toplanır."""
+    register: object
+    value: object
+    futures: list = field(default_factory=list)
+
+    def resolve(self, error=None):
+        for future in self.futures:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(self.value)
+            else:
+                future.set_exception(error)
+
+
+@dataclass
+class WriteBlock:
+    """Tek bir Modbus yazma isteği: bitişik register'ların birleştirilmiş değerleri."""
+    register_type: str
+    start: int
+    values: list
+    writes: list
+
+    @property
+    def end(self):
+        return self.start + len(self.values)
+
+
+def plan_device_writes(writes):
+    """
+    Bir cihazın bekleyen yazmalarını istek bloklarına ayırır. Değeri kodlanamayan
+    yazmaların Future'ları hemen hata ile tamamlanır. Sadece aralarında boşluk
+    olmayan adresler birleştirilir; boşluktaki register'ların üzerine yazılmaz.
+    """
+    encoded = []
+    for write in writes:
+        register = write.register
+        try:
+            if register.register_type == 'coil':
+                values = [bool(write.value)]
+            elif register.register_type == 'holding':
+                values = encode_register_value(register, write.value)
+            else:
+                raise ValueError(f"{register.register_type} tipindeki register'a yazılamaz.")
+        except (ValueError, TypeError) as e:
+            write.resolve(e)
+            continue
+        encoded.append((register.register_type, get_pdu_address(register), values, write))
+
+    blocks = []
+    for register_type, start, values, write in sorted(encoded, key=lambda e: (e[0], e[1])):
+        limit = MAX_WRITE_BITS if register_type == 'coil' else MAX_WRITE_WORDS
+        last = blocks[-1] if blocks else None
+        if last and last.register_type == register_type and last.end == start and len(last.values) + len(values) <= limit:
+            last.values.extend(values)
+            last.writes.append(write)
+        else:
+            blocks.append(WriteBlock(register_type, start, list(values), [write]))
+    return blocks
+
+
+async def write_block(client, block, slave_id):
+    """Bloğu tek istekle yazar; tek coil/register için tekil yazma fonksiyonları kullanılır."""
+    if block.register_type == 'coil':
+        if len(block.values) == 1:
+            result = await client.write_coil(address=block.start, value=block.values[0], slave=slave_id)
+        else:
+            result = await client.write_coils(address=block.start, values=block.values, slave=slave_id)
+    elif len(block.values) == 1:
+        result = await client.write_register(address=block.start, value=block.values[0], slave=slave_id)
+    else:
+        result = await client.write_registers(address=block.start, values=block.values, slave=slave_id)
+    if result.isError():
+        raise WriteRejected(str(result))
+
+
+class ModbusWriteQueue:
+    """Cihaz başına bekleyen yazmaları tutar ve okuma motorunun loop'unda boşaltır."""
+
+    def __init__(self, coalesce_window=None):
+        # Kuyruk boşaltılmadan önce aynı cihaza gelecek diğer yazmalar için beklenen süre (saniye)
+        self.coalesce_window = coalesce_window if coalesce_window is not None else getattr(settings, 'MODBUS_WRITE_COALESCE_WINDOW', 0.05)
+        self._pending = {}
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def submit(self, device, register, value, coalesce=True):
+        """
+        Yazmayı kuyruğa ekler ve sonucu taşıyan bir Future döndürür. `coalesce=False`
+        ile kuyruk beklemeden boşaltılır.
+        """
+        return self.submit_many([(device, register, value)], coalesce)[0]
+
+    def submit_many(self, writes, coalesce=True):
+        """
+        (cihaz, register, değer) üçlülerinin hepsini kilit altında kuyruğa ekler,
+        ardından cihaz başına tek boşaltma planlar; böylece `coalesce=False` ile de
+        aynı cihazın yazmaları tek seferde gönderilir (yazmaları zaten toplu
+        gönderen okuma döngüsü için). Yazmalarla aynı sırada Future'lar döndürür.
+        """
+        futures = []
+        scheduled = []
+        with self._lock:
+            for device, register, value in writes:
+                future = Future()
+                futures.append(future)
+                pending = self._pending.get(device.id)
+                if pending is None:
+                    pending = self._pending[device.id] = {}
+                    self._devices[device.id] = device
+                    scheduled.append(device.id)
+                write = pending.get(register.id)
+                if write is None:
+                    pending[register.id] = PendingWrite(register, value, [future])
+                else:
+                    # Henüz gönderilmemiş yazma: son değer geçerli, tüm çağıranlar aynı sonucu alır
+                    write.value = value
+                    write.futures.append(future)
+
+        if scheduled:
+            loop, poller = get_poller()
+            delay = self.coalesce_window if coalesce else 0
+            for device_id in scheduled:
+                asyncio.run_coroutine_threadsafe(self._flush(device_id, poller, delay), loop)
+        return futures
+
+    async def _flush(self, device_id, poller, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        with self._lock:
+            writes = list(self._pending.pop(device_id, {}).values())
+            device = self._devices.pop(device_id)
+
+        blocks = plan_device_writes(writes)
+        if not blocks:
+            return
+        client, lock = poller.get_client(device.connection_host, device.port)
+        async with lock:
+            try:
+                if not (client.connected or await client.connect()):
+                    raise ConnectionException(f"{device.name} cihazına bağlanılamadı.")
+                for block in blocks:
+                    try:
+                        await write_block(client, block, device.slave_id)
+                    except WriteRejected as e:
+                        # Cihaz hata cevabı verdi; soket sağlam, diğer bloklara devam
+                        logger.error(f"!!! YAZMA HATASI: {device.name} / {block.register_type} {block.start}: {e}")
+                        for write in block.writes:
+                            write.resolve(e)
+                        continue
+                    logger.info(
+                        f"--> YAZILDI: {device.name} / {block.register_type} {block.start}-{block.end - 1} "
+                        f"({len(block.writes)} register)"
+                    )
+                    for write in block.writes:
+                        write.resolve()
+            except Exception as e:
+                # Bağlantı koptu; kalan yazmalar hata ile tamamlanır
+                client.close()
+                for block in blocks:
+                    for write in block.writes:
+                        write.resolve(e)
+
+
+write_queue = ModbusWriteQueue()